@@ -1,4 +1,5 @@
 from jsonrpc11base import JSONRPCService, errors
+from jsonrpc11base.cache import CachePolicy
 from jsonrpc11base.service_description import ServiceDescription
 from http.server import HTTPServer, BaseHTTPRequestHandler
 
@@ -58,7 +59,8 @@ my_service = MyService()
 service.add(my_service.add, name='new')
 
 # Adds the method "get" to the service; the function name will become the service method.
-service.add(my_service.get)
+# Entries never change once added, so their results may be cached.
+service.add(my_service.get, cache=CachePolicy(max_entries=1000, ttl=60))
 
 # Adds the method "search"
 service.add(my_service.search)
@@ -78,14 +80,21 @@ class ServiceHandler(BaseHTTPRequestHandler):
         content_length = int(self.headers['Content-Length'])
         body = self.rfile.read(content_length)
 
-        # assume it is a service call.
-        response = service.call(body)
+        # assume it is a service call; call_bytes takes and returns bytes, so
+        # there is no need to decode the request or encode the response.
+        response = service.call_bytes(body)
+
+        # A batch of notifications only
+        if response is None:
+            self.send_response(204)
+            self.end_headers()
+            return
 
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
         self.end_headers()
 
-        self.wfile.write(response.encode(encoding='utf_8'))
+        self.wfile.write(response)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+"""
+The example database service as a WSGI application, e.g. under gunicorn:
+
+    gunicorn --threads 8 examples.database.wsgi:app
+
+The database is kept in memory, so each worker process would have its own;
+hence threads rather than workers.
+"""
+from jsonrpc11base.wsgi import WSGIApplication
+from examples.database.main import service
+
+app = WSGIApplication(service)
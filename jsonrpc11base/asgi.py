@@ -0,0 +1,143 @@
+"""
+ASGI application serving a JSONRPCService
+
+Serves the service over HTTP under any ASGI server, e.g. uvicorn or hypercorn:
+
+    app = ASGIApplication(service)
+
+As with the WSGI application, each POST request body is a JSON-RPC request and
+its response, with status 200, the body of the HTTP response. Calls are made
+through the service's asyncio entry point, so coroutine method handlers are
+awaited on the event loop, and plain ones run in the service's thread pool;
+many connections may thus be served at once by a single process.
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from jsonrpc11base.main import JSONRPCService
+from jsonrpc11base.wsgi import DEFAULT_MAX_BODY_SIZE
+
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class ASGIApplication(object):
+    """
+    An ASGI application calling a JSONRPCService.
+
+    The request body is gathered from its chunks in a single join, and passed
+    to JSONRPCService.call_bytes_async; the encoded response is sent as is.
+    With stream, the response is instead that of
+    JSONRPCService.call_stream_async, sent in parts, without a Content-Length,
+    as array results are encoded.
+
+    The service's pools are shut down when the server shuts down, if it sends
+    lifespan events.
+
+    Args:
+        service: the service to call
+        max_body_size: the largest request body accepted, in bytes; larger
+            requests are refused with status 413 as soon as they exceed it
+        options: an optional function of the ASGI scope returning the options
+            passed to the service's method handlers; the options are None if
+            not given
+        stream: whether to stream responses (see above)
+    """
+
+    def __init__(self, service: JSONRPCService,
+                 max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+                 options: Optional[Callable[[dict], Any]] = None,
+                 stream: bool = False):
+        self.service = service
+        self.max_body_size = max_body_size
+        self.options = options
+        self.stream = stream
+
+    async def __call__(self, scope: dict, receive: Receive, send: Send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+
+    async def handle_http(self, scope: dict, receive: Receive, send: Send):
+        if scope['method'] != 'POST':
+            await self.error(send, 405, 'Method Not Allowed', [(b'allow', b'POST')])
+            return
+
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunk = message.get('body', b'')
+            if chunk:
+                size += len(chunk)
+                if size > self.max_body_size:
+                    await self.error(send, 413, 'Payload Too Large')
+                    return
+                chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        body = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+        options = self.options(scope) if self.options is not None else None
+        if self.stream:
+            await self.respond_stream(send, await self.service.call_stream_async(body, options))
+            return
+        response = await self.service.call_bytes_async(body, options)
+
+        if response is None:
+            # A batch of notifications only
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(response)).encode('latin-1'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': response})
+
+    @staticmethod
+    async def respond_stream(send: Send, parts: AsyncIterator[bytes]):
+        started = False
+        async for part in parts:
+            if not started:
+                await send({
+                    'type': 'http.response.start',
+                    'status': 200,
+                    'headers': [(b'content-type', b'application/json')]
+                })
+                started = True
+            await send({'type': 'http.response.body', 'body': part, 'more_body': True})
+        if not started:
+            # A batch of notifications only
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def handle_lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.service.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def error(send: Send, status: int, reason: str,
+                    headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        body = f'{status} {reason}'.encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'text/plain; charset=utf-8'),
+                (b'content-length', str(len(body)).encode('latin-1'))
+            ] + (headers or [])
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,131 @@
+"""
+Method result caching
+
+A method added with a CachePolicy has its results kept in a bounded LRU cache,
+keyed on its params, so that repeated calls within the policy's time to live
+are answered without calling the method.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def params_key(params, options) -> Hashable:
+    """
+    The default cache key: the params, as canonical JSON. The options are
+    ignored.
+    """
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+
+class CachePolicy(object):
+    """
+    How the results of a method are cached.
+
+    Args:
+        max_entries: the number of results kept; the least recently used is
+            evicted to make room for a new one
+        ttl: the number of seconds a result is kept for (optional, defaults to
+            keeping it until it is evicted or invalidated)
+        key: a function of the params and options returning the hashable key
+            which results are cached under (optional, defaults to the params
+            as canonical JSON, ignoring the options); calls which may return
+            different results must have different keys, so if the result
+            depends on the options, the key must too
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: Optional[float] = None,
+                 key: Callable[[Any, Any], Hashable] = params_key):
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        if ttl is not None and ttl <= 0:
+            raise ValueError('ttl must be positive')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key = key
+
+
+class CacheEntry(object):
+    """
+    A cached result, and its serialized JSON once a response has needed it;
+    the service serializes cached results only once, and splices the JSON into
+    each response.
+    """
+    __slots__ = ('expires', 'result', 'encoded', 'encoded_bytes')
+
+    def __init__(self, expires: Optional[float], result):
+        self.expires = expires
+        self.result = result
+        self.encoded: Optional[str] = None
+        self.encoded_bytes: Optional[bytes] = None
+
+
+class ResultCache(object):
+    """
+    A bounded LRU cache of method results, with an optional time to live.
+
+    Results are returned as stored, not copied, so must not be modified by
+    whoever receives them.
+    """
+
+    def __init__(self, policy: CachePolicy):
+        self.policy = policy
+        # Key => CacheEntry, least recently used first
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, params, options) -> Hashable:
+        return self.policy.key(params, options)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Returns the entry of a cached, unexpired result, if any.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.expires is None or entry.expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, result) -> CacheEntry:
+        ttl = self.policy.ttl
+        entry = CacheEntry(time.monotonic() + ttl if ttl is not None else None, result)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.policy.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Removes the result cached under a key; returns whether there was one.
+        """
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries)
+        }
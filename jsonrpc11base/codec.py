@@ -0,0 +1,186 @@
+"""
+JSON codecs
+
+The service parses requests and serializes responses through a codec, so that
+a faster JSON library may be used in place of the standard library's json
+module. orjson, python-rapidjson and ujson are supported if installed; none of
+them is required.
+"""
+import importlib
+import json
+from typing import Any, Union
+
+# Codecs tried, in order, when the codec is "auto"
+AUTO_CODECS = ['orjson', 'rapidjson', 'ujson']
+
+
+class JSONCodec(object):
+    """
+    JSON codec based on the standard library's json module; also the base class
+    for the other codecs.
+    """
+    name = 'json'
+
+    # Exceptions raised by loads() for invalid JSON
+    decode_errors: tuple = (ValueError,)
+
+    # The item and key separators written by dumps()
+    separators = (', ', ': ')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data)
+
+    def dumps_bytes(self, data: Any) -> bytes:
+        return json.dumps(data).encode('utf-8')
+
+    def dumps_result_response(self, result_json: str, request_id) -> str:
+        """
+        Returns what dumps() would of a result response, given the result
+        already serialized, so that the result need not be serialized again.
+        The response members are in the order make_result_response() adds them.
+        """
+        item, key = self.separators
+        if request_id is None:
+            return f'{{"version"{key}"1.1"{item}"result"{key}{result_json}}}'
+        return (f'{{"version"{key}"1.1"{item}"result"{key}{result_json}'
+                f'{item}"id"{key}{self.dumps(request_id)}}}')
+
+    def dumps_result_response_bytes(self, result_json: bytes, request_id) -> bytes:
+        """
+        Like dumps_result_response, but as dumps_bytes() would.
+        """
+        return b''.join([self.result_response_prefix_bytes(), result_json,
+                         self.result_response_suffix_bytes(request_id)])
+
+    def result_response_prefix_bytes(self) -> bytes:
+        """
+        Returns the start of a result response, as dumps_bytes() would write
+        it, up to the result.
+        """
+        item, key = self.separators
+        return f'{{"version"{key}"1.1"{item}"result"{key}'.encode('utf-8')
+
+    def result_response_suffix_bytes(self, request_id) -> bytes:
+        """
+        Returns the end of a result response, as dumps_bytes() would write it,
+        after the result.
+        """
+        if request_id is None:
+            return b'}'
+        item, key = self.separators
+        return b''.join([f'{item}"id"{key}'.encode('utf-8'), self.dumps_bytes(request_id), b'}'])
+
+    def dumps_items_bytes(self, items: list) -> bytes:
+        """
+        Returns the items of a list as dumps_bytes() would write them within
+        an array, without the brackets; arrays may then be written in parts.
+        """
+        return self.dumps_bytes(items)[1:-1]
+
+    def parse_error_message(self, data: Union[str, bytes], error: Exception) -> str:
+        """
+        Returns the message for a parse error raised by loads().
+
+        Each library words its errors differently, so the message is taken from
+        the standard library's parser where possible; parse error responses are
+        then identical whichever codec is in use.
+        """
+        if type(self) is not JSONCodec:
+            try:
+                json.loads(data)
+            except ValueError as err:
+                return str(err)
+        return str(error)
+
+
+class OrjsonCodec(JSONCodec):
+    separators = (',', ':')
+    name = 'orjson'
+
+    def __init__(self):
+        self.orjson = importlib.import_module('orjson')
+        self.decode_errors = (self.orjson.JSONDecodeError,)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+    def dumps(self, data):
+        return self.orjson.dumps(data).decode('utf-8')
+
+    def dumps_bytes(self, data):
+        return self.orjson.dumps(data)
+
+
+class RapidjsonCodec(JSONCodec):
+    separators = (',', ':')
+    name = 'rapidjson'
+
+    def __init__(self):
+        self.rapidjson = importlib.import_module('rapidjson')
+        self.decode_errors = (ValueError,)
+
+    def loads(self, data):
+        return self.rapidjson.loads(data)
+
+    def dumps(self, data):
+        return self.rapidjson.dumps(data)
+
+    def dumps_bytes(self, data):
+        return self.rapidjson.dumps(data).encode('utf-8')
+
+
+class UjsonCodec(JSONCodec):
+    separators = (',', ':')
+    name = 'ujson'
+
+    def __init__(self):
+        self.ujson = importlib.import_module('ujson')
+        self.decode_errors = (ValueError,)
+
+    def loads(self, data):
+        return self.ujson.loads(data)
+
+    def dumps(self, data):
+        return self.ujson.dumps(data)
+
+    def dumps_bytes(self, data):
+        return self.ujson.dumps(data).encode('utf-8')
+
+
+CODECS = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'rapidjson': RapidjsonCodec,
+    'ujson': UjsonCodec
+}
+
+
+def get_codec(codec: Union[str, JSONCodec] = 'json') -> JSONCodec:
+    """
+    Returns a codec instance.
+
+    Args:
+        codec: a JSONCodec instance, which is returned as is; the name of a
+            codec ("json", "orjson", "rapidjson" or "ujson"); or "auto", which
+            selects the first of orjson, rapidjson and ujson which is installed,
+            falling back to json.
+
+    Raises:
+        ValueError: the codec name is not known
+        ImportError: the library for the named codec is not installed
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == 'auto':
+        for name in AUTO_CODECS:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+        return JSONCodec()
+    if codec not in CODECS:
+        raise ValueError(f'Unknown JSON codec "{codec}"')
+    return CODECS[codec]()
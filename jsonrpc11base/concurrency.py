@@ -0,0 +1,216 @@
+"""
+Concurrency control for method calls
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from jsonrpc11base.errors import ConcurrencyLimitServerError
+
+
+class ConcurrencyLimiter(object):
+    """
+    Limits the number of concurrent calls of a method.
+
+    Up to max_concurrency calls run at once; up to max_queue more wait, first
+    come first served, for one of them to finish. Any call beyond that is
+    rejected at once with ConcurrencyLimitServerError, rather than adding to
+    the latency of everything queued behind it.
+
+    Both threads and asyncio tasks may wait for a slot; a slot released by one
+    call is handed directly to the longest waiting one.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        if max_queue < 0:
+            raise ValueError('max_queue may not be negative')
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected_count = 0
+        self.lock = threading.Lock()
+        # Each waiter is a function which wakes it up, owning the released slot
+        self.waiters: deque = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiters)
+
+    def reject(self):
+        self.rejected_count += 1
+        raise ConcurrencyLimitServerError(
+            message=(f'The method is already running {self.max_concurrency} '
+                     f'call(s), with {self.max_queue} more waiting'),
+            max_concurrency=self.max_concurrency,
+            max_queue=self.max_queue
+        )
+
+    def acquire(self):
+        """
+        Takes a slot, blocking the thread while queued.
+
+        Raises:
+            ConcurrencyLimitServerError: the queue is full
+        """
+        with self.lock:
+            if self.in_flight < self.max_concurrency:
+                self.in_flight += 1
+                return
+            if len(self.waiters) >= self.max_queue:
+                self.reject()
+            event = threading.Event()
+            self.waiters.append(event.set)
+        event.wait()
+
+    async def acquire_async(self):
+        """
+        Takes a slot, suspending the task while queued.
+
+        Raises:
+            ConcurrencyLimitServerError: the queue is full
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.in_flight < self.max_concurrency:
+                self.in_flight += 1
+                return
+            if len(self.waiters) >= self.max_queue:
+                self.reject()
+            future = loop.create_future()
+
+            def wake():
+                loop.call_soon_threadsafe(set_result_unless_done, future)
+
+            self.waiters.append(wake)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                try:
+                    self.waiters.remove(wake)
+                    woken = False
+                except ValueError:
+                    woken = True
+            # The slot was already handed over, so pass it on.
+            if woken:
+                self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            if self.waiters:
+                # The slot goes straight to the next waiter, so in_flight is unchanged.
+                self.waiters.popleft()()
+            else:
+                self.in_flight -= 1
+
+
+def set_result_unless_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class FlightAbandoned(Exception):
+    """
+    The call being shared was cancelled; a call waiting for it runs afresh.
+    """
+
+
+class SingleFlight(object):
+    """
+    Shares one execution between concurrent identical calls.
+
+    The first call for a key runs; any call for the same key made while it is
+    running waits for it and gets its result, or its exception, rather than
+    running again. Once the call is done, the next call for the key runs
+    afresh.
+
+    Both threads and asyncio tasks may share an execution. A waiting task
+    which is cancelled stops waiting, leaving the running call and the other
+    waiters be; if the running call's task is cancelled, the first of the
+    waiters to notice runs the call in its place, and the others wait for it.
+    """
+
+    def __init__(self):
+        # Key => Future of the running call
+        self.flights: Dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+        self.shared_count = 0
+
+    def join(self, key: Hashable, waited: bool = False) -> Tuple[Future, bool]:
+        """
+        Returns the future of the call running for a key, and whether it is
+        the caller's own, in which case the caller must run it and finish it.
+        A caller which waited for an abandoned call is already counted as
+        shared.
+        """
+        with self.lock:
+            future = self.flights.get(key)
+            if future is not None:
+                if not waited:
+                    self.shared_count += 1
+                return future, False
+            future = Future()
+            self.flights[key] = future
+            return future, True
+
+    def finish(self, key: Hashable, future: Future, result=None, exception=None):
+        with self.lock:
+            del self.flights[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def call(self, key: Hashable, func: Callable):
+        """
+        Calls func, unless a call for the same key is already running, and
+        returns its result.
+        """
+        waited = False
+        while True:
+            future, own = self.join(key, waited)
+            if own:
+                break
+            try:
+                return future.result()
+            except FlightAbandoned:
+                waited = True
+        try:
+            result = func()
+        except BaseException as ex:
+            self.finish(key, future, exception=ex)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    async def call_async(self, key: Hashable, func: Callable[[], Awaitable]):
+        """
+        Like call, but awaits func, a coroutine function.
+        """
+        waited = False
+        while True:
+            future, own = self.join(key, waited)
+            if own:
+                break
+            try:
+                # Shielded, so that cancelling this waiter cancels neither the
+                # shared future nor anyone else waiting for it
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except FlightAbandoned:
+                waited = True
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # Any waiters run the call afresh, rather than being cancelled too.
+            self.finish(key, future, exception=FlightAbandoned())
+            raise
+        except BaseException as ex:
+            self.finish(key, future, exception=ex)
+            raise
+        self.finish(key, future, result)
+        return result
@@ -142,10 +142,23 @@ class InvalidResultServerError(ServerError):
         if value is not None:
             self.error['value'] = value
 
+
+class ConcurrencyLimitServerError(ServerError):
+    """The method's concurrency limit and queue are both full."""
+    code = -32003
+    message = 'Concurrency limit exceeded'
+
+    def __init__(self, message, max_concurrency=None, max_queue=None):
+        super().__init__(message)
+        if max_concurrency is not None:
+            self.error['max_concurrency'] = max_concurrency
+        if max_queue is not None:
+            self.error['max_queue'] = max_queue
+
 #
 # class ServerError_AuthenticationRequired(CustomServerError):
 #     """Generic server error."""
-#     code = -32003
+#     code = -32004
 #     message = 'Authentication required'
 
 
@@ -0,0 +1,266 @@
+"""
+Request limits
+
+A service given RequestLimits checks each request body against them as part
+of parsing it, before anything else is done with it, and refuses one which
+exceeds a limit with an invalid request error; a deeply nested or huge
+request would otherwise cost time to decode, and again to validate.
+
+The size, nesting depth and string lengths of a body are checked before it is
+decoded, by a LimitScanner. JSONRPCService.call_chunks takes a body as chunks
+of bytes, e.g. as read from a socket, and scans each as it arrives, so that a
+body exceeding a limit is refused without the rest of it being read or held.
+The number of elements of arrays and objects is checked once the body has
+been decoded, and then only if the body has enough commas for an array or
+object to have too many elements.
+
+Requests given already decoded, to call_py, are checked for all but size by
+walking them.
+"""
+import itertools
+import operator
+import re
+from typing import Any, Optional
+
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024
+
+DEFAULT_MAX_DEPTH = 64
+
+# An escape sequence, or the start of one; neither may end a string
+ESCAPE = re.compile(rb'\\.', re.DOTALL)
+
+# Maps opening brackets to 2 and closing ones to 0, deleting all else, so that
+# the nesting depth after the kth bracket is the sum of the first k, minus k
+BRACKETS = bytes.maketrans(b'[{]}', b'\x02\x02\x00\x00')
+NOT_BRACKETS = bytes(byte for byte in range(256) if byte not in b'[{]}')
+
+
+class LimitExceededError(ValueError):
+    """A request body exceeds one of its RequestLimits."""
+
+
+class RequestLimits(object):
+    """
+    Limits on request bodies.
+
+    Args:
+        max_size: the largest body accepted, in bytes
+        max_depth: the deepest nesting of arrays and objects accepted
+        max_elements: the most elements accepted in any one array, or members
+            in any one object (optional, defaults to no limit)
+        max_string_length: the longest string accepted, including object
+            keys, in bytes as written in the body, escapes included, or in
+            characters for requests already decoded (optional, defaults to no
+            limit)
+
+    A limit of None is not checked.
+    """
+
+    def __init__(self, max_size: Optional[int] = DEFAULT_MAX_SIZE,
+                 max_depth: Optional[int] = DEFAULT_MAX_DEPTH,
+                 max_elements: Optional[int] = None,
+                 max_string_length: Optional[int] = None):
+        for name, limit in [('max_size', max_size), ('max_depth', max_depth),
+                            ('max_elements', max_elements),
+                            ('max_string_length', max_string_length)]:
+            if limit is not None and limit < 1:
+                raise ValueError(f'{name} must be at least 1')
+        self.max_size = max_size
+        self.max_depth = max_depth
+        self.max_elements = max_elements
+        self.max_string_length = max_string_length
+
+
+class LimitScanner(object):
+    """
+    Checks a JSON text, given in chunks, against RequestLimits.
+
+    Only the brackets and strings of the text are looked at, which is enough
+    to follow nesting and string lengths, and each chunk is looked at with a
+    few operations over all of it, rather than byte by byte, nor token by
+    token, in Python. Whether the text is otherwise valid JSON is left to the
+    parser. UTF-8 multi-byte sequences contain no ASCII bytes, so the text may
+    be split into chunks anywhere.
+    """
+
+    def __init__(self, limits: RequestLimits):
+        self.limits = limits
+        self.size = 0
+        self.depth = 0
+        self.in_string = False
+        # Whether the last chunk ended with a backslash within a string
+        self.escaped = False
+        self.string_length = 0
+        # The number of commas outside strings so far
+        self.commas = 0
+
+    def feed(self, chunk: bytes):
+        """
+        Checks the next chunk of the text.
+
+        Raises:
+            LimitExceededError: the text so far exceeds a limit
+        """
+        limits = self.limits
+        self.size += len(chunk)
+        if limits.max_size is not None and self.size > limits.max_size:
+            raise LimitExceededError(
+                f'The request is larger than the maximum of {limits.max_size} bytes')
+        if not chunk or (limits.max_depth is None and limits.max_elements is None
+                         and limits.max_string_length is None):
+            return
+
+        # Escape sequences are replaced with as many bytes which are not
+        # quotes, so that the quotes left delimit the strings.
+        if self.escaped:
+            self.escaped = False
+            chunk = b'_' + chunk[1:]
+        if b'\\' in chunk:
+            chunk = ESCAPE.sub(b'__', chunk)
+            if chunk.endswith(b'\\'):
+                # The byte escaped is the first of the next chunk.
+                self.escaped = True
+                chunk = chunk[:-1] + b'_'
+
+        # The parts of the chunk are alternately outside and within strings.
+        parts = chunk.split(b'"')
+        first_outside = 1 if self.in_string else 0
+        if self.in_string:
+            self.add_string_length(len(parts[0]))
+        if len(parts) > 1:
+            strings = parts[first_outside + 1:-1:2]
+            if strings:
+                self.string_length = 0
+                self.add_string_length(max(map(len, strings)))
+            self.in_string = (len(parts) - first_outside) % 2 == 0
+            if self.in_string:
+                self.string_length = 0
+                self.add_string_length(len(parts[-1]))
+
+        if limits.max_depth is not None or limits.max_elements is not None:
+            outside = b''.join(parts[first_outside::2])
+            self.commas += outside.count(b',')
+            if limits.max_depth is not None:
+                self.check_depth(outside)
+
+    def may_exceed_elements(self) -> bool:
+        """
+        Whether the text scanned has enough commas for an array or object of
+        it to have more than max_elements elements.
+        """
+        max_elements = self.limits.max_elements
+        return max_elements is not None and self.commas >= max_elements
+
+    def check_depth(self, outside: bytes):
+        brackets = outside.translate(BRACKETS, NOT_BRACKETS)
+        if not brackets:
+            return
+        opening = brackets.count(2)
+        closing = len(brackets) - opening
+        max_depth = self.limits.max_depth
+        # Only if there are enough opening brackets need the depth be followed.
+        if self.depth + opening > max_depth:
+            deepest = max(map(operator.sub, itertools.accumulate(brackets), itertools.count(1)))
+            if self.depth + deepest > max_depth:
+                raise depth_error(max_depth)
+        self.depth = max(self.depth + opening - closing, 0)
+
+    def add_string_length(self, length: int):
+        self.string_length += length
+        max_string_length = self.limits.max_string_length
+        if max_string_length is not None and self.string_length > max_string_length:
+            raise string_length_error(max_string_length, 'bytes')
+
+
+def check_body(body: bytes, limits: RequestLimits) -> bool:
+    """
+    Checks a whole request body against the limits before it is decoded.
+
+    Most bodies are too small to exceed any limit but their size, as counting
+    the bytes which might be brackets, commas or within strings shows, without
+    scanning them.
+
+    Returns:
+        Whether its arrays and objects must be checked for their number of
+        elements once it is decoded (see check_elements)
+
+    Raises:
+        LimitExceededError: the body exceeds a limit
+    """
+    if limits.max_size is not None and len(body) > limits.max_size:
+        raise LimitExceededError(
+            f'The request is larger than the maximum of {limits.max_size} bytes')
+    if ((limits.max_depth is None
+         or body.count(b'[') + body.count(b'{') <= limits.max_depth)
+            and (limits.max_string_length is None
+                 or len(body) <= limits.max_string_length)):
+        return limits.max_elements is not None and body.count(b',') >= limits.max_elements
+    scanner = LimitScanner(limits)
+    scanner.feed(body)
+    return scanner.may_exceed_elements()
+
+
+def string_length_error(max_string_length: int, unit: str) -> LimitExceededError:
+    return LimitExceededError(
+        f'The request has a string longer than the maximum of {max_string_length} {unit}')
+
+
+def depth_error(max_depth: int) -> LimitExceededError:
+    return LimitExceededError(
+        f'The request is nested deeper than the maximum of {max_depth} levels')
+
+
+def elements_error(max_elements: int) -> LimitExceededError:
+    return LimitExceededError(
+        f'The request has an array or object of more than {max_elements} elements')
+
+
+def check_elements(value: Any, max_elements: int):
+    """
+    Checks that no array or object of a decoded request has more than
+    max_elements elements.
+
+    Raises:
+        LimitExceededError: an array or object has too many elements
+    """
+    containers = [value]
+    while containers:
+        container = containers.pop()
+        if len(container) > max_elements:
+            raise elements_error(max_elements)
+        items = container.values() if isinstance(container, dict) else container
+        containers.extend(item for item in items if isinstance(item, (list, dict)))
+
+
+def check_value(value: Any, limits: RequestLimits):
+    """
+    Checks a decoded request against the limits, other than its size, which
+    is not known; string lengths are in characters.
+
+    Raises:
+        LimitExceededError: the request exceeds a limit
+    """
+    max_depth = limits.max_depth
+    max_elements = limits.max_elements
+    max_string_length = limits.max_string_length
+    values = [(value, 0)]
+    while values:
+        value, depth = values.pop()
+        if isinstance(value, str):
+            if max_string_length is not None and len(value) > max_string_length:
+                raise string_length_error(max_string_length, 'characters')
+            continue
+        if isinstance(value, dict):
+            items = list(value.values())
+            # Keys are strings too.
+            items.extend(value.keys())
+        elif isinstance(value, list):
+            items = value
+        else:
+            continue
+        depth += 1
+        if max_depth is not None and depth > max_depth:
+            raise depth_error(max_depth)
+        if max_elements is not None and len(value) > max_elements:
+            raise elements_error(max_elements)
+        values.extend((item, depth) for item in items)
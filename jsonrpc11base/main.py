@@ -8,11 +8,16 @@ Uses Google Style Python docstrings:
 """
 from jsonrpc11base.service_description import ServiceDescription
 import jsonrpc11base.validation.validation as validation
-import json
+from jsonrpc11base.validation.envelope import validate_dispatchable, validate_request
+from jsonrpc11base.codec import JSONCodec, get_codec
+import asyncio
 import os
 import logging
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 
-from typing import Callable, Optional, Union, Dict
+from typing import (AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional,
+                    Union, Dict, List, Tuple)
 
 import jsonrpc11base.exceptions as exceptions
 import traceback
@@ -22,12 +27,47 @@ from jsonrpc11base.errors import (make_standard_jsonrpc_error, make_custom_jsonr
                                   InvalidParamsError, JSONRPCError, APIError,
                                   MethodNotFoundError,
                                   ReservedErrorCodeServerError, InvalidResultServerError)
-from jsonrpc11base.types import (MethodRequest, MethodResult)
+from jsonrpc11base.types import (MethodRequest, MethodResult, BatchRequest, BatchResult,
+                                 Identifier, ParamsResult)
 from jsonrpc11base.method import Method
+from jsonrpc11base.cache import CachePolicy, ResultCache, params_key
+from jsonrpc11base.metrics import EventCounters
+from jsonrpc11base.prometheus import MetricsRenderer
+from jsonrpc11base.process import RemoteException
+from jsonrpc11base.limits import (LimitExceededError, LimitScanner, RequestLimits,
+                                  check_body, check_elements, check_value)
+from jsonrpc11base.streaming import (DEFAULT_STREAM_CHUNK_SIZE, is_streamable, iter_chunks,
+                                     iter_chunks_async)
 
 log = logging.getLogger(__name__)
 
 
+def is_notification(req_data, response) -> bool:
+    """
+    A request in a batch is a notification if it has no id, as in JSON-RPC 2.0;
+    an invalid request is always responded to.
+    """
+    if not isinstance(req_data, dict) or 'id' in req_data:
+        return False
+    error = response.get('error')
+    return error is None or error.get('code') != -32600
+
+
+def make_result_response(result, request_id: Identifier) -> MethodResult:
+    response_data = {
+        'version': '1.1',
+        'result': result
+    }
+    if request_id is not None:
+        response_data['id'] = request_id
+    return response_data
+
+
+async def iter_parts(parts: List[bytes]) -> AsyncIterator[bytes]:
+    for part in parts:
+        yield part
+
+
 class JSONRPCService(object):
     """
     The JSONRPCService class is a JSON-RPC 1.1 implementation
@@ -36,18 +76,60 @@ class JSONRPCService(object):
                  description: ServiceDescription,
                  schema_dir: Optional[Union[str, None]] = None,
                  validate_params: bool = False,
-                 validate_result: bool = False):
+                 validate_result: bool = False,
+                 strict_request_validation: bool = False,
+                 codec: Union[str, JSONCodec] = 'json',
+                 batch_executor: Optional[Executor] = None,
+                 max_workers: Optional[int] = None,
+                 max_processes: Optional[int] = None,
+                 stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                 limits: Optional[RequestLimits] = None,
+                 lazy_schemas: bool = False):
         """
         Initialize a new JSONRPCService object.
 
         Args:
             description: A ServiceDescription instance
             schema_dir: A directory path in which service schemas
-                        may be found
+                        may be found, or the path of a bundle of them
+                        written by jsonrpc11base.validation.bundle
             validate_params: A boolean flag controlling whether parameters are
                         validated or not; defaults to False
             validate_result: A boolean flag controlling whether the result is
                         validated or not; defaults  to False
+            strict_request_validation: A boolean flag controlling whether the
+                        request envelope is validated with the built-in
+                        jsonschema rather than the equivalent, much faster,
+                        hand-written checks; useful for debugging. The whole
+                        envelope is then validated even if params are not;
+                        defaults to False
+            codec: The JSON codec used to parse requests and serialize
+                        responses; a JSONCodec instance, a codec name ("json",
+                        "orjson", "rapidjson", "ujson"), or "auto" to use the
+                        fastest one installed; defaults to "json", the
+                        standard library
+            batch_executor: An optional concurrent.futures.Executor on which
+                        the requests of a batch are run concurrently; if not
+                        provided, they are run one after another
+            max_workers: The maximum number of threads of the service's own
+                        thread pool, which runs calls made with "submit", and
+                        plain method handlers called with "call_async";
+                        defaults to the ThreadPoolExecutor default
+            max_processes: The maximum number of worker processes of the
+                        service's process pool, which runs methods added with
+                        executor="process"; defaults to the
+                        ProcessPoolExecutor default
+            stream_chunk_size: The number of items of an array result encoded
+                        at a time by "call_stream" and "call_stream_async";
+                        defaults to 1000
+            limits: Optional RequestLimits on the size, nesting depth, number
+                        of array and object elements, and string lengths of
+                        requests, which are refused with an invalid request
+                        error if they exceed any; defaults to no limits
+            lazy_schemas: A boolean flag controlling whether the service
+                        schemas are each loaded on first use, rather than all
+                        at once here, for a faster start with many methods;
+                        see "warm_schemas"; defaults to False
         """
         # Initialize global jsonrpc schemas, which validate the overall
         # JSON-RPC 1.1 structures. These schemas are built-in.
@@ -58,7 +140,8 @@ class JSONRPCService(object):
         # are provided in the schema directory, service params and results
         # are not validated.
         if schema_dir is not None:
-            self.service_validation = validation.Validation(schema_dir=schema_dir)
+            self.service_validation = validation.Validation(schema_dir=schema_dir,
+                                                            lazy=lazy_schemas)
         else:
             self.service_validation = None
 
@@ -69,8 +152,16 @@ class JSONRPCService(object):
         self.method_registry: Dict[str, Method] = {}
         self.system_method_registry: Dict[str, Method] = {}
 
-        # Add the built-in "system.describe" method
-        self.add(self.handle_system_describe, 'system.describe', system=True)
+        # Counters of requests, and of errors which occur before a method is found
+        self.counters = EventCounters()
+        self.metrics_renderer = MetricsRenderer()
+
+        # Add the built-in "system.describe" and "system.stats" methods. The
+        # description is polled, e.g. by load balancers as a health check, so
+        # its validated, serialized result is cached until it changes.
+        self.add(self.handle_system_describe, 'system.describe', system=True,
+                 cache=CachePolicy(max_entries=1, key=self.describe_cache_key))
+        self.add(self.handle_system_stats, 'system.stats', system=True)
 
         if self.service_validation is None:
             if validate_params:
@@ -80,10 +171,28 @@ class JSONRPCService(object):
 
         self.validate_params = validate_params
         self.validate_result = validate_result
+        self.strict_request_validation = strict_request_validation
+
+        self.codec = get_codec(codec)
+
+        self.batch_executor = batch_executor
+
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.max_processes = max_processes
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+
+        self.stream_chunk_size = stream_chunk_size
+
+        self.limits = limits
 
         self.description = description
 
-    def add(self, func: Callable, name: Optional[str] = None, system: bool = False):
+    def add(self, func: Callable, name: Optional[str] = None, system: bool = False,
+            max_concurrency: Optional[int] = None, max_queue: int = 0,
+            executor: Optional[str] = None, cache: Optional[CachePolicy] = None,
+            single_flight: bool = False):
         """
         Adds a new method to the jsonrpc service. If name argument is not
         given, function's own name will be used.
@@ -94,15 +203,139 @@ class JSONRPCService(object):
         Args:
             func: required python function handler to call for this method
             name: name of the method (optional, defaults to the function's name)
+            max_concurrency: the maximum number of calls of this method which may
+                run at once (optional, defaults to no limit)
+            max_queue: the number of calls beyond max_concurrency which may wait
+                for a running call to finish; any more fail at once with a
+                -32003 "Concurrency limit exceeded" error (defaults to 0)
+            executor: "process" to run the method in the service's process
+                pool, for CPU-bound methods; the function, params, options and
+                result must then be picklable (optional, defaults to running
+                the method in the calling thread)
+            cache: a CachePolicy under which the method's results are cached,
+                for methods whose result depends only on their params, or
+                on whatever the policy's key function uses, for a time
+                (optional, defaults to no caching)
+            single_flight: if True, a call made while an identical call of the
+                method is running waits for it and shares its result, rather
+                than running again; calls are identical if their cache keys
+                are, or, without a cache policy, if their params are (so the
+                options are then ignored) (defaults to False)
         """
         function_name = name if name else func.__name__
         registry = self.method_registry if not system else self.system_method_registry
         if function_name in registry:
             msg = f'Method "{function_name}" already registered'
             raise exceptions.DuplicateMethodName(msg)
-        registry[function_name] = Method(func)
+        registry[function_name] = Method(func, max_concurrency=max_concurrency,
+                                         max_queue=max_queue, executor=executor,
+                                         cache=cache, single_flight=single_flight)
+
+    def invalidate(self, method_name: str, params=None, options=None) -> bool:
+        """
+        Removes the cached result of a method for the given params and options.
 
-    def call(self, jsondata: str, options=None) -> str:
+        Returns:
+            Whether there was a cached result.
+
+        Raises:
+            KeyError: the method does not exist, or does not cache its results
+        """
+        cache = self.get_cache(method_name)
+        return cache.invalidate(cache.make_key(params, options))
+
+    def clear_cache(self, method_name: Optional[str] = None):
+        """
+        Removes all cached results of a method, or of every method if no name
+        is given.
+
+        Raises:
+            KeyError: the method does not exist, or does not cache its results
+        """
+        if method_name is not None:
+            self.get_cache(method_name).clear()
+            return
+        for registry in [self.method_registry, self.system_method_registry]:
+            for method in registry.values():
+                if method.cache is not None:
+                    method.cache.clear()
+
+    def get_cache(self, method_name: str) -> ResultCache:
+        method = self.method_registry.get(method_name)
+        if method is None:
+            method = self.system_method_registry.get(method_name)
+        if method is None:
+            raise KeyError(f'Method "{method_name}" not found')
+        if method.cache is None:
+            raise KeyError(f'Method "{method_name}" does not cache its results')
+        return method.cache
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        The service's thread pool, created on first use.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='jsonrpc11base')
+        return self._executor
+
+    @property
+    def process_executor(self) -> ProcessPoolExecutor:
+        """
+        The service's process pool, created on first use.
+        """
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_executor
+
+    def submit(self, jsondata: Union[str, bytes], options=None) -> Future:
+        """
+        Like "call", but runs the call in the service's thread pool.
+
+        Returns:
+            A concurrent.futures.Future of the JSON-RPC 1.1 response string.
+        """
+        return self.executor.submit(self.call, jsondata, options)
+
+    def submit_py(self, req_data: Union[MethodRequest, BatchRequest], options=None) -> Future:
+        """
+        Like "call_py", but runs the call in the service's thread pool.
+
+        Returns:
+            A concurrent.futures.Future of the JSON-RPC 1.1 response.
+        """
+        return self.executor.submit(self.call_py, req_data, options)
+
+    def warm_schemas(self, method_names: Optional[List[str]] = None) -> int:
+        """
+        Loads the service schemas of the given methods, or all service
+        schemas, now, if they are loaded lazily, e.g. so that the first calls
+        do not pay for it, or in a pre-fork server's master process, so that
+        the workers share them.
+
+        Returns:
+            The number of schemas loaded.
+
+        Raises:
+            InvalidSchemaError: a schema is not valid
+        """
+        if self.service_validation is None:
+            return 0
+        return self.service_validation.warm(method_names)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Shuts down the service's thread and process pools, if they were started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=wait)
+            self._process_executor = None
+
+    def call(self, jsondata: Union[str, bytes], options=None) -> str:
         """
         Calls jsonrpc service's method and returns its return value in a JSON
         string or None if there is none.
@@ -115,16 +348,314 @@ class JSONRPCService(object):
             The JSON-RPC 1.1 response as a raw JSON string.
             Will not throw an exception.
         """
-        try:
-            request_data = json.loads(jsondata)
-        except ValueError as err:
-            resp = make_jsonrpc_error_response(
-                make_standard_jsonrpc_error(-32700, error={'message': str(err)}))
-            return json.dumps(resp)
+        request_data, error_response = self.parse(jsondata)
+        if error_response is not None:
+            return self.codec.dumps(error_response)
+
+        if not isinstance(request_data, list):
+            return self.call_request_serialized(request_data, options)
+
+        result = self.call_batch(request_data, options)
+        if result is not None:
+            return self.codec.dumps(result)
+
+    async def call_async(self, jsondata: Union[str, bytes], options=None) -> str:
+        """
+        Like "call", but awaits coroutine method handlers rather than blocking on
+        them; see call_py_async.
+        """
+        request_data, error_response = self.parse(jsondata)
+        if error_response is not None:
+            return self.codec.dumps(error_response)
+
+        if not isinstance(request_data, list):
+            return await self.call_request_serialized_async(request_data, options)
+
+        result = await self.call_batch_async(request_data, options)
+        if result is not None:
+            return self.codec.dumps(result)
+
+    def call_bytes(self, body: bytes, options=None) -> bytes:
+        """
+        Like "call", but takes and returns UTF-8 encoded bytes, as read from and
+        written to a transport, without decoding or encoding strings in between.
+
+        Args:
+           body: JSON-RPC 1.1 request body (raw bytes)
+           options: any additional object to pass along to the handler function as the second arg
+
+        Returns:
+            The JSON-RPC 1.1 response as raw JSON bytes.
+            Will not throw an exception.
+        """
+        return self.call_parsed_bytes(*self.parse(body), options)
+
+    def call_parsed_bytes(self, request_data: Union[MethodRequest, BatchRequest],
+                          error_response: MethodResult, options=None) -> bytes:
+        """
+        The rest of "call_bytes", given what "parse" returns.
+        """
+        if error_response is not None:
+            return self.codec.dumps_bytes(error_response)
+
+        if not isinstance(request_data, list):
+            return self.call_request_serialized(request_data, options, as_bytes=True)
+
+        result = self.call_batch(request_data, options)
+        if result is not None:
+            return self.codec.dumps_bytes(result)
+
+    async def call_bytes_async(self, body: bytes, options=None) -> bytes:
+        """
+        Like "call_bytes", but awaits coroutine method handlers rather than
+        blocking on them; see call_py_async.
+        """
+        return await self.call_parsed_bytes_async(*self.parse(body), options)
+
+    async def call_parsed_bytes_async(self, request_data: Union[MethodRequest, BatchRequest],
+                                      error_response: MethodResult, options=None) -> bytes:
+        """
+        The rest of "call_bytes_async", given what "parse" returns.
+        """
+        if error_response is not None:
+            return self.codec.dumps_bytes(error_response)
 
-        result = self.call_py(request_data, options)
+        if not isinstance(request_data, list):
+            return await self.call_request_serialized_async(request_data, options,
+                                                            as_bytes=True)
+
+        result = await self.call_batch_async(request_data, options)
         if result is not None:
-            return json.dumps(result)
+            return self.codec.dumps_bytes(result)
+
+    def call_chunks(self, chunks: Iterable[bytes], options=None,
+                    limits: Optional[RequestLimits] = None) -> bytes:
+        """
+        Like "call_bytes", but takes the request body as chunks of bytes, e.g.
+        as read from a socket, checking it against the limits as each chunk
+        arrives. A body exceeding a limit is refused with an invalid request
+        error as soon as it does, without reading any further chunks; see
+        jsonrpc11base.limits.
+
+        Args:
+           chunks: the JSON-RPC 1.1 request body, in chunks of raw bytes
+           options: any additional object to pass along to the handler function as the second arg
+           limits: the limits on the body (optional, defaults to the service's
+                limits, or if it has none, RequestLimits())
+
+        Returns:
+            The JSON-RPC 1.1 response as raw JSON bytes.
+            Will not throw an exception, other than those raised by the chunks.
+        """
+        scanner = LimitScanner(limits or self.limits or RequestLimits())
+        body = []
+        try:
+            for chunk in chunks:
+                scanner.feed(chunk)
+                body.append(chunk)
+        except LimitExceededError as err:
+            return self.codec.dumps_bytes(self.make_limit_error_response(err))
+        return self.call_parsed_bytes(*self.parse(b''.join(body), scanner), options)
+
+    async def call_chunks_async(self, chunks: AsyncIterable[bytes], options=None,
+                                limits: Optional[RequestLimits] = None) -> bytes:
+        """
+        Like "call_chunks", but reads the chunks from an asynchronous iterable,
+        and calls the method as "call_bytes_async" does.
+        """
+        scanner = LimitScanner(limits or self.limits or RequestLimits())
+        body = []
+        try:
+            async for chunk in chunks:
+                scanner.feed(chunk)
+                body.append(chunk)
+        except LimitExceededError as err:
+            return self.codec.dumps_bytes(self.make_limit_error_response(err))
+        return await self.call_parsed_bytes_async(*self.parse(b''.join(body), scanner), options)
+
+    def check_limits(self, req_data: Union[MethodRequest, BatchRequest]) -> MethodResult:
+        """
+        Checks a decoded request against the service's limits, if it has any.
+
+        Returns:
+            None if the request is within the limits, otherwise an invalid
+            request error response.
+        """
+        if self.limits is None:
+            return None
+        try:
+            check_value(req_data, self.limits)
+        except LimitExceededError as err:
+            return self.make_limit_error_response(err)
+        return None
+
+    def make_limit_error_response(self, err: LimitExceededError) -> MethodResult:
+        self.counters.increment('invalid_requests')
+        return make_jsonrpc_error_response(
+            make_standard_jsonrpc_error(-32600, error={'message': str(err)}))
+
+    def call_stream(self, body: bytes, options=None) -> Iterator[bytes]:
+        """
+        Like "call_bytes", but returns the response in parts, to be written as
+        they are produced. Array results, including the iterators returned by
+        generator method handlers, are read and encoded stream_chunk_size items
+        at a time, so neither the whole result nor the whole response need be
+        held in memory at once; see jsonrpc11base.streaming.
+
+        The method is called, and the first chunk of its result encoded,
+        before this returns, so that errors up to then still produce an error
+        response. An error while streaming the rest of the result is raised
+        from the iterator, the response having been started; the transport
+        should then abort the response.
+
+        Other responses, including those to batches, are returned in one part;
+        the response to a batch of notifications only is no parts.
+
+        Args:
+           body: JSON-RPC 1.1 request body (raw bytes)
+           options: any additional object to pass along to the handler function as the second arg
+
+        Returns:
+            An iterator of the parts of the JSON-RPC 1.1 response, as raw JSON bytes.
+        """
+        request_data, error_response = self.parse(body)
+        if error_response is not None:
+            return iter([self.codec.dumps_bytes(error_response)])
+
+        if isinstance(request_data, list):
+            result = self.call_batch(request_data, options)
+            return iter([self.codec.dumps_bytes(result)] if result is not None else [])
+
+        error_response = self.check_request(request_data)
+        if error_response is not None:
+            return iter([self.codec.dumps_bytes(error_response)])
+
+        request_id, method_name, params = self.unpack_request(request_data)
+
+        try:
+            result, system_method, cache_entry = self.do_method(
+                method_name, params, options, stream=True)
+            if cache_entry is not None or not is_streamable(result):
+                return iter([self.serialize_result_response(result, request_id, cache_entry,
+                                                            as_bytes=True)])
+            chunks = iter_chunks(result, self.stream_chunk_size)
+            first = self.codec.dumps_items_bytes(next(chunks, []))
+        except Exception as ex:
+            return iter([self.serialize(self.make_exception_response(ex, method_name, request_id),
+                                        as_bytes=True)])
+        return self.stream_result_response(first, chunks, method_name, request_id)
+
+    async def call_stream_async(self, body: bytes, options=None) -> AsyncIterator[bytes]:
+        """
+        Like "call_stream", but awaits coroutine method handlers rather than
+        blocking on them, and returns an asynchronous iterator. Handlers may
+        also return asynchronous iterators, e.g. from async generators; plain
+        iterators are read in the service's thread pool.
+        """
+        request_data, error_response = self.parse(body)
+        if error_response is not None:
+            return iter_parts([self.codec.dumps_bytes(error_response)])
+
+        if isinstance(request_data, list):
+            result = await self.call_batch_async(request_data, options)
+            return iter_parts([self.codec.dumps_bytes(result)] if result is not None else [])
+
+        error_response = self.check_request(request_data)
+        if error_response is not None:
+            return iter_parts([self.codec.dumps_bytes(error_response)])
+
+        request_id, method_name, params = self.unpack_request(request_data)
+
+        try:
+            result, system_method, cache_entry = await self.do_method_async(
+                method_name, params, options, stream=True)
+            if cache_entry is not None or not is_streamable(result):
+                return iter_parts([self.serialize_result_response(result, request_id, cache_entry,
+                                                                  as_bytes=True)])
+            chunks = iter_chunks_async(result, self.stream_chunk_size, self.executor)
+            try:
+                first_chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                first_chunk = []
+            first = self.codec.dumps_items_bytes(first_chunk)
+        except Exception as ex:
+            return iter_parts([self.serialize(
+                self.make_exception_response(ex, method_name, request_id), as_bytes=True)])
+        return self.stream_result_response_async(first, chunks, method_name, request_id)
+
+    def stream_result_response(self, first: bytes, chunks: Iterator[list], method_name: str,
+                               request_id: Identifier) -> Iterator[bytes]:
+        """
+        Yields the parts of a result response whose array result is the first
+        chunk, already encoded, and the remaining chunks.
+        """
+        codec = self.codec
+        separator = codec.separators[0].encode('utf-8')
+        yield b''.join([codec.result_response_prefix_bytes(), b'[', first])
+        try:
+            for chunk in chunks:
+                yield separator + codec.dumps_items_bytes(chunk)
+        except Exception:
+            log.exception('Error streaming the result of %s', method_name)
+            raise
+        yield b']' + codec.result_response_suffix_bytes(request_id)
+
+    async def stream_result_response_async(self, first: bytes, chunks: AsyncIterator[list],
+                                           method_name: str,
+                                           request_id: Identifier) -> AsyncIterator[bytes]:
+        """
+        Like stream_result_response, but from asynchronous chunks.
+        """
+        codec = self.codec
+        separator = codec.separators[0].encode('utf-8')
+        yield b''.join([codec.result_response_prefix_bytes(), b'[', first])
+        try:
+            async for chunk in chunks:
+                yield separator + codec.dumps_items_bytes(chunk)
+        except Exception:
+            log.exception('Error streaming the result of %s', method_name)
+            raise
+        yield b']' + codec.result_response_suffix_bytes(request_id)
+
+    def parse(self, jsondata: Union[str, bytes],
+              scanner: Optional[LimitScanner] = None) -> Tuple[MethodRequest, MethodResult]:
+        """
+        Parses a request body with the service's codec, checking it against the
+        service's limits, if it has any; see jsonrpc11base.limits.
+
+        Args:
+            jsondata: the request body
+            scanner: the scanner which has already checked the body against
+                its limits before decoding, if any
+
+        Returns:
+            The request data and None, or None and a parse or invalid request
+            error response.
+        """
+        limits = scanner.limits if scanner is not None else self.limits
+        if scanner is not None:
+            check_decoded = scanner.may_exceed_elements()
+        elif limits is not None:
+            try:
+                check_decoded = check_body(
+                    jsondata.encode('utf-8') if isinstance(jsondata, str) else jsondata, limits)
+            except LimitExceededError as err:
+                return None, self.make_limit_error_response(err)
+
+        try:
+            request_data = self.codec.loads(jsondata)
+        except self.codec.decode_errors as err:
+            self.counters.increment('parse_errors')
+            message = self.codec.parse_error_message(jsondata, err)
+            return None, make_jsonrpc_error_response(
+                make_standard_jsonrpc_error(-32700, error={'message': message}))
+
+        if limits is not None and check_decoded:
+            try:
+                check_elements(request_data, limits.max_elements)
+            except LimitExceededError as err:
+                return None, self.make_limit_error_response(err)
+        return request_data, None
 
     def find_method(self, method_name):
         method_parts = method_name.split('.')
@@ -137,53 +668,234 @@ class JSONRPCService(object):
         registry = self.method_registry if not is_system_method else self.system_method_registry
 
         if method_name not in registry:
+            self.counters.increment('method_not_found')
             methods = list(registry.keys())
             raise MethodNotFoundError(method=method_name, available_methods=methods)
 
         return [registry[method_name], is_system_method]
 
-    # Wraps the process of method invocation and validation
-    def do_method(self, method_name, params, options):
-        method, is_system_method = self.find_method(method_name)
-
+    # Wraps the process of params validation
+    def do_params(self, method_name, params, is_system_method):
         if is_system_method:
             validator = self.system_validation
         else:
             validator = self.service_validation
 
-        if validator is not None:
-            if validator.has_params_validation(method_name):
-                if params is None:
-                    raise InvalidParamsError(
-                        message='Method has parameters specified, but none were provided'
-                    )
-                else:
-                    validator.validate_params(method_name, params)
-                    return [method.call(params, options), is_system_method]
-            elif validator.has_absent_params_validation(method_name):
-                if params is None:
-                    validator.validate_absent_params(method_name)
-                    return [method.call(None, options), is_system_method]
-                else:
-                    raise InvalidParamsError(
-                        message=('Method has no parameters specified, '
-                                 'but arguments were provided')
-                    )
+        if validator is None:
+            return
+
+        if validator.has_params_validation(method_name):
+            if params is None:
+                raise InvalidParamsError(
+                    message='Method has parameters specified, but none were provided'
+                )
+            else:
+                validator.validate_params(method_name, params)
+        elif validator.has_absent_params_validation(method_name):
+            if params is None:
+                validator.validate_absent_params(method_name)
             else:
-                # If validation is provided, all methods must have validation.
                 raise InvalidParamsError(
-                    message='Validation is enabled, but no parameter validator was provided'
+                    message=('Method has no parameters specified, '
+                             'but arguments were provided')
                 )
         else:
-            return [method.call(params, options), is_system_method]
+            # If validation is provided, all methods must have validation.
+            raise InvalidParamsError(
+                message='Validation is enabled, but no parameter validator was provided'
+            )
+
+    # Wraps the process of method invocation and validation. Returns the
+    # result, whether the method is a system method, and the cache entry of
+    # the result if the method caches its results. An iterator result is read
+    # into a list within the method call, and so its concurrency limit and
+    # timing, unless it is to be streamed and is neither validated, cached nor
+    # shared.
+    def do_method(self, method_name, params, options, stream=False):
+        method, is_system_method = self.find_method(method_name)
+
+        validation_started = time.perf_counter_ns()
+        self.do_params(method_name, params, is_system_method)
+        method.metrics.record_validation(time.perf_counter_ns() - validation_started)
 
-    def call_py(self, req_data: MethodRequest, options=None) -> MethodResult:
+        # Cached results have already been validated.
+        cache = method.cache
+        if cache is not None:
+            cache_key = cache.make_key(params, options)
+            cache_entry = cache.get(cache_key)
+            if cache_entry is not None:
+                return [cache_entry.result, is_system_method, cache_entry]
+
+        streamed = (stream and cache is None and method.single_flight is None
+                    and not self.validate_result)
+
+        def execute():
+            process_executor = self.process_executor if method.in_process else None
+            result = method.call(params, options, process_executor, materialize=not streamed)
+            result = self.do_timed_result(method, method_name, result, is_system_method)
+            if cache is not None:
+                return result, cache.put(cache_key, result)
+            return result, None
+
+        if method.single_flight is None:
+            result, cache_entry = execute()
+        else:
+            flight_key = cache_key if cache is not None else params_key(params, options)
+            result, cache_entry = method.single_flight.call(flight_key, execute)
+        return [result, is_system_method, cache_entry]
+
+    async def do_method_async(self, method_name, params, options, stream=False):
+        method, is_system_method = self.find_method(method_name)
+
+        validation_started = time.perf_counter_ns()
+        self.do_params(method_name, params, is_system_method)
+        method.metrics.record_validation(time.perf_counter_ns() - validation_started)
+
+        # Cached results have already been validated.
+        cache = method.cache
+        if cache is not None:
+            cache_key = cache.make_key(params, options)
+            cache_entry = cache.get(cache_key)
+            if cache_entry is not None:
+                return [cache_entry.result, is_system_method, cache_entry]
+
+        streamed = (stream and cache is None and method.single_flight is None
+                    and not self.validate_result)
+
+        async def execute():
+            process_executor = self.process_executor if method.in_process else None
+            result = await method.call_async(params, options, self.executor, process_executor,
+                                             materialize=not streamed)
+            result = self.do_timed_result(method, method_name, result, is_system_method)
+            if cache is not None:
+                return result, cache.put(cache_key, result)
+            return result, None
+
+        if method.single_flight is None:
+            result, cache_entry = await execute()
+        else:
+            flight_key = cache_key if cache is not None else params_key(params, options)
+            result, cache_entry = await method.single_flight.call_async(flight_key, execute)
+        return [result, is_system_method, cache_entry]
+
+    def do_timed_result(self, method, method_name, result, is_system_method):
+        validation_started = time.perf_counter_ns()
+        result = self.do_result(method_name, result, is_system_method)
+        method.metrics.record_validation(time.perf_counter_ns() - validation_started)
+        return result
+
+    # Wraps the process of results validation
+    def do_result(self, method_name, result, is_system_method):
+        if not self.validate_result:
+            return result
+
+        if is_system_method:
+            validator = self.system_validation
+        else:
+            validator = self.service_validation
+
+        if not validator.has_result_validation(method_name):
+            # If validation is provided, all methods must have validation.
+            raise InvalidParamsError(
+                message='Validation is enabled, but no result validator was provided'
+            )
+
+        if validator.has_absent_result_validation(method_name):
+            # If the method should have no result, we just set it to null.
+            # JSONRPC 1.1 mentions the value 'nil' for methods without a result
+            # value, but the result is also required, so we need to populate
+            # it with something ... null is a good choice.
+            # The caller should ignore the value.
+            if result is None:
+                return None
+            else:
+                raise InvalidResultServerError(
+                    message=('The method is specified to not return a result, '
+                             'yet a value was returned'),
+                    value=result
+                )
+
+        validator.validate_result(method_name, result)
+        return result
+
+    def call_py(self, req_data: Union[MethodRequest, BatchRequest],
+                options=None) -> Union[MethodResult, BatchResult]:
         """
         Call a method in the service and return the RPC response. The _py suffix indicates
         that input and output are Python objects, not strings. In other words, the "call"
         method wraps "call_py" by dealing with strings, allowing "call_py" to ignore JSON
         conversion.
 
+        The request may also be a batch, a list of requests, in which case the
+        response is a list of the responses, in the same order, omitting those
+        for notifications (see call_batch).
+
+        Args:
+            req_data: JSON-RPC 1.1 request data as a python object
+            options: Any optional additional, application-specific data, which will be
+            passed straight through to the rpc method.
+
+        Returns:
+            The JSON-RPC 1.1 response as a python object.
+            Will not throw an exception.
+        """
+        error_response = self.check_limits(req_data)
+        if error_response is not None:
+            return error_response
+        if isinstance(req_data, list):
+            return self.call_batch(req_data, options)
+        return self.call_request(req_data, options)
+
+    def call_batch(self, batch: BatchRequest, options=None) -> BatchResult:
+        """
+        Calls each request of a batch and returns the list of responses.
+
+        Batches are borrowed from JSON-RPC 2.0. Responses are in the same order
+        as the requests. Requests without an "id" are notifications, and their
+        responses are left out, unless the request itself was invalid; if there
+        are no responses left, None is returned.
+
+        If the service has a batch_executor, the requests are run concurrently
+        on it.
+
+        Args:
+            batch: a list of JSON-RPC 1.1 requests as python objects
+            options: Any optional additional, application-specific data, which will be
+            passed straight through to each rpc method.
+
+        Returns:
+            The list of JSON-RPC 1.1 responses as python objects, or None.
+            Will not throw an exception.
+        """
+        if len(batch) == 0:
+            self.counters.increment('invalid_requests')
+            error = make_standard_jsonrpc_error(-32600, error={
+                'message': 'A batch must contain at least one request'
+            })
+            return make_jsonrpc_error_response(error)
+
+        if self.batch_executor is not None and len(batch) > 1:
+            responses = list(self.batch_executor.map(
+                lambda req_data: self.call_request(req_data, options), batch))
+        else:
+            responses = [self.call_request(req_data, options) for req_data in batch]
+
+        responses = [response for req_data, response in zip(batch, responses)
+                     if not is_notification(req_data, response)]
+        if len(responses) == 0:
+            return None
+        return responses
+
+    async def call_py_async(self, req_data: Union[MethodRequest, BatchRequest],
+                            options=None) -> Union[MethodResult, BatchResult]:
+        """
+        Like "call_py", but for use in an asyncio event loop. Method handlers
+        which are coroutine functions ("async def") are awaited, while plain
+        handlers are run in the service's thread pool so as not to block the
+        event loop.
+        The requests of a batch are run concurrently. Errors are mapped to
+        responses exactly as by "call_py".
+
         Args:
             req_data: JSON-RPC 1.1 request data as a python object
             options: Any optional additional, application-specific data, which will be
@@ -193,11 +905,145 @@ class JSONRPCService(object):
             The JSON-RPC 1.1 response as a python object.
             Will not throw an exception.
         """
-        # Validate the request data using a json-schema
+        error_response = self.check_limits(req_data)
+        if error_response is not None:
+            return error_response
+        if isinstance(req_data, list):
+            return await self.call_batch_async(req_data, options)
+        return await self.call_request_async(req_data, options)
+
+    async def call_batch_async(self, batch: BatchRequest, options=None) -> BatchResult:
+        """
+        Calls the requests of a batch concurrently; see call_batch.
+        """
+        if len(batch) == 0:
+            return self.call_batch(batch, options)
+
+        responses = await asyncio.gather(
+            *[self.call_request_async(req_data, options) for req_data in batch])
+
+        responses = [response for req_data, response in zip(batch, responses)
+                     if not is_notification(req_data, response)]
+        if len(responses) == 0:
+            return None
+        return responses
+
+    def call_request(self, req_data: MethodRequest, options=None) -> MethodResult:
+        """
+        Calls a single, non-batch, request; see call_py.
+        """
+        error_response = self.check_request(req_data)
+        if error_response is not None:
+            return error_response
+
+        request_id, method_name, params = self.unpack_request(req_data)
+
+        try:
+            result, system_method, cache_entry = self.do_method(method_name, params, options)
+            return make_result_response(result, request_id)
+        except Exception as ex:
+            return self.make_exception_response(ex, method_name, request_id)
+
+    async def call_request_async(self, req_data: MethodRequest, options=None) -> MethodResult:
+        """
+        Calls a single, non-batch, request; see call_py_async.
+        """
+        error_response = self.check_request(req_data)
+        if error_response is not None:
+            return error_response
+
+        request_id, method_name, params = self.unpack_request(req_data)
+
+        try:
+            result, system_method, cache_entry = await self.do_method_async(
+                method_name, params, options)
+            return make_result_response(result, request_id)
+        except Exception as ex:
+            return self.make_exception_response(ex, method_name, request_id)
+
+    def call_request_serialized(self, req_data: MethodRequest, options=None,
+                                as_bytes: bool = False) -> Union[str, bytes]:
+        """
+        Like call_request, but returns the response serialized, as a string or,
+        if as_bytes, as UTF-8 encoded bytes.
+        """
+        error_response = self.check_request(req_data)
+        if error_response is not None:
+            return self.serialize(error_response, as_bytes)
+
+        request_id, method_name, params = self.unpack_request(req_data)
+
+        try:
+            result, system_method, cache_entry = self.do_method(method_name, params, options)
+        except Exception as ex:
+            return self.serialize(self.make_exception_response(ex, method_name, request_id),
+                                  as_bytes)
+        return self.serialize_result_response(result, request_id, cache_entry, as_bytes)
+
+    async def call_request_serialized_async(self, req_data: MethodRequest, options=None,
+                                            as_bytes: bool = False) -> Union[str, bytes]:
+        """
+        Like call_request_async, but returns the response serialized.
+        """
+        error_response = self.check_request(req_data)
+        if error_response is not None:
+            return self.serialize(error_response, as_bytes)
+
+        request_id, method_name, params = self.unpack_request(req_data)
+
         try:
-            if self.validate_params:
+            result, system_method, cache_entry = await self.do_method_async(
+                method_name, params, options)
+        except Exception as ex:
+            return self.serialize(self.make_exception_response(ex, method_name, request_id),
+                                  as_bytes)
+        return self.serialize_result_response(result, request_id, cache_entry, as_bytes)
+
+    def serialize(self, response: MethodResult, as_bytes: bool = False) -> Union[str, bytes]:
+        if as_bytes:
+            return self.codec.dumps_bytes(response)
+        return self.codec.dumps(response)
+
+    def serialize_result_response(self, result, request_id: Identifier, cache_entry=None,
+                                  as_bytes: bool = False) -> Union[str, bytes]:
+        """
+        Serializes a result response. A cached result is serialized only the
+        first time, and its JSON kept with it in the cache to be spliced into
+        the response for each later request, with that request's id.
+        """
+        if cache_entry is None:
+            return self.serialize(make_result_response(result, request_id), as_bytes)
+        if as_bytes:
+            if cache_entry.encoded_bytes is None:
+                cache_entry.encoded_bytes = self.codec.dumps_bytes(result)
+            return self.codec.dumps_result_response_bytes(cache_entry.encoded_bytes, request_id)
+        if cache_entry.encoded is None:
+            cache_entry.encoded = self.codec.dumps(result)
+        return self.codec.dumps_result_response(cache_entry.encoded, request_id)
+
+    def check_request(self, req_data: MethodRequest) -> MethodResult:
+        """
+        Validates the request envelope.
+
+        Returns:
+            None if the request is valid, otherwise an invalid request error response.
+        """
+        self.counters.increment('requests')
+
+        # Validate the request data using a json-schema. Without params or
+        # strict request validation, only what dispatching the request relies
+        # on is checked, so that every request, e.g. each of a batch, lacking
+        # a "method" gets an invalid request error, while the rest of the
+        # envelope is accepted as is.
+        try:
+            if self.strict_request_validation:
                 self.jsonrpc_schemas.validate('request', req_data)
+            elif self.validate_params:
+                validate_request(req_data)
+            else:
+                validate_dispatchable(req_data)
         except SchemaError as ex:
+            self.counters.increment('invalid_requests')
             error = make_standard_jsonrpc_error(-32600, error={
                 'message': ex.message,
                 'path': ex.path,
@@ -209,7 +1055,9 @@ class JSONRPCService(object):
                 return make_jsonrpc_error_response(error, req_data.get('id'))
             else:
                 return make_jsonrpc_error_response(error)
+        return None
 
+    def unpack_request(self, req_data: MethodRequest) -> Tuple[Identifier, str, ParamsResult]:
         request_id = req_data.get('id')
 
         # Note that we can be cavalier, assuming that the 'method'
@@ -224,100 +1072,90 @@ class JSONRPCService(object):
         # imo misuse of None for JSON null)
         params = req_data.get('params')
 
-        # Wraps the process of results validation
-        def do_result(result, system_method):
-            if not self.validate_result:
-                return result
-
-            if system_method:
-                validator = self.system_validation
-            else:
-                validator = self.service_validation
-
-            if not validator.has_result_validation(method_name):
-                # If validation is provided, all methods must have validation.
-                raise InvalidParamsError(
-                    message='Validation is enabled, but no result validator was provided'
-                )
-
-            if validator.has_absent_result_validation(method_name):
-                # If the method should have no result, we just set it to null.
-                # JSONRPC 1.1 mentions the value 'nil' for methods without a result
-                # value, but the result is also required, so we need to populate
-                # it with something ... null is a good choice.
-                # The caller should ignore the value.
-                if result is None:
-                    return None
-                else:
-                    raise InvalidResultServerError(
-                        message=('The method is specified to not return a result, '
-                                 'yet a value was returned'),
-                        value=result
-                    )
-
-            validator.validate_result(method_name, result)
-            return result
-
-        # Wraps the process of creating a result
-        def make_result_response(result):
-            response_data = {
-                'version': '1.1',
-                'result': result
-            }
-            if request_id is not None:
-                response_data['id'] = request_id
-            return response_data
+        return request_id, method_name, params
 
+    def make_exception_response(self, ex: Exception, method_name: str,
+                                request_id: Identifier) -> MethodResult:
+        """
+        Maps an exception raised while calling a method to an error response.
+        Must be called while handling the exception, as the traceback of
+        unexpected exceptions is included in the response.
+        """
         # Wraps error object construction
         def make_error_response(error_data):
-            # From closure
             if 'error' not in error_data:
                 error_data['error'] = {}
             error_data['error']['method'] = method_name
 
             return make_jsonrpc_error_response(error_data, request_id)
 
-        try:
-            result, system_method = self.do_method(method_name, params, options)
-            return make_result_response(do_result(result, system_method))
         # Covers a method throwing any specific jsonrpc predefined
         # exception.
-        except JSONRPCError as e:
-            return make_error_response(e.to_json())
+        if isinstance(ex, JSONRPCError):
+            return make_error_response(ex.to_json())
         # Covers a method throwing a jsonrpc error which is not
         # within the range of predefined jsonrpc errors
-        except APIError as e:
+        elif isinstance(ex, APIError):
             # Which, sigh, itself may be an error if the app used
             # an error code within the reserved range.
-            if -32768 <= e.code <= -32000:
+            if -32768 <= ex.code <= -32000:
                 err = ReservedErrorCodeServerError(
                     message=(
                         'An error code  was issued by the api which conflicts with ',
                         'the reserved range between -32768 and -3200'
                     ),
-                    bad_code=e.code
+                    bad_code=ex.code
                 )
                 return make_error_response(err.to_json())
             else:
-                return make_error_response(e.to_json())
+                return make_error_response(ex.to_json())
         # Finally, catch any programming errors
-        except Exception as ex:
+        else:
             message = getattr(ex, 'message', str(ex))
             error = {'message': ('An unexpected exception was caught '
                                  'executing the method'),
                      'exception_message': message or 'Unknown exception',
-                     'traceback': traceback.format_exc(limit=1000).split('\n')}
+                     'traceback': self.format_traceback(ex)}
             error = make_custom_jsonrpc_error(-32002,
                                               message='Exception calling method',
                                               error=error)
             return make_error_response(error)
 
+    def format_traceback(self, ex: Exception) -> List[str]:
+        # Exceptions from handlers run in a worker process carry their own traceback.
+        if isinstance(ex, RemoteException):
+            return ex.remote_traceback.split('\n')
+        return traceback.format_exc(limit=1000).split('\n')
+
+    def render_metrics(self) -> str:
+        """
+        Renders the service's request counters and the metrics of every method,
+        including the system methods, in the Prometheus text exposition format,
+        e.g. to be served at "/metrics".
+        """
+        methods = dict(self.method_registry)
+        methods.update(self.system_method_registry)
+        return self.metrics_renderer.render(self.counters.snapshot(), methods)
+
     # TODO: break off into a service class
 
     # TODO: move to a service module
 
+    def describe_cache_key(self, params, options) -> tuple:
+        return self.description.cache_key()
+
     def handle_system_describe(self, options) -> dict:
         """
         Built-in method handler that shows all methods and type schemas for the service in a dict.
         """
         return self.description.to_json()
+
+    def handle_system_stats(self, options) -> dict:
+        """
+        Built-in method handler that shows live call metrics for all methods.
+        """
+        methods = {}
+        for registry in [self.method_registry, self.system_method_registry]:
+            for method_name, method in registry.items():
+                methods[method_name] = method.stats()
+        return {'methods': methods}
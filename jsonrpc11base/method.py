@@ -1,4 +1,12 @@
-from typing import Callable
+from typing import AsyncIterator, Callable, Optional
+from jsonrpc11base.cache import CachePolicy, ResultCache
+from jsonrpc11base.concurrency import ConcurrencyLimiter, SingleFlight
+from jsonrpc11base.metrics import CallMetrics
+from jsonrpc11base.process import invoke_in_process, unpack_outcome
+import jsonrpc11base.streaming as streaming
+import asyncio
+import functools
+import inspect
 import time
 
 
@@ -7,26 +15,155 @@ class Method(object):
     Method function handler, and any other metadata we may need in the future
     """
     method_implementation: Callable
-    call_count: int
-    cumulative_call_time: float
-    error_count: int
+    is_coroutine: bool
+    in_process: bool
+    limiter: Optional[ConcurrencyLimiter]
+    cache: Optional[ResultCache]
+    single_flight: Optional[SingleFlight]
+    metrics: CallMetrics
 
-    def __init__(self, method: Callable):
+    def __init__(self, method: Callable,
+                 max_concurrency: Optional[int] = None,
+                 max_queue: int = 0,
+                 executor: Optional[str] = None,
+                 cache: Optional[CachePolicy] = None,
+                 single_flight: bool = False):
         self.method_implementation = method
-        self.call_count = 0
-        self.cumulative_call_time = 0
-        self.error_count = 0
+        self.is_coroutine = inspect.iscoroutinefunction(method)
+        if executor not in (None, 'process'):
+            raise ValueError(f'Unknown executor "{executor}"')
+        self.in_process = executor == 'process'
+        if self.in_process and self.is_coroutine:
+            raise ValueError('Coroutine handlers may not run in a process')
+        if max_concurrency is not None:
+            self.limiter = ConcurrencyLimiter(max_concurrency, max_queue)
+        else:
+            self.limiter = None
+        if cache is not None:
+            self.cache = ResultCache(cache)
+        else:
+            self.cache = None
+        if single_flight:
+            self.single_flight = SingleFlight()
+        else:
+            self.single_flight = None
+        self.metrics = CallMetrics()
 
-    def call(self, params, options):
-        self.call_count += 1
-        call_started = time.time()
+    @property
+    def call_count(self) -> int:
+        return self.metrics.snapshot().calls
+
+    @property
+    def error_count(self) -> int:
+        return self.metrics.snapshot().errors
+
+    @property
+    def cumulative_call_time(self) -> float:
+        """Total time spent in the method, in seconds."""
+        return self.metrics.snapshot().total_ns / 1e9
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the call latency, in seconds, below which the given percentage
+        of calls fall, to within 12.5%.
+        """
+        return self.metrics.snapshot().percentile(percent) / 1e9
+
+    def stats(self) -> dict:
+        """
+        Returns the method's call metrics, with times in seconds.
+        """
+        stats = self.metrics.snapshot().stats()
+        if self.limiter is not None:
+            stats['queued'] = self.limiter.queued
+            stats['rejected'] = self.limiter.rejected_count
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        if self.single_flight is not None:
+            stats['shared'] = self.single_flight.shared_count
+        return stats
+
+    def invoke(self, params, options):
+        if params is None:
+            return self.method_implementation(options)
+        else:
+            return self.method_implementation(params, options)
+
+    def call(self, params, options, process_executor=None, materialize=True):
+        """
+        Calls the handler. Handlers added with executor="process" are run in
+        the process_executor. An iterator result, e.g. from a generator
+        handler, is read into a list as part of the call, unless materialize
+        is False; an asynchronous iterator always is, there being no event
+        loop to stream it from.
+        """
+        if self.limiter is None:
+            return self.call_unlimited(params, options, process_executor, materialize)
+        self.limiter.acquire()
+        try:
+            return self.call_unlimited(params, options, process_executor, materialize)
+        finally:
+            self.limiter.release()
+
+    async def call_async(self, params, options, executor=None, process_executor=None,
+                         materialize=True):
+        """
+        Awaits a coroutine handler, or runs a plain handler in the executor,
+        the event loop's default thread pool if none is given. Handlers added
+        with executor="process" are run in the process_executor. An iterator
+        or asynchronous iterator result is read into a list as part of the
+        call, unless materialize is False.
+        """
+        if self.limiter is None:
+            return await self.call_unlimited_async(params, options, executor, process_executor,
+                                                   materialize)
+        await self.limiter.acquire_async()
+        try:
+            return await self.call_unlimited_async(params, options, executor, process_executor,
+                                                   materialize)
+        finally:
+            self.limiter.release()
+
+    def call_unlimited(self, params, options, process_executor=None, materialize=True):
+        self.metrics.start()
+        call_started = time.perf_counter_ns()
+        error = True
+        try:
+            if self.in_process:
+                future = process_executor.submit(
+                    invoke_in_process, self.method_implementation, params, options)
+                result = unpack_outcome(future.result())
+            elif self.is_coroutine:
+                # No event loop to await in, so run one just for this call.
+                result = asyncio.run(self.invoke(params, options))
+            else:
+                result = self.invoke(params, options)
+            if materialize or isinstance(result, AsyncIterator):
+                result = streaming.materialize(result)
+            error = False
+            return result
+        finally:
+            self.metrics.record(time.perf_counter_ns() - call_started, error)
+
+    async def call_unlimited_async(self, params, options, executor=None,
+                                   process_executor=None, materialize=True):
+        self.metrics.start()
+        call_started = time.perf_counter_ns()
+        error = True
         try:
-            if params is None:
-                result = self.method_implementation(options)
+            if self.in_process:
+                future = process_executor.submit(
+                    invoke_in_process, self.method_implementation, params, options)
+                result = unpack_outcome(await asyncio.wrap_future(future))
+            elif self.is_coroutine:
+                result = await self.invoke(params, options)
             else:
-                result = self.method_implementation(params, options)
-            self.cumulative_call_time = time.time() - call_started
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    executor, functools.partial(self.invoke, params, options))
+            if materialize:
+                result = await streaming.materialize_async(result, executor)
+            error = False
             return result
-        except Exception as e:
-            self.error_count = 0
-            raise e
+        finally:
+            self.metrics.record(time.perf_counter_ns() - call_started, error)
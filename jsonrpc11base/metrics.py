@@ -0,0 +1,229 @@
+"""
+Call metrics
+
+Counters and latency histograms are kept in per-thread shards, so recording a
+call takes no lock: each thread only ever updates its own shard, and readers
+merge the shards when asked. The totals are therefore exact, if momentarily
+behind the calls still being recorded.
+
+Latencies are bucketed log-linearly, in the manner of HDR histograms: each
+power of two of nanoseconds is split into SUB_BUCKETS equal buckets, so any
+latency is known to within 1/SUB_BUCKETS (12.5%) of its value, from
+nanoseconds up to MAX_EXPONENT (about 18 minutes), in a few hundred buckets.
+"""
+import math
+import threading
+from typing import Dict, List
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_EXPONENT = 40
+MAX_VALUE = (1 << (MAX_EXPONENT + 1)) - 1
+BUCKET_COUNT = (MAX_EXPONENT - SUB_BUCKET_BITS + 2) * SUB_BUCKETS
+
+
+def bucket_index(value: int) -> int:
+    """Returns the index of the bucket for a value in nanoseconds."""
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    if value > MAX_VALUE:
+        value = MAX_VALUE
+    exponent = value.bit_length() - 1
+    sub_bucket = (value >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKETS - 1)
+    return (exponent - SUB_BUCKET_BITS + 1) * SUB_BUCKETS + sub_bucket
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Returns the exclusive upper bound of a bucket, in nanoseconds."""
+    if index < SUB_BUCKETS:
+        return index + 1
+    exponent = index // SUB_BUCKETS + SUB_BUCKET_BITS - 1
+    sub_bucket = index % SUB_BUCKETS
+    return (SUB_BUCKETS + sub_bucket + 1) << (exponent - SUB_BUCKET_BITS)
+
+
+class Shard(object):
+    """The counters recorded by one thread."""
+    __slots__ = ('started', 'calls', 'errors', 'total_ns', 'validation_ns', 'counts')
+
+    def __init__(self):
+        self.started = 0
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.validation_ns = 0
+        self.counts = [0] * BUCKET_COUNT
+
+
+class Snapshot(object):
+    """The merged counters of all threads at one moment."""
+
+    def __init__(self, calls: int, errors: int, total_ns: int, counts: List[int],
+                 in_flight: int = 0, validation_ns: int = 0):
+        self.calls = calls
+        self.errors = errors
+        self.total_ns = total_ns
+        self.counts = counts
+        self.in_flight = in_flight
+        self.validation_ns = validation_ns
+
+    def percentile(self, percent: float) -> int:
+        """
+        Returns the latency, in nanoseconds, below which the given percentage
+        of calls fall; 0 if there have been no calls.
+        """
+        if self.calls == 0:
+            return 0
+        rank = max(math.ceil(percent / 100 * self.calls), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return bucket_upper_bound(index)
+        return bucket_upper_bound(BUCKET_COUNT - 1)
+
+    def percentiles(self, percents=(50, 95, 99)) -> Dict[str, int]:
+        return {f'p{percent}': self.percentile(percent) for percent in percents}
+
+    def stats(self) -> dict:
+        """
+        Returns the metrics as reported by system.stats, with times in seconds.
+        """
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'call_time': self.total_ns / 1e9,
+            'validation_time': self.validation_ns / 1e9,
+            'latency': {name: value / 1e9 for name, value in self.percentiles().items()}
+        }
+
+    def to_json(self) -> dict:
+        """
+        Returns the snapshot as JSON data, with only the buckets which have
+        counts, for passing to another process.
+        """
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ns': self.total_ns,
+            'in_flight': self.in_flight,
+            'validation_ns': self.validation_ns,
+            'counts': {str(index): count for index, count in enumerate(self.counts) if count}
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'Snapshot':
+        counts = [0] * BUCKET_COUNT
+        for index, count in data['counts'].items():
+            counts[int(index)] = count
+        return cls(calls=data['calls'], errors=data['errors'], total_ns=data['total_ns'],
+                   counts=counts, in_flight=data['in_flight'],
+                   validation_ns=data['validation_ns'])
+
+
+def merge_snapshots(snapshots: List[Snapshot]) -> Snapshot:
+    """
+    Returns the sum of snapshots, e.g. of the same method in several processes.
+    """
+    return Snapshot(
+        calls=sum(snapshot.calls for snapshot in snapshots),
+        errors=sum(snapshot.errors for snapshot in snapshots),
+        total_ns=sum(snapshot.total_ns for snapshot in snapshots),
+        counts=[sum(counts) for counts
+                in zip([0] * BUCKET_COUNT, *[snapshot.counts for snapshot in snapshots])],
+        in_flight=sum(snapshot.in_flight for snapshot in snapshots),
+        validation_ns=sum(snapshot.validation_ns for snapshot in snapshots)
+    )
+
+
+class CallMetrics(object):
+    """
+    Call, error and latency counters for a method.
+    """
+
+    def __init__(self):
+        self.shards: Dict[int, Shard] = {}
+        self.lock = threading.Lock()
+        # Set after every change, and cleared by whoever keeps a rendering of
+        # the metrics (see prometheus.MetricsRenderer), to tell it apart from a
+        # stale one without taking a snapshot. Clearing it before taking the
+        # snapshot means no change can be missed.
+        self.dirty = True
+
+    def shard(self) -> Shard:
+        # Thread idents are only reused once a thread has finished, so a shard
+        # is never shared by two live threads.
+        ident = threading.get_ident()
+        shard = self.shards.get(ident)
+        if shard is None:
+            shard = Shard()
+            with self.lock:
+                self.shards[ident] = shard
+        return shard
+
+    def start(self):
+        """Records the start of a call, which is in flight until recorded."""
+        self.shard().started += 1
+        self.dirty = True
+
+    def record_validation(self, duration_ns: int):
+        self.shard().validation_ns += duration_ns
+        self.dirty = True
+
+    def record(self, duration_ns: int, error: bool = False):
+        shard = self.shard()
+        shard.calls += 1
+        shard.total_ns += duration_ns
+        shard.counts[bucket_index(duration_ns)] += 1
+        if error:
+            shard.errors += 1
+        self.dirty = True
+
+    def snapshot(self) -> Snapshot:
+        with self.lock:
+            shards = list(self.shards.values())
+        if len(shards) == 1:
+            counts = list(shards[0].counts)
+        else:
+            counts = [sum(shard_counts) for shard_counts
+                      in zip([0] * BUCKET_COUNT, *[shard.counts for shard in shards])]
+        calls = sum(shard.calls for shard in shards)
+        return Snapshot(
+            calls=calls,
+            errors=sum(shard.errors for shard in shards),
+            total_ns=sum(shard.total_ns for shard in shards),
+            counts=counts,
+            # Shards are read one at a time, so a call's end may be seen
+            # without its start.
+            in_flight=max(sum(shard.started for shard in shards) - calls, 0),
+            validation_ns=sum(shard.validation_ns for shard in shards)
+        )
+
+
+class EventCounters(object):
+    """
+    Named event counters, sharded per thread like CallMetrics.
+    """
+
+    def __init__(self):
+        self.shards: Dict[int, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str):
+        ident = threading.get_ident()
+        shard = self.shards.get(ident)
+        if shard is None:
+            shard = {}
+            with self.lock:
+                self.shards[ident] = shard
+        shard[name] = shard.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            shards = list(self.shards.values())
+        totals: Dict[str, int] = {}
+        for shard in shards:
+            for name, count in list(shard.items()):
+                totals[name] = totals.get(name, 0) + count
+        return totals
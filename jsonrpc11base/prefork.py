@@ -0,0 +1,527 @@
+"""
+Pre-fork multi-process socket server
+
+A service is limited to one core by the GIL. To use more, the master process
+builds the service, loading its schemas once, then forks worker processes,
+each serving it with a StreamServer on the same listening socket: either the
+one socket, opened by the master and inherited, or, with reuse_port, one
+socket per worker bound to the same address with SO_REUSEPORT, so that the
+kernel balances connections between them.
+
+The master restarts workers which exit, and:
+
+- waits before restarting a worker which failed soon after starting, twice
+  as long after each such failure in a row, and stops after
+  max_startup_failures of them, e.g. if the port cannot be bound
+
+- on SIGHUP, restarts all workers gracefully: new workers are started, and
+  the old ones stop accepting connections and finish the requests they have
+  read before exiting
+- on SIGTERM or SIGINT, stops all workers gracefully, then itself
+- recycles workers after max_requests requests, e.g. to bound memory growth
+
+Each worker reports its metrics to the master through a pipe, every
+stats_interval seconds and on exiting. The master merges them, including
+those of exited workers, into service-wide metrics (see PreforkServer.stats),
+optionally written to a file.
+
+Run a service from the command line with:
+
+    python -m jsonrpc11base.prefork mypackage.mymodule:service --workers 4 --port 8888
+
+Forking requires a POSIX system.
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import logging
+import os
+import random
+import selectors
+import signal
+import socket
+import stat
+import time
+from typing import Dict, List, Optional
+
+from jsonrpc11base.main import JSONRPCService
+from jsonrpc11base.metrics import Snapshot, merge_snapshots
+from jsonrpc11base.server import StreamServer
+
+log = logging.getLogger(__name__)
+
+MASTER_SIGNALS = [signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD]
+
+# A worker which exits with an error within this many seconds of starting has
+# failed to start.
+STARTUP_TIME = 1.0
+
+# Seconds to wait before replacing a worker which failed to start, doubled for
+# each further failure in a row, up to MAX_RESPAWN_DELAY.
+RESPAWN_DELAY = 0.1
+MAX_RESPAWN_DELAY = 10.0
+
+
+class Worker(object):
+    """The master's view of a worker process."""
+
+    def __init__(self, pid: int, stats_fd: int):
+        self.pid = pid
+        self.started = time.monotonic()
+        self.stats_fd: Optional[int] = stats_fd
+        self.buffer = b''
+        self.stats: Optional[dict] = None
+        self.retiring = False
+
+
+class PreforkServer(object):
+    """
+    Serves a JSONRPCService from several forked worker processes.
+
+    Args:
+        service: the service to serve; its thread and process pools must not
+            have been started, as they do not survive a fork
+        workers: the number of worker processes (defaults to the number of
+            CPUs)
+        host: the address to listen on
+        port: the TCP port to listen on
+        path: the path of a Unix domain socket to listen on instead of TCP
+        reuse_port: if True, each worker listens on its own socket with
+            SO_REUSEPORT, rather than all sharing the master's (TCP only)
+        max_requests: the number of requests after which a worker is replaced
+            (defaults to 0, never)
+        max_requests_jitter: up to this many requests are added at random to
+            each worker's max_requests, so that workers are not all replaced
+            at once
+        graceful_timeout: the number of seconds a stopping worker has to finish
+            the requests it has read, after which its connections are closed
+        max_startup_failures: the number of workers in a row which may fail
+            to start, each replaced after a growing delay, before the master
+            stops and run raises RuntimeError (0 for no limit)
+        stats_interval: how often, in seconds, workers report their metrics
+        stats_path: a file to which the merged metrics are written, as JSON,
+            every stats_interval
+        server_options: further keyword arguments for the workers' StreamServer
+    """
+
+    def __init__(self, service: JSONRPCService,
+                 workers: Optional[int] = None,
+                 host: str = '0.0.0.0',
+                 port: int = 8888,
+                 path: Optional[str] = None,
+                 reuse_port: bool = False,
+                 max_requests: int = 0,
+                 max_requests_jitter: int = 0,
+                 graceful_timeout: float = 30.0,
+                 max_startup_failures: int = 10,
+                 stats_interval: float = 1.0,
+                 stats_path: Optional[str] = None,
+                 **server_options):
+        if reuse_port and path is not None:
+            raise ValueError('reuse_port only applies to TCP')
+        if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+            raise ValueError('SO_REUSEPORT is not supported on this system')
+        self.service = service
+        self.worker_count = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.path = path
+        self.reuse_port = reuse_port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.max_startup_failures = max_startup_failures
+        self.stats_interval = stats_interval
+        self.stats_path = stats_path
+        self.server_options = server_options
+
+        self.workers: Dict[int, Worker] = {}
+        # The metrics of workers which have exited
+        self.retired_methods: Dict[str, Snapshot] = {}
+        self.retired_counters: Dict[str, int] = {}
+        self.listen_socket: Optional[socket.socket] = None
+        self.selector: Optional[selectors.BaseSelector] = None
+        self.wakeup_fds: List[int] = []
+        self.stopping = False
+        self.reloading = False
+        # Workers in a row which failed to start, and when to replace them
+        self.startup_failures = 0
+        self.respawn_at = 0.0
+
+    # Master
+
+    def run(self):
+        """
+        Runs the master until it is stopped by SIGTERM or SIGINT.
+
+        Raises:
+            RuntimeError: max_startup_failures workers in a row failed to start
+        """
+        if not self.reuse_port:
+            self.listen_socket = self.create_socket()
+        # Objects created so far, including the service, are shared with the
+        # workers; keeping them out of garbage collection keeps them from
+        # being copied into each worker as their reference counts change.
+        gc.freeze()
+
+        self.selector = selectors.DefaultSelector()
+        wakeup_read, wakeup_write = os.pipe()
+        self.wakeup_fds = [wakeup_read, wakeup_write]
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        self.selector.register(wakeup_read, selectors.EVENT_READ)
+        previous_wakeup_fd = signal.set_wakeup_fd(wakeup_write)
+        previous_handlers = {
+            signum: signal.signal(signum, self.handle_signal)
+            for signum in MASTER_SIGNALS
+        }
+        try:
+            self.master_loop(wakeup_read)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            signal.set_wakeup_fd(previous_wakeup_fd)
+            self.selector.close()
+            os.close(wakeup_read)
+            os.close(wakeup_write)
+            self.wakeup_fds = []
+            if self.listen_socket is not None:
+                self.listen_socket.close()
+            if self.path is not None and os.path.exists(self.path):
+                os.unlink(self.path)
+            self.write_stats()
+        if self.startup_failures_exceeded():
+            raise RuntimeError(f'{self.startup_failures} workers in a row failed to start')
+
+    def handle_signal(self, signum, frame):
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self.stopping = True
+        elif signum == signal.SIGHUP:
+            self.reloading = True
+        # SIGCHLD only needs to wake the master loop up.
+
+    def master_loop(self, wakeup_read: int):
+        kill_at = None
+        next_stats = time.monotonic()
+        while True:
+            if self.reloading:
+                self.reloading = False
+                log.info('Restarting workers')
+                for worker in self.workers.values():
+                    self.retire(worker)
+
+            self.reap()
+
+            if self.stopping:
+                if kill_at is None:
+                    log.info('Stopping workers')
+                    kill_at = time.monotonic() + self.graceful_timeout + 5
+                    for worker in self.workers.values():
+                        self.retire(worker)
+                if not self.workers:
+                    return
+                if time.monotonic() > kill_at:
+                    for worker in self.workers.values():
+                        self.kill(worker.pid, signal.SIGKILL)
+            elif self.startup_failures_exceeded():
+                log.error('%d workers in a row failed to start; stopping',
+                          self.startup_failures)
+                self.stopping = True
+                continue
+            elif time.monotonic() >= self.respawn_at:
+                active = sum(1 for worker in self.workers.values() if not worker.retiring)
+                for _ in range(self.worker_count - active):
+                    self.spawn()
+
+            timeout = self.stats_interval
+            if not self.stopping and self.respawn_at > time.monotonic():
+                timeout = min(timeout, self.respawn_at - time.monotonic())
+            for key, events in self.selector.select(timeout=timeout):
+                if key.fd == wakeup_read:
+                    try:
+                        while os.read(wakeup_read, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    self.read_stats(key.data)
+
+            if self.stats_path is not None and time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + self.stats_interval
+                self.write_stats()
+
+    def spawn(self):
+        stats_read, stats_write = os.pipe()
+        # Signals are blocked until the worker has replaced the master's
+        # handlers, which would otherwise handle them in the worker.
+        signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+        try:
+            pid = os.fork()
+        except BaseException:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+            raise
+        if pid == 0:
+            code = 1
+            try:
+                os.close(stats_read)
+                self.become_worker()
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+                asyncio.run(self.worker_main(stats_write))
+                code = 0
+            except BaseException:
+                log.exception('Worker failed')
+            finally:
+                os._exit(code)
+
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+        os.close(stats_write)
+        os.set_blocking(stats_read, False)
+        worker = Worker(pid, stats_read)
+        self.workers[pid] = worker
+        self.selector.register(stats_read, selectors.EVENT_READ, worker)
+        log.info('Started worker %d', pid)
+
+    def retire(self, worker: Worker):
+        if not worker.retiring:
+            worker.retiring = True
+            self.kill(worker.pid, signal.SIGTERM)
+
+    @staticmethod
+    def kill(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            log.info('Worker %d exited with status %d', pid, status)
+            if time.monotonic() - worker.started >= STARTUP_TIME:
+                self.startup_failures = 0
+            elif status != 0 and not worker.retiring:
+                self.startup_failures += 1
+                delay = min(RESPAWN_DELAY * 2 ** (self.startup_failures - 1), MAX_RESPAWN_DELAY)
+                self.respawn_at = time.monotonic() + delay
+                log.warning('Worker %d failed to start; replacing it in %.1fs', pid, delay)
+            # Its final metrics may still be in the pipe.
+            self.read_stats(worker)
+            self.close_stats(worker)
+            if worker.stats is not None:
+                self.retire_stats(worker.stats)
+
+    def startup_failures_exceeded(self) -> bool:
+        return 0 < self.max_startup_failures <= self.startup_failures
+
+    def read_stats(self, worker: Worker):
+        if worker.stats_fd is None:
+            return
+        while True:
+            try:
+                data = os.read(worker.stats_fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.close_stats(worker)
+                break
+            worker.buffer += data
+        lines = worker.buffer.split(b'\n')
+        worker.buffer = lines.pop()
+        if lines:
+            worker.stats = json.loads(lines[-1])
+
+    def close_stats(self, worker: Worker):
+        if worker.stats_fd is not None:
+            self.selector.unregister(worker.stats_fd)
+            os.close(worker.stats_fd)
+            worker.stats_fd = None
+
+    def retire_stats(self, stats: dict):
+        for name, data in stats['methods'].items():
+            snapshot = Snapshot.from_json(data)
+            if name in self.retired_methods:
+                snapshot = merge_snapshots([self.retired_methods[name], snapshot])
+            self.retired_methods[name] = snapshot
+        for name, count in stats['counters'].items():
+            self.retired_counters[name] = self.retired_counters.get(name, 0) + count
+
+    def stats(self) -> dict:
+        """
+        Returns the merged metrics of all workers, past and present: the
+        number of workers, the service counters, and the method metrics in
+        the form returned by system.stats.
+        """
+        snapshots: Dict[str, List[Snapshot]] = {
+            name: [snapshot] for name, snapshot in self.retired_methods.items()
+        }
+        counters = dict(self.retired_counters)
+        for worker in self.workers.values():
+            if worker.stats is None:
+                continue
+            for name, data in worker.stats['methods'].items():
+                snapshots.setdefault(name, []).append(Snapshot.from_json(data))
+            for name, count in worker.stats['counters'].items():
+                counters[name] = counters.get(name, 0) + count
+        return {
+            'workers': len(self.workers),
+            'counters': counters,
+            'methods': {name: merge_snapshots(method_snapshots).stats()
+                        for name, method_snapshots in snapshots.items()}
+        }
+
+    def write_stats(self):
+        if self.stats_path is None:
+            return
+        temporary_path = f'{self.stats_path}.tmp'
+        with open(temporary_path, 'w') as stats_file:
+            json.dump(self.stats(), stats_file)
+        os.replace(temporary_path, self.stats_path)
+
+    def create_socket(self) -> socket.socket:
+        if self.path is not None:
+            # Replace a socket left behind by a previous run, but nothing else.
+            if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.path)
+        else:
+            family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind((self.host, self.port))
+        sock.listen(1024)
+        sock.setblocking(False)
+        return sock
+
+    # Worker
+
+    def become_worker(self):
+        """
+        Drops the master's state in a newly forked worker.
+        """
+        signal.set_wakeup_fd(-1)
+        for fd in self.wakeup_fds:
+            os.close(fd)
+        self.wakeup_fds = []
+        for signum in [signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD]:
+            signal.signal(signum, signal.SIG_DFL)
+        # Ctrl-C reaches every process in the group; the master stops the
+        # workers gracefully in turn.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for worker in self.workers.values():
+            if worker.stats_fd is not None:
+                os.close(worker.stats_fd)
+        self.workers = {}
+        self.selector.close()
+        gc.unfreeze()
+
+    async def worker_main(self, stats_fd: int):
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+        server = StreamServer(self.service, **self.server_options)
+        sock = self.listen_socket if self.listen_socket is not None else self.create_socket()
+        if self.path is not None:
+            await server.start_unix(sock=sock)
+        else:
+            await server.start_tcp(sock=sock)
+
+        max_requests = None
+        if self.max_requests:
+            max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.stats_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.send_stats(stats_fd)
+            requests = self.service.counters.snapshot().get('requests', 0)
+            if max_requests is not None and requests >= max_requests:
+                log.info('Worker %d recycled after %d requests', os.getpid(), requests)
+                break
+
+        await server.shutdown(self.graceful_timeout)
+        self.service.shutdown()
+        self.send_stats(stats_fd)
+        os.close(stats_fd)
+
+    def send_stats(self, stats_fd: int):
+        methods = dict(self.service.method_registry)
+        methods.update(self.service.system_method_registry)
+        stats = {
+            'counters': self.service.counters.snapshot(),
+            'methods': {name: method.metrics.snapshot().to_json()
+                        for name, method in methods.items()}
+        }
+        data = json.dumps(stats).encode('utf-8') + b'\n'
+        while data:
+            written = os.write(stats_fd, data)
+            data = data[written:]
+
+
+def load_service(spec: str) -> JSONRPCService:
+    """
+    Imports a service given as "module:attribute".
+    """
+    module_name, _, attribute = spec.partition(':')
+    if not attribute:
+        raise ValueError(f'Expected "module:attribute", not "{spec}"')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serves a JSON-RPC 1.1 service from several worker processes.')
+    parser.add_argument('service', help='the service to serve, as "module:attribute"')
+    parser.add_argument('--workers', type=int, help='number of workers (default: CPUs)')
+    parser.add_argument('--host', default='0.0.0.0', help='address (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8888, help='TCP port (default: %(default)s)')
+    parser.add_argument('--path', help='Unix domain socket path, instead of TCP')
+    parser.add_argument('--reuse-port', action='store_true',
+                        help='one socket per worker, with SO_REUSEPORT')
+    parser.add_argument('--framing', default='newline', choices=['newline', 'length'],
+                        help='message framing (default: %(default)s)')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='replace each worker after this many requests')
+    parser.add_argument('--max-requests-jitter', type=int, default=0,
+                        help='add up to this many to each worker\'s --max-requests')
+    parser.add_argument('--graceful-timeout', type=float, default=30.0,
+                        help='seconds for stopping workers to finish (default: %(default)s)')
+    parser.add_argument('--max-startup-failures', type=int, default=10,
+                        help=('stop after this many workers in a row fail to start, '
+                              '0 for no limit (default: %(default)s)'))
+    parser.add_argument('--stats-path', help='file to write the merged metrics to')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    PreforkServer(
+        load_service(args.service),
+        workers=args.workers,
+        host=args.host,
+        port=args.port,
+        path=args.path,
+        reuse_port=args.reuse_port,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        max_startup_failures=args.max_startup_failures,
+        stats_path=args.stats_path,
+        framing=args.framing
+    ).run()
+
+
+if __name__ == '__main__':
+    main()
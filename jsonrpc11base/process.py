@@ -0,0 +1,80 @@
+"""
+Running method handlers in worker processes
+
+Handlers, params, options and results cross the process boundary by pickling,
+so handlers must be importable, module-level functions (or methods of
+picklable objects). Exceptions raised by a handler are not pickled as they are,
+since arbitrary exception classes need not survive it; instead they are
+described by the worker and reconstructed in the service process, so that
+they produce the same error responses as if the handler had run in-process.
+"""
+import traceback
+
+from jsonrpc11base.errors import APIError, JSONRPCError
+
+
+class RemoteJSONRPCError(JSONRPCError):
+    """A JSONRPCError raised by a handler in a worker process."""
+
+    def __init__(self, class_name, code, message, error=None):
+        self.class_name = class_name
+        self.code = code
+        self.message = message
+        self.error = error
+
+
+class RemoteAPIError(APIError):
+    """An APIError raised by a handler in a worker process."""
+
+    def __init__(self, class_name, code, message, error=None):
+        self.class_name = class_name
+        self.code = code
+        self.message = message
+        self.error = error
+
+
+class RemoteException(Exception):
+    """Any other exception raised by a handler in a worker process."""
+
+    def __init__(self, class_name, message, remote_traceback):
+        super().__init__(message)
+        self.class_name = class_name
+        self.message = message
+        self.remote_traceback = remote_traceback
+
+
+def invoke_in_process(func, params, options):
+    """
+    Calls the handler; runs in the worker process.
+
+    Returns:
+        A picklable tuple describing the outcome, for unpack_outcome.
+    """
+    try:
+        if params is None:
+            return ('result', func(options))
+        else:
+            return ('result', func(params, options))
+    except JSONRPCError as ex:
+        return ('jsonrpc_error', type(ex).__name__, ex.code, ex.message, ex.error)
+    except APIError as ex:
+        return ('api_error', type(ex).__name__, ex.code, ex.message, ex.error)
+    except Exception as ex:
+        message = getattr(ex, 'message', str(ex))
+        return ('exception', type(ex).__name__, message, traceback.format_exc(limit=1000))
+
+
+def unpack_outcome(outcome):
+    """
+    Returns the result from the outcome of invoke_in_process, or raises the
+    reconstructed exception; runs in the service process.
+    """
+    kind = outcome[0]
+    if kind == 'result':
+        return outcome[1]
+    elif kind == 'jsonrpc_error':
+        raise RemoteJSONRPCError(*outcome[1:])
+    elif kind == 'api_error':
+        raise RemoteAPIError(*outcome[1:])
+    else:
+        raise RemoteException(*outcome[1:])
@@ -0,0 +1,203 @@
+"""
+Prometheus text exposition of service metrics
+
+Rendering is incremental: the lines for each method are kept, and re-rendered
+only once the method's metrics have changed, as flagged by CallMetrics.dirty,
+or the hits or misses of its result cache.
+Scraping a service whose methods are mostly idle therefore costs little more
+than checking each method's flag, and an unchanged service returns the
+previous text as is.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from jsonrpc11base.method import Method
+from jsonrpc11base.metrics import BUCKET_COUNT, Snapshot, bucket_upper_bound
+
+# Upper bounds of the exposed latency histogram buckets, in seconds
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+def make_bucket_map() -> List[int]:
+    """
+    Maps each fine histogram bucket to the first exposed bucket which holds
+    all of its values; len(LATENCY_BUCKETS) stands for +Inf.
+    """
+    bucket_map = []
+    for index in range(BUCKET_COUNT):
+        upper_bound = bucket_upper_bound(index) / 1e9
+        for le_index, le in enumerate(LATENCY_BUCKETS):
+            if upper_bound <= le:
+                break
+        else:
+            le_index = len(LATENCY_BUCKETS)
+        bucket_map.append(le_index)
+    return bucket_map
+
+
+BUCKET_MAP = make_bucket_map()
+
+
+def make_bucket_slices() -> List[slice]:
+    """
+    Returns the fine buckets of each exposed bucket, as slices; as the fine
+    buckets are in order, each exposed bucket covers a contiguous run of them.
+    """
+    starts = [BUCKET_MAP.index(le_index) if le_index in BUCKET_MAP else None
+              for le_index in range(len(LATENCY_BUCKETS) + 1)]
+    slices = []
+    for le_index, start in enumerate(starts):
+        if start is None:
+            slices.append(slice(0, 0))
+        else:
+            end = start
+            while end < len(BUCKET_MAP) and BUCKET_MAP[end] == le_index:
+                end += 1
+            slices.append(slice(start, end))
+    return slices
+
+
+BUCKET_SLICES = make_bucket_slices()
+
+SERVICE_FAMILIES = [
+    ('jsonrpc_requests_total', 'counter',
+     'Requests received, counting each request of a batch.', 'requests'),
+    ('jsonrpc_parse_errors_total', 'counter',
+     'Request bodies which were not valid JSON.', 'parse_errors'),
+    ('jsonrpc_invalid_requests_total', 'counter',
+     'Requests which were not valid JSON-RPC 1.1 requests.', 'invalid_requests'),
+    ('jsonrpc_method_not_found_total', 'counter',
+     'Requests for methods which do not exist.', 'method_not_found'),
+]
+
+METHOD_FAMILIES = [
+    ('jsonrpc_method_calls_total', 'counter',
+     'Completed calls of the method, not counting results served from its cache.'),
+    ('jsonrpc_method_errors_total', 'counter', 'Calls of the method which raised an error.'),
+    ('jsonrpc_method_in_flight', 'gauge', 'Calls of the method in progress.'),
+    ('jsonrpc_method_validation_seconds_total', 'counter',
+     'Time spent validating the params and results of the method.'),
+    ('jsonrpc_method_cache_hits_total', 'counter',
+     'Requests for the method answered from its result cache.'),
+    ('jsonrpc_method_cache_misses_total', 'counter',
+     'Requests for the method not found in its result cache.'),
+    ('jsonrpc_method_duration_seconds', 'histogram', 'Duration of calls of the method.'),
+]
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render_method(name: str, snapshot: Snapshot,
+                  cache_counts: Optional[Tuple[int, int]] = None) -> List[str]:
+    """
+    Returns the lines for a method, one string per entry in METHOD_FAMILIES;
+    those of the cache families are empty unless the cache hits and misses
+    of a method which caches its results are given.
+    """
+    label = f'method="{escape_label(name)}"'
+
+    counts = [sum(snapshot.counts[bucket_slice]) for bucket_slice in BUCKET_SLICES]
+    histogram = []
+    cumulative = 0
+    for le, count in zip(LATENCY_BUCKETS + ['+Inf'], counts):
+        cumulative += count
+        histogram.append(f'jsonrpc_method_duration_seconds_bucket{{{label},le="{le}"}} '
+                         f'{cumulative}\n')
+    histogram.append(f'jsonrpc_method_duration_seconds_sum{{{label}}} '
+                     f'{format_value(snapshot.total_ns / 1e9)}\n')
+    histogram.append(f'jsonrpc_method_duration_seconds_count{{{label}}} {snapshot.calls}\n')
+
+    cache_lines = ['', '']
+    if cache_counts is not None:
+        hits, misses = cache_counts
+        cache_lines = [f'jsonrpc_method_cache_hits_total{{{label}}} {hits}\n',
+                       f'jsonrpc_method_cache_misses_total{{{label}}} {misses}\n']
+
+    return [
+        f'jsonrpc_method_calls_total{{{label}}} {snapshot.calls}\n',
+        f'jsonrpc_method_errors_total{{{label}}} {snapshot.errors}\n',
+        f'jsonrpc_method_in_flight{{{label}}} {snapshot.in_flight}\n',
+        f'jsonrpc_method_validation_seconds_total{{{label}}} '
+        f'{format_value(snapshot.validation_ns / 1e9)}\n',
+        *cache_lines,
+        ''.join(histogram)
+    ]
+
+
+class MetricsRenderer(object):
+    """
+    Renders service and method metrics in the Prometheus text format, caching
+    what has not changed since the last rendering.
+    """
+
+    def __init__(self):
+        # Method name => (method, cache hits and misses, rendered lines)
+        self.methods: Dict[str, Tuple[Method, Optional[Tuple[int, int]], List[str]]] = {}
+        self.last_names: tuple = ()
+        self.last_counters: Dict[str, int] = {}
+        # The text of each of METHOD_FAMILIES: the header, then each method's lines
+        self.families: List[List[str]] = []
+        self.last_text = ''
+        self.lock = threading.Lock()
+
+    def render(self, counters: Dict[str, int], methods: Dict[str, Method]) -> str:
+        """
+        Args:
+            counters: the service-wide counters, as named in SERVICE_FAMILIES
+            methods: all methods of the service, by name
+        """
+        with self.lock:
+            return self.render_unlocked(counters, methods)
+
+    def render_unlocked(self, counters: Dict[str, int], methods: Dict[str, Method]) -> str:
+        names = tuple(methods)
+        if names != self.last_names:
+            self.methods = {name: self.methods[name] for name in names if name in self.methods}
+            self.families = [
+                [f'# HELP {metric} {help_text}\n# TYPE {metric} {metric_type}\n']
+                + [''] * len(names)
+                for metric, metric_type, help_text in METHOD_FAMILIES
+            ]
+            changed = True
+        else:
+            changed = counters != self.last_counters
+
+        for position, (name, method) in enumerate(methods.items(), 1):
+            metrics = method.metrics
+            cache = method.cache
+            cache_counts = (cache.hits, cache.misses) if cache is not None else None
+            cached = self.methods.get(name)
+            if (metrics.dirty or cached is None or cached[0] is not method
+                    or cached[1] != cache_counts):
+                metrics.dirty = False
+                cached = (method, cache_counts,
+                          render_method(name, metrics.snapshot(), cache_counts))
+                self.methods[name] = cached
+                changed = True
+            elif self.families[0][position]:
+                continue
+            for family, lines in zip(self.families, cached[2]):
+                family[position] = lines
+        if not changed:
+            return self.last_text
+
+        parts = []
+        for metric, metric_type, help_text, counter in SERVICE_FAMILIES:
+            parts.append(f'# HELP {metric} {help_text}\n# TYPE {metric} {metric_type}\n'
+                         f'{metric} {counters.get(counter, 0)}\n')
+        for family in self.families:
+            parts.append(''.join(family))
+
+        self.last_names = names
+        self.last_counters = counters
+        self.last_text = ''.join(parts)
+        return self.last_text
@@ -0,0 +1,224 @@
+"""
+asyncio socket server for a JSONRPCService
+
+Serves the service over persistent TCP or Unix domain socket connections, on
+which each message is a JSON-RPC request or response, framed either as
+
+- "newline": newline-delimited JSON; each message is followed by "\\n", and so
+  may not contain a raw newline itself, which JSON encoders never write
+- "length": each message is preceded by its length in bytes, as a 4 byte
+  big-endian unsigned integer
+
+A client may send many requests without waiting for their responses. They are
+called concurrently, and each response is written as soon as it is ready, so
+responses may arrive in a different order from the requests; clients match
+them up by their "id".
+
+Example:
+
+    server = StreamServer(service, framing='length')
+    await server.start_tcp('0.0.0.0', 8888)
+"""
+import asyncio
+import logging
+import struct
+from typing import Any, Callable, List, Optional, Set
+
+from jsonrpc11base.main import JSONRPCService
+
+log = logging.getLogger(__name__)
+
+FRAMINGS = ('newline', 'length')
+
+DEFAULT_MAX_MESSAGE_SIZE = 10 * 1024 * 1024
+
+LENGTH_PREFIX = struct.Struct('>I')
+
+
+class StreamServer(object):
+    """
+    Serves a JSONRPCService on asyncio streams.
+
+    Args:
+        service: the service to call
+        framing: "newline" or "length" (see the module documentation)
+        max_message_size: the largest request accepted, in bytes; a
+            connection sending a larger one is closed
+        max_pending: the number of requests of a connection which may be
+            in progress at once; no more are read from the connection until
+            one of them is done
+        write_buffer_limit: the number of bytes of responses which may be
+            waiting to be sent on a connection before responses stop being
+            written, and so requests stop being read, until the client has
+            caught up
+        options: an optional function of the connection's StreamWriter
+            returning the options passed to the service's method handlers,
+            e.g. from writer.get_extra_info('peername'); the options are None
+            if not given
+    """
+
+    def __init__(self, service: JSONRPCService,
+                 framing: str = 'newline',
+                 max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+                 max_pending: int = 64,
+                 write_buffer_limit: int = 1024 * 1024,
+                 options: Optional[Callable[[asyncio.StreamWriter], Any]] = None):
+        if framing not in FRAMINGS:
+            raise ValueError(f'Unknown framing "{framing}"')
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        self.service = service
+        self.framing = framing
+        self.max_message_size = max_message_size
+        self.max_pending = max_pending
+        self.write_buffer_limit = write_buffer_limit
+        self.options = options
+        self.listeners: List[asyncio.AbstractServer] = []
+        # The tasks handling connections, and those of them waiting for a
+        # request other than their first
+        self.connections: Set[asyncio.Task] = set()
+        self.reading: Set[asyncio.Task] = set()
+        self.closing = False
+
+    @property
+    def stream_limit(self) -> int:
+        # The StreamReader buffer limit; a newline must be found within it.
+        if self.framing == 'newline':
+            return self.max_message_size + 1
+        return 64 * 1024
+
+    async def start_tcp(self, host=None, port=None, **kwargs) -> asyncio.AbstractServer:
+        """
+        Starts listening on a TCP socket; the keyword arguments are passed on
+        to asyncio.start_server.
+        """
+        listener = await asyncio.start_server(self.handle_connection, host, port,
+                                              limit=self.stream_limit, **kwargs)
+        self.listeners.append(listener)
+        return listener
+
+    async def start_unix(self, path: Optional[str] = None, **kwargs) -> asyncio.AbstractServer:
+        """
+        Starts listening on a Unix domain socket; the keyword arguments are
+        passed on to asyncio.start_unix_server.
+        """
+        listener = await asyncio.start_unix_server(self.handle_connection, path,
+                                                   limit=self.stream_limit, **kwargs)
+        self.listeners.append(listener)
+        return listener
+
+    async def shutdown(self, timeout: Optional[float] = None):
+        """
+        Stops gracefully: stops accepting connections and reading requests,
+        and waits for the responses to the requests already read to be sent,
+        for up to timeout seconds, before closing the connections.
+        """
+        self.closing = True
+        for listener in self.listeners:
+            listener.close()
+        # Connections between requests stop waiting for the next one. A new
+        # connection is still read from, as its client, which connected
+        # while the server was listening, expects its request to be served.
+        for task in list(self.reading):
+            task.cancel()
+        if self.connections:
+            done, not_done = await asyncio.wait(list(self.connections), timeout=timeout)
+            for task in not_done:
+                task.cancel()
+
+    async def read_message(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Returns the next message, or None once the connection is closed.
+
+        Raises:
+            ValueError: the message is larger than max_message_size
+        """
+        try:
+            if self.framing == 'newline':
+                while True:
+                    try:
+                        line = await reader.readuntil(b'\n')
+                    except asyncio.LimitOverrunError:
+                        raise ValueError('Message too large')
+                    # Blank lines between messages are ignored.
+                    if line.strip():
+                        return line
+            length, = LENGTH_PREFIX.unpack(await reader.readexactly(LENGTH_PREFIX.size))
+            if length > self.max_message_size:
+                raise ValueError('Message too large')
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+
+    def write_message(self, writer: asyncio.StreamWriter, message: bytes):
+        # Both parts are written without yielding to the event loop, so the
+        # messages of concurrent calls are never interleaved.
+        if self.framing == 'newline':
+            writer.write(message)
+            writer.write(b'\n')
+        else:
+            writer.write(LENGTH_PREFIX.pack(len(message)))
+            writer.write(message)
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_limit)
+        options = self.options(writer) if self.options is not None else None
+        pending = asyncio.Semaphore(self.max_pending)
+        # Only one task may wait for the write buffer to drain at a time.
+        drain_lock = asyncio.Lock()
+        tasks: Set[asyncio.Future] = set()
+
+        async def respond(message: bytes):
+            try:
+                response = await self.service.call_bytes_async(message, options)
+                if response is not None:
+                    self.write_message(writer, response)
+                    async with drain_lock:
+                        await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                pending.release()
+
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        first = True
+        try:
+            while True:
+                await pending.acquire()
+                if self.closing and not first:
+                    message = None
+                else:
+                    if not first:
+                        self.reading.add(connection)
+                    first = False
+                    try:
+                        message = await self.read_message(reader)
+                    except ValueError as err:
+                        log.warning('Closing connection: %s', err)
+                        message = None
+                    except asyncio.CancelledError:
+                        # Cancelled by shutdown, rather than the connection
+                        # being cancelled as a whole.
+                        if not self.closing:
+                            raise
+                        message = None
+                    finally:
+                        self.reading.discard(connection)
+                if message is None:
+                    pending.release()
+                    break
+                task = asyncio.ensure_future(respond(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            # Responses to requests already read are still sent.
+            if tasks:
+                await asyncio.wait(list(tasks))
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self.connections.discard(connection)
@@ -5,6 +5,12 @@ class ServiceDescription(object):
         self.version = version
         self.summary = summary
 
+    def cache_key(self) -> tuple:
+        """
+        Returns a key which changes whenever the description does.
+        """
+        return (self.name, self.id, self.version, self.summary)
+
     def to_json(self):
         data = {
             'sdversion': '1.0',
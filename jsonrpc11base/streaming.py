@@ -0,0 +1,105 @@
+"""
+Streamed results
+
+A method handler may return a generator, or any other iterator, of the items of
+an array result, e.g. rows read from a database cursor, rather than a list of
+them. For JSONRPCService.call_stream and call_stream_async, such results, and
+list and tuple results, are read and encoded a chunk of items at a time, and
+the response written in parts, so that neither the whole result nor the whole
+response need be held in memory at once.
+
+Elsewhere, iterators are read into lists by Method.call and call_async, within
+the call's concurrency limit and timing, before the result is used, as it is
+for validation, caching and single-flight calls. A streamed result is read
+after the call has returned, while the response is written, so reading it
+counts towards neither. Asynchronous iterators, e.g. from async generator
+handlers, are streamed by call_stream_async only; elsewhere they are read into
+lists, in an event loop of their own if there is none to await them in, as
+coroutine handlers are run.
+"""
+import asyncio
+import itertools
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+# The number of items of an array result encoded at a time
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+
+
+def is_streamable(result: Any) -> bool:
+    """
+    Whether a result is an array which may be streamed.
+    """
+    return isinstance(result, (list, tuple, Iterator, AsyncIterator))
+
+
+def materialize(result: Any) -> Any:
+    """
+    Reads an iterator result into a list; other results are returned as is.
+    An asynchronous iterator is read in an event loop of its own, so this must
+    not be called from within one.
+    """
+    if isinstance(result, Iterator):
+        return list(result)
+    if isinstance(result, AsyncIterator):
+        return asyncio.run(read_async(result))
+    return result
+
+
+async def read_async(result: AsyncIterator) -> List[Any]:
+    return [item async for item in result]
+
+
+async def materialize_async(result: Any, executor: Optional[Executor] = None) -> Any:
+    """
+    Like materialize, but also reads asynchronous iterators. Plain iterators,
+    which may block, are read on the executor.
+    """
+    if isinstance(result, AsyncIterator):
+        return await read_async(result)
+    if isinstance(result, Iterator):
+        return await asyncio.get_running_loop().run_in_executor(executor, list, result)
+    return result
+
+
+def iter_chunks(result: Any, size: int) -> Iterator[List[Any]]:
+    """
+    Yields the items of a list, tuple or iterator result in lists of up to
+    size items.
+    """
+    if isinstance(result, (list, tuple)):
+        for index in range(0, len(result), size):
+            yield list(result[index:index + size])
+        return
+    while True:
+        chunk = list(itertools.islice(result, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def iter_chunks_async(result: Any, size: int,
+                            executor: Optional[Executor] = None) -> AsyncIterator[List[Any]]:
+    """
+    Like iter_chunks, but also reads asynchronous iterators. Plain iterators,
+    which may block, are read on the executor.
+    """
+    if isinstance(result, AsyncIterator):
+        chunk = []
+        async for item in result:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    elif isinstance(result, Iterator):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(executor, list, itertools.islice(result, size))
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in iter_chunks(result, size):
+            yield chunk
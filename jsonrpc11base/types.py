@@ -14,3 +14,11 @@ MethodRequest = dict
 # Will be None if the request was a notification
 # Otherwise a structure (dict)
 MethodResult = Optional[dict]
+
+# Batch request structure; a list of requests
+BatchRequest = list
+
+# Result structure for a batch request
+# Will be None if every request was a notification
+# Otherwise a list of responses, or an error response
+BatchResult = Optional[Union[list, dict]]
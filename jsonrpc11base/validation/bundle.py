@@ -0,0 +1,137 @@
+"""
+Schema bundles
+
+Loading a schema directory reads one file per schema and checks each schema
+against its draft's metaschema, which takes most of the time, while the
+documents their "$ref"s lead to are fetched by the RefResolver on first use.
+A bundle does all of that once, ahead of time, e.g. when a container image is
+built: the schemas of a directory, already checked, and every document their
+references lead to, are written to one file, which Schema reads in one go.
+
+    python -m jsonrpc11base.validation.bundle schemas schemas.bundle
+
+then JSONRPCService(description, schema_dir='schemas.bundle').
+
+A bundle is a marshal of the decoded JSON, behind a header: as quick to load
+as a pickle, but unable to run code when loaded. The marshal format may
+differ between Python versions, so a bundle should be built with the Python
+and jsonrpc11base it is used with.
+"""
+import argparse
+import marshal
+import os
+import tempfile
+from typing import Any, Dict, Iterable
+from urllib.parse import urldefrag, urljoin
+
+from jsonschema import RefResolver
+from jsonschema.exceptions import RefResolutionError
+
+from jsonrpc11base.exceptions import InvalidSchemaError
+from jsonrpc11base.validation.schema import BUNDLE_HEADER, Schema
+
+
+def collect_documents(schemas: Iterable[Any], resolver: RefResolver) -> Dict[str, Any]:
+    """
+    Fetches every document which the "$ref"s of the schemas lead to, and
+    those of the documents fetched, in turn.
+
+    References are resolved as the validators would resolve them: relative
+    to the resolver's base URI, or to that of the document they are in, as
+    changed by any "$id" on the way. Documents the resolver already holds,
+    such as the metaschemas, are left out.
+
+    Returns:
+        The documents, by URL
+
+    Raises:
+        InvalidSchemaError: a reference cannot be resolved
+    """
+    known = set(resolver.store)
+    documents: Dict[str, Any] = {}
+    values = [(resolver.resolution_scope, schema) for schema in schemas]
+    while values:
+        scope, value = values.pop()
+        if isinstance(value, list):
+            values.extend((scope, item) for item in value)
+            continue
+        if not isinstance(value, dict):
+            continue
+        # "id" up to draft 4
+        for id_key in ('$id', 'id'):
+            if isinstance(value.get(id_key), str):
+                scope = urljoin(scope, value[id_key])
+                break
+        ref = value.get('$ref')
+        if isinstance(ref, str):
+            url, _ = urldefrag(urljoin(scope, ref))
+            if url not in known and url not in documents:
+                try:
+                    documents[url] = resolver.resolve_from_url(url)
+                except RefResolutionError as ex:
+                    raise InvalidSchemaError(f'Unresolvable reference "{ref}": {ex}')
+                values.append((url, documents[url]))
+        values.extend((scope, item) for item in value.values())
+    return documents
+
+
+def build_bundle(schema_dir: str) -> dict:
+    """
+    Loads and checks the schemas in a directory, and fetches the documents
+    they refer to, as the data of a bundle.
+
+    Raises:
+        InvalidSchemaError: a schema is not valid, or refers to a document
+            which cannot be fetched
+    """
+    schema = Schema(schema_dir)
+    schemas = {name: entry.get('schema') for name, entry in schema.schemas.items()}
+    base_uri = schema.resolver.resolution_scope
+    documents = collect_documents(
+        (schema_data for schema_data in schemas.values() if schema_data is not None),
+        schema.resolver)
+    return {
+        # None for a schema requiring the value be absent
+        'schemas': schemas,
+        # Those under the schema directory by their path relative to it, so
+        # that the bundle may be moved
+        'documents': {url[len(base_uri):] if url.startswith(base_uri) else url: document
+                      for url, document in documents.items()}
+    }
+
+
+def write_bundle(schema_dir: str, bundle_path: str) -> dict:
+    """
+    Bundles the schemas in a directory into one file, replacing it atomically.
+
+    Returns:
+        The data of the bundle (see build_bundle)
+    """
+    bundle = build_bundle(schema_dir)
+    data = BUNDLE_HEADER + marshal.dumps(bundle)
+    directory = os.path.dirname(os.path.abspath(bundle_path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.schemas-')
+    try:
+        with os.fdopen(fd, 'wb') as bundle_file:
+            bundle_file.write(data)
+        os.replace(temporary_path, bundle_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return bundle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Bundles the JSON schemas of a service into one file.')
+    parser.add_argument('schema_dir', help='the directory of "<name>.json" schemas')
+    parser.add_argument('bundle_path', help='the bundle file to write')
+    args = parser.parse_args(argv)
+
+    bundle = write_bundle(args.schema_dir, args.bundle_path)
+    print(f'Wrote {len(bundle["schemas"])} schemas and {len(bundle["documents"])} '
+          f'referenced documents to {args.bundle_path}')
+
+
+if __name__ == '__main__':
+    main()
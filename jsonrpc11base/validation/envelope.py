@@ -0,0 +1,96 @@
+"""
+Fast-path validation of the JSON-RPC 1.1 request envelope
+
+Performs the checks described by the "request" definition in
+jsonrpc_schema/jsonrpc11.json directly in Python. Errors are reported as
+SchemaError with the same message, path and value that validating against the
+schema with jsonschema would produce, so the two are interchangeable.
+"""
+import numbers
+
+from .schema import SchemaError
+
+REQUEST_PROPERTIES = ('version', 'method', 'id', 'params')
+
+REQUEST_REQUIRED = ['version', 'method']
+
+ID_TYPES = ['number', 'string', 'boolean', 'array', 'object', 'null']
+
+
+def is_valid_id(value) -> bool:
+    # jsonschema does not treat booleans as numbers, but they are allowed anyway.
+    return (value is None
+            or isinstance(value, (str, bool, list, dict, numbers.Number)))
+
+
+def validate_request(request):
+    """
+    Validates a JSON-RPC 1.1 request envelope.
+
+    Args:
+        request: the parsed request
+
+    Raises:
+        SchemaError: the request is not a valid JSON-RPC 1.1 request
+    """
+    if not isinstance(request, dict):
+        raise SchemaError(f"{request!r} is not of type 'object'", 'type', 'object')
+
+    # Errors on the request object itself take precedence over errors on its
+    # properties, in schema order: additionalProperties, required, properties.
+    extras = set(key for key in request if key not in REQUEST_PROPERTIES)
+    if extras:
+        verb = 'was' if len(extras) == 1 else 'were'
+        names = ', '.join(repr(extra) for extra in extras)
+        raise SchemaError(f'Additional properties are not allowed ({names} {verb} unexpected)',
+                          'additionalProperties', False)
+
+    for name in REQUEST_REQUIRED:
+        if name not in request:
+            raise SchemaError(f'{name!r} is a required property',
+                              'required', list(REQUEST_REQUIRED))
+
+    if request['version'] != '1.1':
+        raise SchemaError("'1.1' was expected", 'properties.version.const', '1.1')
+
+    validate_method(request['method'])
+
+    if 'id' in request and not is_valid_id(request['id']):
+        types = ', '.join(repr(id_type) for id_type in ID_TYPES)
+        raise SchemaError(f"{request['id']!r} is not of type {types}",
+                          'properties.id.type', list(ID_TYPES))
+
+    validate_params(request)
+
+
+def validate_dispatchable(request):
+    """
+    Checks the parts of a request which dispatching it relies on: that it is
+    an object, with a non-empty string "method", and params, if any, an array
+    or object. The rest of the envelope, e.g. "version", is not checked, as
+    services which do not validate params have always accepted it as is.
+
+    Raises:
+        SchemaError: the request cannot be dispatched, reported as by
+            validate_request
+    """
+    if not isinstance(request, dict):
+        raise SchemaError(f"{request!r} is not of type 'object'", 'type', 'object')
+    if 'method' not in request:
+        raise SchemaError("'method' is a required property", 'required', list(REQUEST_REQUIRED))
+    validate_method(request['method'])
+    validate_params(request)
+
+
+def validate_method(method):
+    if not isinstance(method, str):
+        raise SchemaError(f"{method!r} is not of type 'string'",
+                          'properties.method.type', 'string')
+    if len(method) < 1:
+        raise SchemaError(f'{method!r} is too short', 'properties.method.minLength', 1)
+
+
+def validate_params(request):
+    if 'params' in request and not isinstance(request['params'], (dict, list)):
+        raise SchemaError(f"{request['params']!r} is not of type 'object'",
+                          'properties.params.anyOf.0.type', 'object')
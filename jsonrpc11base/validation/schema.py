@@ -1,11 +1,19 @@
-from jsonschema import validate, RefResolver
-from jsonschema.exceptions import ValidationError
+from jsonschema import RefResolver
+from jsonschema.exceptions import best_match, SchemaError as JSONSchemaError
+from jsonschema.validators import validator_for
+from jsonrpc11base.exceptions import InvalidSchemaError
 import os
-import glob
 import json
+import marshal
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urljoin
 
 DEFAULT_SCHEMA_DIR = 'schemas'
 
+# The start of a schema bundle file, followed by a marshal of its data
+BUNDLE_HEADER = b'jsonrpc11base schema bundle 1\n'
+
 
 class SchemaError(Exception):
     def __init__(self, message, path, value):
@@ -15,45 +23,144 @@ class SchemaError(Exception):
 
 
 class Schema(object):
-    def __init__(self, schema_dir):
+    """
+    The JSON schemas in a directory, one per "<name>.json" file, each compiled
+    to a validator.
+
+    By default all schemas are loaded and compiled at once. With lazy, only
+    the names of the files are listed, and each schema is loaded and compiled
+    the first time it is used, so that a service with many methods starts
+    quickly; errors in a schema are then raised on first use, or by warm(),
+    rather than here.
+
+    schema_dir may instead be a bundle file, written by
+    jsonrpc11base.validation.bundle, holding the schemas of a directory,
+    already checked, and the documents their references lead to; it is read
+    in one go, and the schemas are compiled without checking them again nor
+    fetching any referenced document.
+    """
+    def __init__(self, schema_dir, lazy: bool = False):
         if schema_dir is None:
             raise Exception('schema_dir is required')
 
-        self.schema_dir = os.path.abspath(schema_dir)
-
-        self.resolver = RefResolver(f'file://{schema_dir}/', None)
-
-        self.schemas = self.load()
+        path = os.path.abspath(schema_dir)
+        if os.path.isfile(path):
+            self.bundle_path: Optional[str] = path
+            self.bundle: Optional[dict] = read_bundle(path)
+            self.schema_dir = os.path.dirname(path)
+        else:
+            self.bundle_path = None
+            self.bundle = None
+            self.schema_dir = path
+
+        base_uri = f'file://{self.schema_dir}/'
+        store = {}
+        if self.bundle is not None:
+            # Documents under the schema directory are kept relative to it.
+            store = {urljoin(base_uri, key): document
+                     for key, document in self.bundle['documents'].items()}
+        self.resolver = RefResolver(base_uri, None, store=store)
+
+        self.lazy = lazy
+        # Guards the loading of schemas on first use
+        self.lock = threading.Lock()
+        self.paths = self.index()
+        if lazy:
+            self.schemas: Dict[str, dict] = {}
+        else:
+            self.schemas = self.load()
+
+    def index(self) -> Dict[str, str]:
+        """
+        Returns the path of each schema file, or of the bundle, by schema name.
+        """
+        if self.bundle is not None:
+            return {name: self.bundle_path for name in self.bundle['schemas']}
+        # As glob('*.json') would, leaving out hidden files, and finding none
+        # in a directory which does not exist
+        try:
+            with os.scandir(self.schema_dir) as entries:
+                return {entry.name[:-len('.json')]: entry.path for entry in entries
+                        if entry.name.endswith('.json') and not entry.name.startswith('.')
+                        and entry.is_file()}
+        except FileNotFoundError:
+            return {}
 
     def load(self):
-        schemas = {}
-        for file_path in glob.glob(f'{self.schema_dir}/*.json'):
-            file_base_name = os.path.splitext(os.path.basename(file_path))[0]
-
-            with open(file_path) as fd:
-                schema_text = fd.read()
-                if len(schema_text) == 0:
-                    # this means the associated value must
-                    # be absent
-                    schema = {
-                        'absent': True
-                    }
-                else:
-                    schema = {
-                        'schema': json.loads(schema_text)
-                    }
-                schemas[file_base_name] = schema
-        return schemas
+        return {name: self.load_schema(name) for name in self.paths}
+
+    def load_schema(self, name: str) -> dict:
+        if self.bundle is None:
+            return self.load_file(self.paths[name])
+        schema_data = self.bundle['schemas'][name]
+        if schema_data is None:
+            return {
+                'absent': True
+            }
+        # Bundled schemas were checked when the bundle was built.
+        return {
+            'schema': schema_data,
+            'validator': self.compile(schema_data, self.paths[name], check=False)
+        }
+
+    def load_file(self, file_path: str) -> dict:
+        with open(file_path) as fd:
+            schema_text = fd.read()
+        if len(schema_text) == 0:
+            # this means the associated value must
+            # be absent
+            return {
+                'absent': True
+            }
+        schema_data = json.loads(schema_text)
+        return {
+            'schema': schema_data,
+            'validator': self.compile(schema_data, file_path)
+        }
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Loads and compiles the given schemas, or all of them, now rather than
+        on first use, e.g. before a latency sensitive service starts serving.
+
+        Returns:
+            The number of schemas loaded.
+
+        Raises:
+            InvalidSchemaError: a schema is not valid
+        """
+        names = list(self.paths) if names is None else names
+        loaded = [name for name in names if self.get(name) is not None]
+        return len(loaded)
+
+    def compile(self, schema, file_path, check: bool = True):
+        """
+        Builds a reusable validator for the schema.
+
+        The validator class is chosen from the schema's "$schema" draft, and the
+        schema itself is checked against that draft's metaschema here, once,
+        rather than on every validation, unless check is False, as for schemas
+        already checked when they were bundled. All validators share this
+        instance's RefResolver, so remote "$ref" documents are fetched and
+        cached once.
+        """
+        validator_class = validator_for(schema)
+        if check:
+            try:
+                validator_class.check_schema(schema)
+            except JSONSchemaError as ex:
+                raise InvalidSchemaError(f'Invalid schema "{file_path}": {ex.message}')
+        return validator_class(schema, resolver=self.resolver)
 
     def validate_absent(self, schema_key):
         """ Used in the case in which the value is absent. """
-        schema = self.schemas.get(schema_key, None)
+        schema = self.get(schema_key)
         if schema is None:
             return False
         return schema.get('absent', False)
 
     def validate(self, schema_key, value):
-        schema_wrapper = self.schemas.get(schema_key)
+        schema_wrapper = self.get(schema_key)
 
         if schema_wrapper is None:
             raise SchemaError(
@@ -69,13 +176,42 @@ class Schema(object):
                 value
             )
 
-        schema = schema_wrapper.get('schema')
-        try:
-            validate(instance=value, schema=schema, resolver=self.resolver)
-        except ValidationError as ex:
-            message = ex.message
-            path = '.'.join(map(str, ex.absolute_schema_path))
-            raise SchemaError(message, path, ex.validator_value)
+        # Same error selection as jsonschema.validate(), but without rebuilding
+        # and re-checking the validator on every call.
+        error = best_match(schema_wrapper['validator'].iter_errors(value))
+        if error is not None:
+            message = error.message
+            path = '.'.join(map(str, error.absolute_schema_path))
+            raise SchemaError(message, path, error.validator_value)
 
     def get(self, schema_name, default_value=None):
-        return self.schemas.get(schema_name, default_value)
+        schema = self.schemas.get(schema_name)
+        if schema is not None:
+            return schema
+        if not self.lazy or schema_name not in self.paths:
+            return default_value
+        with self.lock:
+            # Another thread may have loaded it meanwhile.
+            schema = self.schemas.get(schema_name)
+            if schema is None:
+                schema = self.load_schema(schema_name)
+                self.schemas[schema_name] = schema
+        return schema
+
+
+def read_bundle(bundle_path: str) -> dict:
+    """
+    Reads a schema bundle written by jsonrpc11base.validation.bundle.
+
+    Raises:
+        InvalidSchemaError: the file is not a schema bundle, or not one of
+            this version
+    """
+    with open(bundle_path, 'rb') as fd:
+        data = fd.read()
+    if not data.startswith(BUNDLE_HEADER):
+        raise InvalidSchemaError(f'Not a schema bundle: "{bundle_path}"')
+    try:
+        return marshal.loads(memoryview(data)[len(BUNDLE_HEADER):])
+    except (EOFError, ValueError, TypeError) as ex:
+        raise InvalidSchemaError(f'Invalid schema bundle "{bundle_path}": {ex}')
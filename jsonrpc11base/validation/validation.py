@@ -3,8 +3,18 @@ from jsonrpc11base.errors import InvalidParamsError, InvalidResultServerError
 
 
 class Validation(object):
-    def __init__(self, schema_dir):
-        self.schema = Schema(schema_dir)
+    def __init__(self, schema_dir, lazy: bool = False):
+        self.schema = Schema(schema_dir, lazy=lazy)
+
+    def warm(self, method_names=None) -> int:
+        """
+        Loads the params and result schemas of the given methods, or all
+        schemas, if they are loaded lazily; see Schema.warm.
+        """
+        if method_names is None:
+            return self.schema.warm()
+        return self.schema.warm(f'{method_name}.{kind}' for method_name in method_names
+                                for kind in ('params', 'result'))
 
     def has_params_validation(self, method_name):
         schema_key = method_name + '.params'
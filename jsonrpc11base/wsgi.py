@@ -0,0 +1,127 @@
+"""
+WSGI application serving a JSONRPCService
+
+Serves the service over HTTP under any WSGI server, e.g. gunicorn or uWSGI:
+
+    app = WSGIApplication(service)
+
+Each POST request body is a JSON-RPC request. Its response, always with status
+200 as the library ignores the HTTP specifics of JSON-RPC 1.1, is the body of
+the HTTP response.
+"""
+import itertools
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from jsonrpc11base.main import JSONRPCService
+
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+
+StartResponse = Callable[[str, List[Tuple[str, str]]], Any]
+
+
+class WSGIApplication(object):
+    """
+    A WSGI application calling a JSONRPCService.
+
+    The request body is read in one piece, into a single buffer, and passed as
+    is to JSONRPCService.call_bytes; the encoded response is returned as is,
+    as the only item of the response iterable.
+
+    With stream, the response is instead that of JSONRPCService.call_stream,
+    returned in parts, without a Content-Length, as array results are encoded.
+
+    Args:
+        service: the service to call
+        max_body_size: the largest request body accepted, in bytes; larger
+            requests are refused with status 413 without being read
+        options: an optional function of the WSGI environ returning the
+            options passed to the service's method handlers, e.g. to pass on
+            an authorization header; the options are None if not given
+        stream: whether to stream responses (see above)
+    """
+
+    def __init__(self, service: JSONRPCService,
+                 max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+                 options: Optional[Callable[[dict], Any]] = None,
+                 stream: bool = False):
+        self.service = service
+        self.max_body_size = max_body_size
+        self.options = options
+        self.stream = stream
+
+    def __call__(self, environ: dict, start_response: StartResponse) -> Iterable[bytes]:
+        if environ['REQUEST_METHOD'] != 'POST':
+            return self.error(start_response, '405 Method Not Allowed', [('Allow', 'POST')])
+
+        content_length = environ.get('CONTENT_LENGTH')
+        if content_length:
+            try:
+                length = int(content_length)
+            except ValueError:
+                return self.error(start_response, '400 Bad Request')
+            if length < 0:
+                return self.error(start_response, '400 Bad Request')
+            if length > self.max_body_size:
+                return self.error(start_response, '413 Payload Too Large')
+            body = self.read_body(environ['wsgi.input'], length)
+            if body is None:
+                return self.error(start_response, '400 Bad Request')
+        elif environ.get('wsgi.input_terminated'):
+            # A chunked request, which the server has delimited; read one byte
+            # beyond the limit to tell whether the body exceeds it.
+            body = environ['wsgi.input'].read(self.max_body_size + 1)
+            if len(body) > self.max_body_size:
+                return self.error(start_response, '413 Payload Too Large')
+        else:
+            return self.error(start_response, '411 Length Required')
+
+        options = self.options(environ) if self.options is not None else None
+        if self.stream:
+            return self.respond_stream(start_response, self.service.call_stream(body, options))
+        response = self.service.call_bytes(body, options)
+
+        if response is None:
+            # A batch of notifications only
+            start_response('204 No Content', [])
+            return []
+        start_response('200 OK', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(response)))
+        ])
+        return [response]
+
+    @staticmethod
+    def respond_stream(start_response: StartResponse, parts) -> Iterable[bytes]:
+        first = next(parts, None)
+        if first is None:
+            start_response('204 No Content', [])
+            return []
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return itertools.chain([first], parts)
+
+    @staticmethod
+    def read_body(stream, length: int) -> Optional[bytes]:
+        """
+        Reads exactly length bytes; returns None if the stream ends first.
+        """
+        body = stream.read(length)
+        if len(body) == length:
+            return body
+        # A short read: keep reading, into one buffer
+        buffer = bytearray(body)
+        while len(buffer) < length:
+            chunk = stream.read(length - len(buffer))
+            if not chunk:
+                return None
+            buffer += chunk
+        return bytes(buffer)
+
+    @staticmethod
+    def error(start_response: StartResponse, status: str,
+              headers: Optional[List[Tuple[str, str]]] = None) -> Iterable[bytes]:
+        body = status.encode('utf-8')
+        start_response(status, [
+            ('Content-Type', 'text/plain; charset=utf-8'),
+            ('Content-Length', str(len(body)))
+        ] + (headers or []))
+        return [body]
@@ -0,0 +1,151 @@
+"""
+Per-phase cost of JSONRPCService.call
+
+Times each phase of handling a request separately -- parsing, envelope
+validation, method lookup, params validation, dispatch to the handler, result
+validation, response construction and serialization -- as well as the whole
+call, for a validating and a non-validating service, with payloads from a
+few bytes to a few megabytes.
+
+The results are printed, and written as JSON to a file which may be diffed
+between releases.
+
+Run from the repository root:
+
+    poetry run python -m test.benchmarks.bench_call [--output bench-call.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional
+
+import jsonrpc11base
+from jsonrpc11base.main import make_result_response
+from test.benchmarks.services import make_non_validating_service, make_validating_service
+
+SERVICES = {
+    'validating': make_validating_service,
+    'non_validating': make_non_validating_service
+}
+
+# Length of the params array sent to return_options_and_params, which echoes
+# it back, so that both the request and the response grow with the payload.
+PAYLOAD_SIZES = {
+    'tiny': 1,
+    'small': 100,
+    'large': 10_000,
+    'huge': 300_000
+}
+
+METHOD_NAME = 'return_options_and_params'
+
+PHASES = ['parse', 'envelope', 'find_method', 'params', 'dispatch', 'result',
+          'response', 'serialize', 'call']
+
+REPEAT = 5
+
+
+def make_request_body(size: int) -> str:
+    return json.dumps({
+        'version': '1.1',
+        'id': 'bench',
+        'method': METHOD_NAME,
+        'params': [index + 0.5 for index in range(size)]
+    })
+
+
+def make_phases(service: jsonrpc11base.JSONRPCService, body: str) -> Dict[str, Callable]:
+    """
+    Returns a function running each phase of a call on its own, given the
+    outputs of the phases before it.
+    """
+    options: dict = {}
+    request, _ = service.parse(body)
+    request_id, method_name, params = service.unpack_request(request)
+    method, is_system_method = service.find_method(method_name)
+    result = method.call(params, options)
+    response = make_result_response(result, request_id)
+
+    return {
+        'parse': lambda: service.parse(body),
+        'envelope': lambda: service.check_request(request),
+        'find_method': lambda: service.find_method(method_name),
+        'params': lambda: service.do_params(method_name, params, is_system_method),
+        'dispatch': lambda: method.call(params, options),
+        'result': lambda: service.do_result(method_name, result, is_system_method),
+        'response': lambda: make_result_response(result, request_id),
+        'serialize': lambda: service.codec.dumps(response),
+        'call': lambda: service.call(body, options)
+    }
+
+
+def time_phase(func: Callable) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = sorted(total / number * 1e6 for total in timer.repeat(REPEAT, number))
+    return {
+        'best_us': round(times[0], 3),
+        'median_us': round(times[len(times) // 2], 3),
+        'number': number
+    }
+
+
+def run(services: Optional[List[str]] = None, sizes: Optional[List[str]] = None,
+        phases: Optional[List[str]] = None) -> dict:
+    """
+    Runs the benchmarks and returns the results, in the form written to the
+    results file.
+    """
+    results = []
+    for service_name in services or list(SERVICES):
+        service = SERVICES[service_name]()
+        for size_name in sizes or list(PAYLOAD_SIZES):
+            body = make_request_body(PAYLOAD_SIZES[size_name])
+            funcs = make_phases(service, body)
+            for phase in phases or PHASES:
+                results.append({
+                    'service': service_name,
+                    'payload': size_name,
+                    'bytes': len(body),
+                    'phase': phase,
+                    **time_phase(funcs[phase])
+                })
+        service.shutdown()
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default='bench-call.json',
+                        help='file to write the results to (default: %(default)s)')
+    parser.add_argument('--service', action='append', choices=list(SERVICES),
+                        help='service to benchmark; may be repeated (default: all)')
+    parser.add_argument('--size', action='append', choices=list(PAYLOAD_SIZES),
+                        help='payload size to benchmark; may be repeated (default: all)')
+    parser.add_argument('--phase', action='append', choices=PHASES,
+                        help='phase to benchmark; may be repeated (default: all)')
+    args = parser.parse_args(argv)
+
+    report = run(args.service, args.size, args.phase)
+
+    print(f'{"service":<16}{"payload":<10}{"bytes":>10}  {"phase":<12}'
+          f'{"best (us)":>14}{"median (us)":>14}')
+    for result in report['results']:
+        print(f'{result["service"]:<16}{result["payload"]:<10}{result["bytes"]:>10}  '
+              f'{result["phase"]:<12}{result["best_us"]:>14.2f}{result["median_us"]:>14.2f}')
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+        output.write('\n')
+    print(f'Results written to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+Performance regression gate
+
+Runs a fixed set of JSONRPCService scenarios and compares their throughput and
+p99 latency with those stored in a baseline file, failing if any has regressed
+by more than its threshold.
+
+Results are normalized for the speed of the machine by a calibration loop of
+plain Python, run between blocks of calls of about its own length throughout
+each round of each scenario: each call's latency is divided by the time the
+loop took around its block. The scenario's result is the median of its
+rounds' normalized throughputs and p99 latencies, each call compared only
+with the calibration taken alongside it. All scenarios are run in several
+processes in turn, and the median of their results compared. A baseline
+recorded on one machine may thus be checked on another, if with some loss of
+precision.
+
+Run from the repository root:
+
+    make bench-check        # compare with test/benchmarks/baseline.json
+    make bench-baseline     # record a new baseline
+
+or directly:
+
+    poetry run python -m test.benchmarks.bench_check [--threshold 0.25] [--p99-threshold 1.0]
+        [--runs 3] [--update]
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from test.benchmarks.services import make_non_validating_service, make_validating_service
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Allowed regression, as a fraction of the baseline
+DEFAULT_THRESHOLD = 0.25
+
+# Allowed regression of the p99 latency. On a shared machine, the tail of calls
+# of tens of microseconds shifts by half or more from one minute to the next
+# (interrupts, other guests), which the calibration loop does not follow, while
+# the throughput moves by a few percent.
+DEFAULT_P99_THRESHOLD = 1.0
+
+# Processes the scenarios are run in, the median of their results being kept
+DEFAULT_RUNS = 3
+
+# Seconds of calls timed per round of a scenario, of at least MIN_CALLS calls;
+# the median of ROUNDS rounds is kept.
+ROUND_TIME = 0.5
+MIN_CALLS = 500
+ROUNDS = 9
+WARMUP_CALLS = 500
+
+
+def make_scenarios() -> Dict[str, Callable]:
+    """
+    Returns a function making one call for each scenario.
+    """
+    validating = make_validating_service()
+    non_validating = make_non_validating_service()
+
+    def request(method, params=None):
+        req = {'version': '1.1', 'id': 1, 'method': method}
+        if params is not None:
+            req['params'] = params
+        return json.dumps(req)
+
+    subtract = request('subtract', [42, 23])
+    broken = request('broken_func')
+    describe = request('system.describe')
+
+    return {
+        'no_validation_call': lambda: non_validating.call(subtract),
+        'full_validation_call': lambda: validating.call(subtract),
+        'error_path': lambda: validating.call(broken),
+        'system_describe': lambda: validating.call(describe)
+    }
+
+
+def calibration_loop():
+    """
+    A fixed loop of plain Python, of dict, str and int operations much like
+    those of a call, taking a few hundred microseconds.
+    """
+    data = {}
+    for index in range(2_000):
+        key = str(index % 97)
+        data[key] = data.get(key, 0) + index
+    return sorted(data.items())
+
+
+def calibrate() -> int:
+    """
+    Returns the time, in nanoseconds, of one run of the calibration loop, as
+    a measure of the current speed of the machine.
+    """
+    started = time.perf_counter_ns()
+    calibration_loop()
+    return time.perf_counter_ns() - started
+
+
+def percentile(latencies: List[float], percent: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+def measure(func: Callable) -> Dict[str, float]:
+    """
+    Returns the median throughput and p99 latency of ROUNDS rounds, as
+    measured and as normalized by the calibration.
+
+    The calls of a round are made in blocks taking about as long as the
+    calibration loop, which is run between each block and the next; the
+    latencies of a block are normalized by the mean of the calibrations on
+    either side of it. The machine slowing down or speeding up during the run
+    (e.g. other load, or frequency scaling) thus affects calls and
+    calibration alike. A round's normalized throughput is that of the median
+    block, and the scenario's results are the medians of those of its rounds,
+    rather than the best throughput and latency of any round each.
+    """
+    for _ in range(WARMUP_CALLS):
+        func()
+    calibration = calibrate()
+    started = time.perf_counter_ns()
+    for _ in range(WARMUP_CALLS):
+        func()
+    call_time = (time.perf_counter_ns() - started) / WARMUP_CALLS
+    block_size = max(1, round(calibration / call_time))
+    calls = max(MIN_CALLS, round(ROUND_TIME * 1e9 / call_time))
+
+    rounds: Dict[str, List[float]] = {
+        'throughput': [],
+        'p99': [],
+        'normalized_throughput': [],
+        'normalized_p99': []
+    }
+    for _ in range(ROUNDS):
+        gc.collect()
+        latencies: List[int] = []
+        normalized_latencies: List[float] = []
+        block_ratios = []
+        before = calibrate()
+        elapsed = 0
+        while len(latencies) < calls:
+            block = []
+            for _ in range(block_size):
+                call_started = time.perf_counter_ns()
+                func()
+                block.append(time.perf_counter_ns() - call_started)
+            after = calibrate()
+            calibration = (before + after) / 2
+            elapsed += sum(block)
+            latencies.extend(block)
+            normalized_latencies.extend(latency / calibration for latency in block)
+            block_ratios.append(sum(block) / len(block) / calibration)
+            before = after
+
+        rounds['throughput'].append(len(latencies) / elapsed * 1e9)
+        rounds['p99'].append(percentile(latencies, 99) / 1e9)
+        rounds['normalized_throughput'].append(1 / statistics.median(block_ratios))
+        rounds['normalized_p99'].append(percentile(normalized_latencies, 99))
+    return {name: statistics.median(values) for name, values in rounds.items()}
+
+
+def run() -> dict:
+    """
+    Runs all scenarios, returning raw and normalized results.
+    """
+    scenarios = {}
+    for name, func in make_scenarios().items():
+        result = measure(func)
+        scenarios[name] = {
+            'throughput': round(result['throughput'], 1),
+            'p99_us': round(result['p99'] * 1e6, 2),
+            'normalized_throughput': round(result['normalized_throughput'], 4),
+            'normalized_p99': round(result['normalized_p99'], 6)
+        }
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'scenarios': scenarios
+    }
+
+
+def run_processes(runs: int) -> dict:
+    """
+    Runs all scenarios in each of runs new processes, one after another,
+    returning the median of each result.
+
+    A process's results may differ from another's by more than the rounds
+    within it do (e.g. by the layout of its memory), so a single run may be
+    well off from the usual.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        results = [pool.apply(run) for _ in range(runs)]
+    current = dict(results[0])
+    current['scenarios'] = {
+        name: {key: statistics.median(result['scenarios'][name][key] for result in results)
+               for key in scenario}
+        for name, scenario in results[0]['scenarios'].items()
+    }
+    return current
+
+
+def compare(baseline: dict, current: dict, threshold: float,
+            p99_threshold: float = DEFAULT_P99_THRESHOLD) -> List[str]:
+    """
+    Returns a description of each regression of the current results against
+    the baseline, beyond threshold for the throughput and p99_threshold for
+    the p99 latency; scenarios missing from either are ignored.
+    """
+    regressions = []
+    for name, base in baseline['scenarios'].items():
+        result = current['scenarios'].get(name)
+        if result is None:
+            continue
+        throughput_ratio = result['normalized_throughput'] / base['normalized_throughput']
+        if throughput_ratio < 1 - threshold:
+            regressions.append(f'{name}: throughput is {throughput_ratio:.0%} of the baseline')
+        p99_ratio = result['normalized_p99'] / base['normalized_p99']
+        if p99_ratio > 1 + p99_threshold:
+            regressions.append(f'{name}: p99 latency is {p99_ratio:.0%} of the baseline')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='baseline file (default: %(default)s)')
+    parser.add_argument('--threshold', type=float,
+                        default=float(os.environ.get('BENCH_THRESHOLD', DEFAULT_THRESHOLD)),
+                        help=('allowed regression, as a fraction of the baseline; also '
+                              'settable with BENCH_THRESHOLD (default: %(default)s)'))
+    parser.add_argument('--p99-threshold', type=float,
+                        default=float(os.environ.get('BENCH_P99_THRESHOLD',
+                                                     DEFAULT_P99_THRESHOLD)),
+                        help=('allowed regression of the p99 latency; also settable with '
+                              'BENCH_P99_THRESHOLD (default: %(default)s)'))
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help=('processes to run the scenarios in, taking the median of '
+                              'their results (default: %(default)s)'))
+    parser.add_argument('--update', action='store_true',
+                        help='write the results to the baseline file instead of comparing')
+    args = parser.parse_args(argv)
+
+    current = run_processes(args.runs)
+
+    print(f'{"scenario":<24}{"calls/s":>12}{"p99 (us)":>12}')
+    for name, result in current['scenarios'].items():
+        print(f'{name:<24}{result["throughput"]:>12.0f}{result["p99_us"]:>12.1f}')
+
+    if args.update:
+        with open(args.baseline, 'w') as output:
+            json.dump(current, output, indent=2, sort_keys=True)
+            output.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    with open(args.baseline) as input_file:
+        baseline = json.load(input_file)
+    regressions = compare(baseline, current, args.threshold, args.p99_threshold)
+    if regressions:
+        print(f'Performance regressed by more than {args.threshold:.0%} '
+              f'(p99 latency {args.p99_threshold:.0%}):', file=sys.stderr)
+        for regression in regressions:
+            print(f'  {regression}', file=sys.stderr)
+        return 1
+    print(f'No regression beyond {args.threshold:.0%} (p99 latency '
+          f'{args.p99_threshold:.0%}) of the baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Throughput of the ASGI application against the WSGI one
+
+Both applications are called in-process, without a server or sockets, by
+CONCURRENCY clients at once: the WSGI application from a pool of as many
+threads, as a threaded WSGI server would, and the ASGI one from as many
+asyncio tasks on one event loop.
+
+Two methods are called: "subtract", which returns at once, and "wait", which
+waits a millisecond, as for a database query; with time.sleep for WSGI, and
+asyncio.sleep for ASGI, as each would be written.
+
+Run from the repository root:
+
+    poetry run python -m test.benchmarks.bench_http
+"""
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.asgi import ASGIApplication
+from jsonrpc11base.service_description import ServiceDescription
+from jsonrpc11base.wsgi import WSGIApplication
+
+CONCURRENCY = 64
+REQUESTS = 5000
+WAIT = 0.001
+
+BODIES = {
+    'subtract': b'{"version": "1.1", "id": 1, "method": "subtract", "params": [42, 23]}',
+    'wait': b'{"version": "1.1", "id": 1, "method": "wait", "params": [42, 23]}'
+}
+
+
+def subtract(params, options):
+    return params[0] - params[1]
+
+
+def make_wsgi_app() -> WSGIApplication:
+    service = JSONRPCService(ServiceDescription('Benchmark Service', 'bench'))
+
+    def wait(params, options):
+        time.sleep(WAIT)
+        return params[0] - params[1]
+
+    service.add(subtract)
+    service.add(wait)
+    return WSGIApplication(service)
+
+
+def make_asgi_app() -> ASGIApplication:
+    service = JSONRPCService(ServiceDescription('Benchmark Service', 'bench'),
+                             max_workers=CONCURRENCY)
+
+    async def wait(params, options):
+        await asyncio.sleep(WAIT)
+        return params[0] - params[1]
+
+    service.add(subtract)
+    service.add(wait)
+    return ASGIApplication(service)
+
+
+def bench_wsgi(method: str) -> float:
+    """Returns the requests per second."""
+    app = make_wsgi_app()
+    body = BODIES[method]
+    content_length = str(len(body))
+
+    def start_response(status, headers):
+        pass
+
+    def request(_):
+        environ = {'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': content_length,
+                   'wsgi.input': io.BytesIO(body)}
+        return b''.join(app(environ, start_response))
+
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        started = time.perf_counter()
+        for _ in executor.map(request, range(REQUESTS)):
+            pass
+        return REQUESTS / (time.perf_counter() - started)
+
+
+def bench_asgi(method: str) -> float:
+    """Returns the requests per second."""
+    app = make_asgi_app()
+    body = BODIES[method]
+    scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': []}
+
+    async def request():
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            pass
+
+        await app(scope, receive, send)
+
+    async def client(count):
+        for _ in range(count):
+            await request()
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(*[client(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)])
+        return REQUESTS // CONCURRENCY * CONCURRENCY / (time.perf_counter() - started)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        app.service.shutdown()
+
+
+def main():
+    print(f'{"method":<12}{"WSGI (req/s)":>16}{"ASGI (req/s)":>16}')
+    for method in BODIES:
+        print(f'{method:<12}{bench_wsgi(method):>16.0f}{bench_asgi(method):>16.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Per-call cost of schema validation, before and after validator compilation.
+
+"before" is the module-level jsonschema.validate(), which is what Schema.validate
+used to call on every request; "after" is Schema.validate with the validators
+precompiled by Schema.load.
+
+Run from the repository root:
+
+    poetry run python -m test.benchmarks.bench_schema
+"""
+import os
+import timeit
+
+from jsonschema import validate
+
+from jsonrpc11base.validation.schema import Schema
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '../data/schema/test')
+
+# A valid instance for each schema in the test schema directory.
+SAMPLES = {
+    'add.params': [1, 2, 3],
+    'add.result': 6,
+    'echo.params': {'x': 'hi'},
+    'echo.result': {'x': 1},
+    'hello.result': 'Hello world!',
+    'keyv.params': {'a': 1, 'b': False, 'c': 6.0},
+    'kwargs_subtract.params': {'a': 42, 'b': 23},
+    'notification.params': [1, 2, 3, 4, 5],
+    'posv.params': ['foo', 5, 6.0, True, False],
+    'square.params': [4],
+    'subtract.params': [42, 23],
+}
+
+NUMBER = 2000
+
+
+def per_call_us(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main():
+    schema = Schema(SCHEMA_DIR)
+    print(f'{"schema":<28}{"before (us)":>14}{"after (us)":>14}{"speedup":>10}')
+    for key, value in SAMPLES.items():
+        raw_schema = schema.get(key)['schema']
+
+        def before():
+            validate(instance=value, schema=raw_schema, resolver=schema.resolver)
+
+        def after():
+            schema.validate(key, value)
+
+        before_us = per_call_us(before)
+        after_us = per_call_us(after)
+        print(f'{key:<28}{before_us:>14.2f}{after_us:>14.2f}{before_us / after_us:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Start-up cost of loading a large schema directory
+
+A temporary directory is filled with the params and result schemas of METHODS
+methods, each referring to shared definitions in another file, as a large
+service's would be. The time to construct a Schema for it is printed, loading
+every schema at once ("eager") or indexing the files only ("lazy"), or from a
+bundle of the directory, along with the time to validate the params of one
+method for the first time, which is when a lazily loaded schema is loaded.
+
+Run from the repository root:
+
+    poetry run python -m test.benchmarks.bench_schema_load
+"""
+import json
+import os
+import tempfile
+import time
+
+from jsonrpc11base.validation.bundle import write_bundle
+from jsonrpc11base.validation.schema import Schema
+
+METHODS = 800
+
+REPEAT = 5
+
+DEFINITIONS = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'definitions': {
+        'id': {'type': 'integer', 'minimum': 1},
+        'record': {
+            'type': 'object',
+            'properties': {
+                'id': {'$ref': '#/definitions/id'},
+                'name': {'type': 'string', 'maxLength': 100},
+                'tags': {'type': 'array', 'items': {'type': 'string'}}
+            },
+            'required': ['id', 'name']
+        }
+    }
+}
+
+
+def method_schemas(index: int) -> dict:
+    return {
+        f'method_{index}.params': {
+            '$schema': 'http://json-schema.org/draft-07/schema#',
+            'type': 'array',
+            'items': [
+                {'$ref': 'definitions.json#/definitions/id'},
+                {'type': 'object', 'properties': {'limit': {'type': 'integer'},
+                                                  'query': {'type': 'string'}}}
+            ],
+            'minItems': 1,
+            'maxItems': 2
+        },
+        f'method_{index}.result': {
+            '$schema': 'http://json-schema.org/draft-07/schema#',
+            'type': 'array',
+            'items': {'$ref': 'definitions.json#/definitions/record'}
+        }
+    }
+
+
+def write_schemas(directory: str):
+    with open(os.path.join(directory, 'definitions.json'), 'w') as fd:
+        json.dump(DEFINITIONS, fd)
+    for index in range(METHODS):
+        for name, schema in method_schemas(index).items():
+            with open(os.path.join(directory, f'{name}.json'), 'w') as fd:
+                json.dump(schema, fd, indent=4)
+
+
+def measure(schema_dir: str, **kwargs) -> dict:
+    """Returns the best times, in milliseconds, of REPEAT runs."""
+    construct = first_call = float('inf')
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        schema = Schema(schema_dir, **kwargs)
+        constructed = time.perf_counter()
+        schema.validate('method_7.params', [1, {'limit': 10}])
+        called = time.perf_counter()
+        construct = min(construct, constructed - started)
+        first_call = min(first_call, called - constructed)
+    return {'construct': construct * 1000, 'first_call': first_call * 1000}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        schema_dir = os.path.join(directory, 'schemas')
+        os.mkdir(schema_dir)
+        write_schemas(schema_dir)
+        bundle_path = os.path.join(directory, 'schemas.bundle')
+        write_bundle(schema_dir, bundle_path)
+        print(f'{METHODS} methods, {METHODS * 2 + 1} schema files')
+        print(f'{"mode":<14}{"construct (ms)":>16}{"first call (ms)":>18}')
+        modes = [
+            ('eager', schema_dir, {}),
+            ('lazy', schema_dir, {'lazy': True}),
+            ('bundle', bundle_path, {}),
+            ('bundle lazy', bundle_path, {'lazy': True})
+        ]
+        for mode, schema_path, kwargs in modes:
+            result = measure(schema_path, **kwargs)
+            print(f'{mode:<14}{result["construct"]:>16.1f}{result["first_call"]:>18.2f}')
+
+
+if __name__ == '__main__':
+    main()
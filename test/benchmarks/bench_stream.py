@@ -0,0 +1,84 @@
+"""
+Peak memory and time to first byte of streamed responses
+
+A method returns RECORDS records, either as a list, serialized in one piece by
+call_bytes, or from a generator, encoded a chunk at a time by call_stream.
+The peak memory allocated while producing and consuming the response, as
+traced by tracemalloc, and the time until the first part of the response is
+ready, are printed for each.
+
+Run from the repository root:
+
+    poetry run python -m test.benchmarks.bench_stream
+"""
+import json
+import time
+import tracemalloc
+
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.service_description import ServiceDescription
+
+RECORDS = 300000
+
+CODECS = ['json', 'orjson']
+
+
+def make_record(index):
+    return {'id': index, 'name': f'record {index}', 'score': index / 7, 'tags': ['a', 'b']}
+
+
+def records_list(params, options):
+    return [make_record(index) for index in range(params[0])]
+
+
+def records(params, options):
+    return (make_record(index) for index in range(params[0]))
+
+
+def make_service(codec: str) -> JSONRPCService:
+    service = JSONRPCService(ServiceDescription('Benchmark Service', 'bench'), codec=codec)
+    service.add(records_list)
+    service.add(records)
+    return service
+
+
+def request(method: str) -> bytes:
+    return json.dumps({'version': '1.1', 'id': 1, 'method': method,
+                       'params': [RECORDS]}).encode('utf-8')
+
+
+def measure(respond) -> dict:
+    """
+    Returns the peak memory in MiB, the time to the first part and the total
+    time in seconds, and the response size; the parts are dropped as they
+    would be once written.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    parts = iter(respond())
+    size = len(next(parts))
+    first_part = time.perf_counter() - started
+    for part in parts:
+        size += len(part)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'peak_mib': peak / 2 ** 20, 'first_part': first_part, 'total': total, 'size': size}
+
+
+def main():
+    print(f'{"codec":<8}{"mode":<10}{"peak (MiB)":>12}{"first (s)":>12}{"total (s)":>12}')
+    for codec in CODECS:
+        service = make_service(codec)
+        modes = {
+            'whole': lambda: [service.call_bytes(request('records_list'))],
+            'stream': lambda: service.call_stream(request('records'))
+        }
+        for mode, respond in modes.items():
+            result = measure(respond)
+            print(f'{codec:<8}{mode:<10}{result["peak_mib"]:>12.1f}'
+                  f'{result["first_part"]:>12.3f}{result["total"]:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+The services the benchmarks call, with only the methods they call, whose
+schemas are those of the services the specs test
+"""
+from jsonrpc11base import JSONRPCService
+from test.services import SCHEMA_DIR, make_service_description
+
+
+def subtract(params, options):
+    return params[0] - params[1]
+
+
+def broken_func(options):
+    raise TypeError('whoops')
+
+
+def return_options_and_params(params, options):
+    return {
+        'options': options,
+        'params': params
+    }
+
+
+def add_methods(service: JSONRPCService) -> JSONRPCService:
+    service.add(subtract)
+    service.add(broken_func)
+    service.add(return_options_and_params)
+    return service
+
+
+def make_validating_service():
+    """
+    A service which validates params and results against the schemas in
+    data/schema/test.
+    """
+    return add_methods(JSONRPCService(
+        description=make_service_description(),
+        schema_dir=SCHEMA_DIR,
+        validate_params=True,
+        validate_result=True
+    ))
+
+
+def make_non_validating_service():
+    """
+    A service without schemas, so neither params nor results are validated.
+    """
+    return add_methods(JSONRPCService(description=make_service_description()))
@@ -0,0 +1,16 @@
+"""
+The service description and schemas shared by the specs and the benchmarks
+"""
+import os
+from jsonrpc11base.service_description import ServiceDescription
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), 'data/schema/test')
+
+
+def make_service_description():
+    return ServiceDescription(
+        'Test Service',
+        'https://github.com/kbase/kbase-jsonrpc11base/test',
+        summary='An test JSON-RPC 1.1 service',
+        version='1.0'
+    )
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.asgi import ASGIApplication
+from test.services import make_service_description
+
+
+def make_app(**kwargs):
+    service = JSONRPCService(make_service_description())
+
+    def subtract(params, options):
+        return params[0] - params[1]
+
+    async def async_subtract(params, options):
+        await asyncio.sleep(0)
+        return params[0] - params[1]
+
+    def whoami(options):
+        return options
+
+    service.add(subtract)
+    service.add(async_subtract)
+    service.add(whoami)
+    return ASGIApplication(service, **kwargs)
+
+
+def request(app, chunks, method='POST', headers=None):
+    """
+    Sends a request whose body is made of the given chunks; returns the
+    status, headers and body of the response.
+    """
+    scope = {'type': 'http', 'method': method, 'path': '/', 'headers': headers or []}
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': True}
+                for chunk in chunks[:-1]]
+    messages.append({'type': 'http.request', 'body': chunks[-1] if chunks else b''})
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        app.service.shutdown()
+
+    asyncio.run(run())
+    start, body = sent
+    assert start['type'] == 'http.response.start'
+    assert body['type'] == 'http.response.body'
+    return start['status'], dict(start['headers']), body['body']
+
+
+def test_asgi_call():
+    status, headers, body = request(
+        make_app(), [b'{"version": "1.1", "id": 1, "method": "subtract", "params": [42, 23]}'])
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert headers[b'content-length'] == str(len(body)).encode()
+    assert json.loads(body) == {'version': '1.1', 'id': 1, 'result': 19}
+
+
+def test_asgi_coroutine_handler():
+    body = b'{"version": "1.1", "id": 1, "method": "async_subtract", "params": [2, 1]}'
+    status, headers, response = request(make_app(), [body])
+    assert json.loads(response)['result'] == 1
+
+
+def test_asgi_chunked_body():
+    body = b'{"version": "1.1", "id": 1, "method": "subtract", "params": [2, 1]}'
+    chunks = [body[index:index + 5] for index in range(0, len(body), 5)] + [b'']
+    status, headers, response = request(make_app(), chunks)
+    assert json.loads(response)['result'] == 1
+
+
+def test_asgi_method_not_allowed():
+    status, headers, body = request(make_app(), [], method='GET')
+    assert status == 405
+    assert headers[b'allow'] == b'POST'
+
+
+def test_asgi_body_too_large():
+    app = make_app(max_body_size=10)
+    status, headers, body = request(app, [b'{"version": ', b'"1.1", "method": "whoami"}'])
+    assert status == 413
+
+
+def test_asgi_options():
+    def options(scope):
+        return dict(scope['headers'])[b'authorization'].decode('latin-1')
+
+    app = make_app(options=options)
+    status, headers, body = request(app, [b'{"version": "1.1", "method": "whoami"}'],
+                                    headers=[(b'authorization', b'token')])
+    assert json.loads(body)['result'] == 'token'
+
+
+def test_asgi_notification_batch():
+    sent = []
+    app = make_app()
+    messages = [{'type': 'http.request', 'body': b'[{"version": "1.1", "method": "whoami"}]'}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({'type': 'http', 'method': 'POST', 'headers': []}, receive, send))
+    assert sent[0]['status'] == 204
+    assert sent[1]['body'] == b''
+
+
+def test_asgi_disconnect():
+    sent = []
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(make_app()({'type': 'http', 'method': 'POST', 'headers': []}, receive, send))
+    assert sent == []
+
+
+def test_asgi_lifespan():
+    app = make_app()
+    app.service.submit_py({'version': '1.1', 'method': 'whoami'}).result()
+    assert app.service._executor is not None
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({'type': 'lifespan'}, receive, send))
+    assert [message['type'] for message in sent] == ['lifespan.startup.complete',
+                                                     'lifespan.shutdown.complete']
+    assert app.service._executor is None
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.errors import APIError, InvalidParamsError
+from test.services import make_service_description
+
+
+class MyError(APIError):
+    code = 123
+    message = 'My error'
+
+
+class ReservedCodeError(APIError):
+    code = -32000
+    message = 'Reserved!'
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = JSONRPCService(make_service_description())
+
+    async def async_echo(params, options):
+        await asyncio.sleep(params[0])
+        return params
+
+    async def async_hello(options):
+        return 'Hello world!'
+
+    def sync_thread(options):
+        return threading.get_ident()
+
+    async def raise_invalid_params(options):
+        raise InvalidParamsError(message='bad')
+
+    async def raise_my_error(options):
+        raise MyError()
+
+    async def raise_reserved_code(options):
+        raise ReservedCodeError()
+
+    async def broken_func(options):
+        raise TypeError('whoops')
+
+    service.add(async_echo)
+    service.add(async_hello)
+    service.add(sync_thread)
+    service.add(raise_invalid_params)
+    service.add(raise_my_error)
+    service.add(raise_reserved_code)
+    service.add(broken_func)
+    return service
+
+
+def test_call_async(service):
+    res = asyncio.run(service.call_async(
+        '{"version": "1.1", "method": "async_echo", "params": [0, "a"], "id": 1}'))
+    assert json.loads(res) == {'version': '1.1', 'result': [0, 'a'], 'id': 1}
+
+
+def test_call_py_async_no_params(service):
+    result = asyncio.run(service.call_py_async({'version': '1.1', 'method': 'async_hello'}))
+    assert result == {'version': '1.1', 'result': 'Hello world!'}
+
+
+def test_call_py_async_sync_handler_in_thread(service):
+    async def call():
+        result = await service.call_py_async({'version': '1.1', 'method': 'sync_thread'})
+        return result, threading.get_ident()
+    result, loop_thread = asyncio.run(call())
+    assert result['result'] != loop_thread
+
+
+def test_call_py_coroutine_handler(service):
+    """
+    The synchronous entry points can call coroutine handlers too.
+    """
+    result = service.call_py({'version': '1.1', 'method': 'async_hello'})
+    assert result == {'version': '1.1', 'result': 'Hello world!'}
+
+
+@pytest.mark.parametrize('method', [
+    'raise_invalid_params',
+    'raise_my_error',
+    'raise_reserved_code',
+    'foofoo'
+])
+def test_call_py_async_errors(service, method):
+    """
+    Errors are mapped exactly as by call_py.
+    """
+    req = {'version': '1.1', 'method': method, 'id': 1}
+    result = asyncio.run(service.call_py_async(req))
+    assert result == service.call_py(req)
+
+
+def test_call_py_async_exception(service):
+    result = asyncio.run(service.call_py_async(
+        {'version': '1.1', 'method': 'broken_func', 'id': 1}))
+    assert result['id'] == 1
+    assert result['error']['code'] == -32002
+    assert result['error']['error']['exception_message'] == 'whoops'
+    assert result['error']['error']['method'] == 'broken_func'
+
+
+def test_call_async_parse_error(service):
+    res = asyncio.run(service.call_async('x'))
+    assert json.loads(res)['error']['code'] == -32700
+
+
+def test_call_py_async_invalid_request(service):
+    result = asyncio.run(service.call_py_async(1))
+    assert result['error']['code'] == -32600
+
+
+def test_call_py_async_batch(service):
+    started = time.perf_counter()
+    result = asyncio.run(service.call_py_async([
+        {'version': '1.1', 'method': 'async_echo', 'params': [0.1, n], 'id': n}
+        for n in range(50)
+    ] + [{'version': '1.1', 'method': 'async_hello'}]))
+    elapsed = time.perf_counter() - started
+    assert [response['id'] for response in result] == list(range(50))
+    assert elapsed < 1
+
+
+def test_call_py_async_batch_empty(service):
+    result = asyncio.run(service.call_py_async([]))
+    assert result['error']['code'] == -32600
+
+
+def test_call_py_async_batch_all_notifications(service):
+    result = asyncio.run(service.call_py_async([{'version': '1.1', 'method': 'async_hello'}]))
+    assert result is None
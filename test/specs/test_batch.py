@@ -0,0 +1,114 @@
+import json
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from jsonrpc11base import JSONRPCService
+from test.services import make_service_description
+
+
+def make_service(batch_executor=None):
+    service = JSONRPCService(make_service_description(), batch_executor=batch_executor)
+
+    def sleep_echo(params, options):
+        time.sleep(params[0])
+        return params
+
+    def broken_func(options):
+        raise TypeError('whoops')
+
+    service.add(sleep_echo)
+    service.add(broken_func)
+    return service
+
+
+@pytest.fixture(scope='module', params=['sequential', 'executor'])
+def service(request):
+    if request.param == 'sequential':
+        yield make_service()
+    else:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            yield make_service(executor)
+
+
+def test_batch(service):
+    res = service.call('''[
+        {"version": "1.1", "method": "sleep_echo", "params": [0.02, "a"], "id": 1},
+        {"version": "1.1", "method": "sleep_echo", "params": [0, "b"], "id": 2},
+        {"version": "1.1", "method": "sleep_echo", "params": [0.01, "c"], "id": 3}
+    ]''')
+    result = json.loads(res)
+    assert [response['id'] for response in result] == [1, 2, 3]
+    assert [response['result'][1] for response in result] == ['a', 'b', 'c']
+
+
+def test_batch_call_bytes(service):
+    res = service.call_bytes(b'[{"version": "1.1", "method": "sleep_echo", '
+                             b'"params": [0, "a"], "id": 1}]')
+    assert json.loads(res) == [{'version': '1.1', 'result': [0, 'a'], 'id': 1}]
+
+
+def test_batch_errors(service):
+    result = service.call_py([
+        {"version": "1.1", "method": "broken_func", "id": 1},
+        {"version": "1.1", "method": "foofoo", "id": 2},
+        1,
+        [],
+        {"version": "1.1", "method": "sleep_echo", "params": [0], "id": 3}
+    ])
+    assert len(result) == 5
+    assert result[0]['error']['code'] == -32002
+    assert result[1]['error']['code'] == -32601
+    assert result[2]['error']['code'] == -32600
+    assert result[2]['error']['error']['message'] == "1 is not of type 'object'"
+    assert result[3]['error']['code'] == -32600
+    assert 'id' not in result[3]
+    assert result[4] == {'version': '1.1', 'result': [0], 'id': 3}
+
+
+def test_batch_malformed_requests(service):
+    res = service.call('[{"version": "1.1", "params": [], "id": 1}, '
+                       '{"version": "1.1", "method": "sleep_echo", "params": 0, "id": 2}, '
+                       '{"version": "1.1", "method": "sleep_echo", "params": [0], "id": 3}]')
+    result = json.loads(res)
+    assert [response['id'] for response in result] == [1, 2, 3]
+    assert result[0]['error']['code'] == -32600
+    assert result[0]['error']['error']['message'] == "'method' is a required property"
+    assert result[1]['error']['code'] == -32600
+    assert result[2]['result'] == [0]
+
+
+def test_batch_notifications(service):
+    result = service.call_py([
+        {"version": "1.1", "method": "sleep_echo", "params": [0]},
+        {"version": "1.1", "method": "broken_func"},
+        {"version": "1.1", "method": "sleep_echo", "params": [0], "id": 1},
+        "x"
+    ])
+    assert len(result) == 2
+    assert result[0]['id'] == 1
+    assert result[1]['error']['code'] == -32600
+
+
+def test_batch_all_notifications(service):
+    res = service.call('[{"version": "1.1", "method": "sleep_echo", "params": [0]}]')
+    assert res is None
+
+
+def test_batch_empty(service):
+    result = json.loads(service.call('[]'))
+    assert result['version'] == '1.1'
+    assert result['error']['code'] == -32600
+    assert result['error']['error']['message'] == 'A batch must contain at least one request'
+
+
+def test_batch_concurrent():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        service = make_service(executor)
+        started = time.perf_counter()
+        result = service.call_py([
+            {"version": "1.1", "method": "sleep_echo", "params": [0.1], "id": n}
+            for n in range(4)
+        ])
+        elapsed = time.perf_counter() - started
+    assert [response['id'] for response in result] == [0, 1, 2, 3]
+    assert elapsed < 0.3
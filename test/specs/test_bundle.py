@@ -0,0 +1,92 @@
+import json
+import os
+import pytest
+from jsonrpc11base.exceptions import InvalidSchemaError
+from jsonrpc11base.validation.bundle import main, write_bundle
+from jsonrpc11base.validation.schema import Schema, SchemaError
+from test.services import SCHEMA_DIR
+
+
+def no_fetching(url):
+    raise AssertionError(f'Fetched {url}')
+
+
+def validation_error(schema, name, value):
+    with pytest.raises(SchemaError) as se:
+        schema.validate(name, value)
+    return se.value.message, se.value.path, se.value.value
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_bundle(tmp_path, lazy):
+    bundle_path = str(tmp_path / 'schemas.bundle')
+    bundle = write_bundle(SCHEMA_DIR, bundle_path)
+    assert list(bundle['documents']) == ['base.json']
+
+    from_dir = Schema(SCHEMA_DIR)
+    schema = Schema(bundle_path, lazy=lazy)
+    assert schema.paths.keys() == from_dir.paths.keys()
+    # The documents referred to are in the bundle.
+    schema.resolver.resolve_remote = no_fetching
+    schema.validate('posv.params', ['x', 1, 3.0, True, False])
+    schema.validate('keyv.params', {'a': 1, 'c': 2.0})
+    assert (validation_error(schema, 'posv.params', ['x', 1, 3.0, True, 'x'])
+            == validation_error(from_dir, 'posv.params', ['x', 1, 3.0, True, 'x']))
+    assert schema.warm() == len(from_dir.paths)
+
+
+def test_bundle_absent(tmp_path):
+    bundle_path = str(tmp_path / 'schemas.bundle')
+    write_bundle('test/data/schema', bundle_path)
+    schema = Schema(bundle_path)
+    assert schema.validate_absent('absent') is True
+    assert schema.validate_absent('foo') is False
+
+
+def test_bundle_nested_references(tmp_path):
+    schema_dir = tmp_path / 'schemas'
+    (schema_dir / 'defs').mkdir(parents=True)
+    (schema_dir / 'get.params.json').write_text(json.dumps(
+        {'type': 'array', 'items': {'$ref': 'defs/item.json'}}))
+    # Relative to the document it is in
+    (schema_dir / 'defs' / 'item.json').write_text(json.dumps(
+        {'$ref': 'id.json#/definitions/id'}))
+    (schema_dir / 'defs' / 'id.json').write_text(json.dumps(
+        {'definitions': {'id': {'type': 'integer'}}}))
+    bundle_path = str(tmp_path / 'schemas.bundle')
+    bundle = write_bundle(str(schema_dir), bundle_path)
+    assert sorted(bundle['documents']) == ['defs/id.json', 'defs/item.json']
+
+    schema = Schema(bundle_path)
+    schema.resolver.resolve_remote = no_fetching
+    schema.validate('get.params', [1, 2])
+    with pytest.raises(SchemaError):
+        schema.validate('get.params', [1, 'x'])
+
+
+def test_bundle_invalid(tmp_path):
+    bundle_path = tmp_path / 'schemas.bundle'
+    with pytest.raises(InvalidSchemaError) as ise:
+        write_bundle('test/data/schema/invalid', str(bundle_path))
+    assert 'bad.params.json' in str(ise.value)
+    assert os.listdir(tmp_path) == []
+
+    (tmp_path / 'get.params.json').write_text(json.dumps({'$ref': 'missing.json#/x'}))
+    with pytest.raises(InvalidSchemaError) as ise:
+        write_bundle(str(tmp_path), str(bundle_path))
+    assert 'Unresolvable reference "missing.json#/x"' in str(ise.value)
+
+
+def test_not_a_bundle(tmp_path):
+    path = tmp_path / 'schemas.bundle'
+    path.write_text('{}')
+    with pytest.raises(InvalidSchemaError) as ise:
+        Schema(str(path))
+    assert 'Not a schema bundle' in str(ise.value)
+
+
+def test_bundle_main(tmp_path, capsys):
+    bundle_path = str(tmp_path / 'schemas.bundle')
+    main([SCHEMA_DIR, bundle_path])
+    assert 'referenced documents' in capsys.readouterr().out
+    assert Schema(bundle_path).get('echo.params') is not None
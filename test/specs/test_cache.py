@@ -0,0 +1,292 @@
+"""
+Method result caching tests
+"""
+import asyncio
+import json
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.cache import CachePolicy, ResultCache
+from jsonrpc11base.codec import JSONCodec
+from jsonrpc11base.main import make_result_response
+from jsonrpc11base.errors import APIError
+from jsonrpc11base.service_description import ServiceDescription
+from test.services import make_service_description
+
+
+class NotFound(APIError):
+    code = 100
+    message = 'Not found'
+
+
+@pytest.fixture
+def service():
+    service = JSONRPCService(
+        description=make_service_description()
+    )
+    service.calls = []
+
+    def square(params, options):
+        service.calls.append(params)
+        return params[0] * params[0]
+
+    def whoami(params, options):
+        service.calls.append(params)
+        return options['user']
+
+    def lookup(params, options):
+        service.calls.append(params)
+        raise NotFound()
+
+    def hello(options):
+        service.calls.append(None)
+        return 'Hello world!'
+
+    service.add(square, cache=CachePolicy(max_entries=2))
+    service.add(whoami, cache=CachePolicy(key=lambda params, options: options['user']))
+    service.add(lookup, cache=CachePolicy())
+    service.add(hello, cache=CachePolicy(ttl=60))
+    service.add(square, name='uncached_square')
+    return service
+
+
+def call(service, method, params=None, options=None):
+    req = {'version': '1.1', 'id': 1, 'method': method}
+    if params is not None:
+        req['params'] = params
+    return service.call_py(req, options)
+
+
+def test_repeated_call_is_cached(service):
+    assert call(service, 'square', [3])['result'] == 9
+    assert call(service, 'square', [3])['result'] == 9
+    assert service.calls == [[3]]
+    stats = service.method_registry['square'].stats()
+    assert stats['cache'] == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+    # Only actual calls of the method are counted as calls.
+    assert stats['calls'] == 1
+
+
+def test_different_params_are_cached_separately(service):
+    assert call(service, 'square', [3])['result'] == 9
+    assert call(service, 'square', [4])['result'] == 16
+    assert service.calls == [[3], [4]]
+
+
+def test_cached_response_has_its_own_id(service):
+    service.call_py({'version': '1.1', 'id': 'a', 'method': 'square', 'params': [3]})
+    res = service.call_py({'version': '1.1', 'id': 'b', 'method': 'square', 'params': [3]})
+    assert res == {'version': '1.1', 'id': 'b', 'result': 9}
+
+
+def test_lru_eviction(service):
+    call(service, 'square', [1])
+    call(service, 'square', [2])
+    # Makes [1] the most recently used
+    call(service, 'square', [1])
+    call(service, 'square', [3])
+    call(service, 'square', [1])
+    call(service, 'square', [2])
+    assert service.calls == [[1], [2], [3], [2]]
+    assert service.method_registry['square'].cache.evictions == 2
+
+
+def test_ttl_expiry(service, monkeypatch):
+    import jsonrpc11base.cache as cache_module
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    call(service, 'hello')
+    now[0] += 59
+    call(service, 'hello')
+    assert service.calls == [None]
+    now[0] += 2
+    assert call(service, 'hello')['result'] == 'Hello world!'
+    assert service.calls == [None, None]
+
+
+def test_custom_key_function(service):
+    assert call(service, 'whoami', [], {'user': 'alice'})['result'] == 'alice'
+    assert call(service, 'whoami', [], {'user': 'bob'})['result'] == 'bob'
+    assert call(service, 'whoami', [], {'user': 'alice'})['result'] == 'alice'
+    assert len(service.calls) == 2
+
+
+def test_errors_are_not_cached(service):
+    assert call(service, 'lookup', [1])['error']['code'] == 100
+    assert call(service, 'lookup', [1])['error']['code'] == 100
+    assert service.calls == [[1], [1]]
+
+
+def test_invalid_params_are_not_cached():
+    service = JSONRPCService(
+        description=make_service_description(),
+        schema_dir='test/data/schema/test',
+        validate_params=True,
+        validate_result=True
+    )
+    calls = []
+
+    def square(params, options):
+        calls.append(params)
+        return params[0] * params[0]
+
+    service.add(square, cache=CachePolicy())
+    assert call(service, 'square', ['x'])['error']['code'] == -32602
+    assert call(service, 'square', [2])['result'] == 4
+    assert call(service, 'square', [2])['result'] == 4
+    assert calls == [[2]]
+    assert service.method_registry['square'].cache.stats()['misses'] == 1
+
+
+def test_invalidate(service):
+    call(service, 'square', [3])
+    call(service, 'square', [4])
+    assert service.invalidate('square', [3]) is True
+    assert service.invalidate('square', [3]) is False
+    call(service, 'square', [3])
+    call(service, 'square', [4])
+    assert service.calls == [[3], [4], [3]]
+
+
+def test_clear_cache(service):
+    call(service, 'square', [3])
+    call(service, 'hello')
+    service.clear_cache('square')
+    call(service, 'square', [3])
+    call(service, 'hello')
+    assert service.calls == [[3], None, [3]]
+    service.clear_cache()
+    call(service, 'square', [3])
+    call(service, 'hello')
+    assert service.calls == [[3], None, [3], [3], None]
+
+
+def test_invalidate_errors(service):
+    with pytest.raises(KeyError):
+        service.invalidate('nonexistent', [1])
+    with pytest.raises(KeyError):
+        service.clear_cache('uncached_square')
+
+
+def test_cached_async(service):
+    async def run():
+        first = await service.call_py_async(
+            {'version': '1.1', 'id': 1, 'method': 'square', 'params': [5]})
+        second = await service.call_py_async(
+            {'version': '1.1', 'id': 2, 'method': 'square', 'params': [5]})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first['result'] == second['result'] == 25
+    assert second['id'] == 2
+    assert service.calls == [[5]]
+    service.shutdown()
+
+
+def test_system_stats_include_cache(service):
+    call(service, 'square', [3])
+    res = call(service, 'system.stats')
+    assert res['result']['methods']['square']['cache']['misses'] == 1
+    assert 'cache' not in res['result']['methods']['uncached_square']
+
+
+def test_policy_errors():
+    with pytest.raises(ValueError):
+        CachePolicy(max_entries=0)
+    with pytest.raises(ValueError):
+        CachePolicy(ttl=0)
+
+
+def test_default_key_is_canonical():
+    cache = ResultCache(CachePolicy())
+    assert (cache.make_key({'a': 1, 'b': 2}, None)
+            == cache.make_key({'b': 2, 'a': 1}, {'user': 'alice'}))
+
+
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        self.dumped = []
+
+    def dumps(self, data):
+        self.dumped.append(data)
+        return super().dumps(data)
+
+    def dumps_bytes(self, data):
+        self.dumped.append(data)
+        return super().dumps_bytes(data)
+
+
+def make_counting_service():
+    service = JSONRPCService(
+        description=make_service_description(),
+        codec=CountingCodec()
+    )
+
+    def big(params, options):
+        return {'values': list(range(params[0]))}
+
+    service.add(big, cache=CachePolicy())
+    return service
+
+
+def test_cached_result_is_serialized_once():
+    service = make_counting_service()
+    result = {'values': list(range(100))}
+    for request_id in [1, 'b', None]:
+        req = {'version': '1.1', 'method': 'big', 'params': [100]}
+        if request_id is not None:
+            req['id'] = request_id
+        expected = json.dumps(make_result_response(result, request_id))
+        assert service.call(json.dumps(req)) == expected
+    # Only the result itself and the ids are serialized.
+    assert service.codec.dumped == [result, 1, 'b']
+
+
+def test_cached_result_is_serialized_once_as_bytes():
+    service = make_counting_service()
+    result = {'values': list(range(100))}
+    for request_id in [1, 2]:
+        req = {'version': '1.1', 'id': request_id, 'method': 'big', 'params': [100]}
+        expected = json.dumps(make_result_response(result, request_id)).encode('utf-8')
+        assert service.call_bytes(json.dumps(req).encode('utf-8')) == expected
+    assert service.codec.dumped == [result, 1, 2]
+
+
+def test_cached_result_is_serialized_once_async():
+    service = make_counting_service()
+    result = {'values': list(range(10))}
+
+    async def run():
+        responses = []
+        for request_id in [1, 2]:
+            req = {'version': '1.1', 'id': request_id, 'method': 'big', 'params': [10]}
+            responses.append(await service.call_async(json.dumps(req)))
+        return responses
+
+    assert asyncio.run(run()) == [json.dumps(make_result_response(result, request_id))
+                                  for request_id in [1, 2]]
+    assert service.codec.dumped == [result, 1, 2]
+    service.shutdown()
+
+
+def test_system_describe_is_cached(service):
+    describe = service.system_method_registry['system.describe']
+    first = call(service, 'system.describe')
+    second = call(service, 'system.describe')
+    assert first == second
+    assert first['result']['name'] == 'Test Service'
+    assert describe.stats()['calls'] == 1
+    assert describe.cache.stats()['hits'] == 1
+
+
+def test_system_describe_cache_follows_description(service):
+    assert call(service, 'system.describe')['result']['version'] == '1.0'
+    service.description.version = '1.1'
+    assert call(service, 'system.describe')['result']['version'] == '1.1'
+    service.description = ServiceDescription('Other Service', 'https://example.com')
+    body = b'{"version": "1.1", "id": 2, "method": "system.describe"}'
+    res = json.loads(service.call_bytes(body))
+    assert res['result'] == {'sdversion': '1.0', 'name': 'Other Service',
+                             'id': 'https://example.com'}
+    assert res['id'] == 2
+    # The previous description's result is evicted.
+    assert len(service.system_method_registry['system.describe'].cache) == 1
@@ -0,0 +1,101 @@
+import json
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.codec import JSONCodec, CODECS, get_codec
+from test.services import make_service_description
+
+
+def available_codecs():
+    names = []
+    for name in CODECS:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def make_service(codec):
+    service = JSONRPCService(make_service_description(), codec=codec)
+
+    def echo(params, options):
+        return params
+
+    service.add(echo)
+    return service
+
+
+def test_get_codec_default():
+    codec = get_codec()
+    assert type(codec) is JSONCodec
+    assert codec.name == 'json'
+
+
+def test_get_codec_instance():
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+
+
+def test_get_codec_auto():
+    assert get_codec('auto').name in available_codecs()
+
+
+def test_get_codec_unknown():
+    with pytest.raises(ValueError) as ve:
+        get_codec('foo')
+    assert str(ve.value) == 'Unknown JSON codec "foo"'
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+def test_codec_round_trip(codec):
+    service = make_service(codec)
+    req = '{"version": "1.1", "method": "echo", "params": ["hé", 1, 2.5, null], "id": 1}'
+    result = json.loads(service.call(req))
+    assert result == {'version': '1.1', 'result': ['hé', 1, 2.5, None], 'id': 1}
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+def test_codec_call_bytes(codec):
+    service = make_service(codec)
+    req = '{"version": "1.1", "method": "echo", "params": ["hé"], "id": 1}'
+    res = service.call_bytes(req.encode('utf-8'))
+    assert isinstance(res, bytes)
+    assert json.loads(res) == {'version': '1.1', 'result': ['hé'], 'id': 1}
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+@pytest.mark.parametrize('body', [
+    'x',
+    '{"method": "echo", "params": "bar", "baz", "id": 1}',
+    '{"version": "1.1"',
+    ''
+])
+def test_codec_parse_error(codec, body):
+    """
+    Parse error responses are the same whichever codec is used.
+    """
+    expected = make_service('json').call(body)
+    service = make_service(codec)
+    assert json.loads(service.call(body)) == json.loads(expected)
+    assert json.loads(service.call_bytes(body.encode('utf-8'))) == json.loads(expected)
+    assert json.loads(expected)['error']['code'] == -32700
+
+
+def test_call_bytes_invalid_utf8():
+    service = make_service('json')
+    result = json.loads(service.call_bytes(b'"\xff"'))
+    assert result['error']['code'] == -32700
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+@pytest.mark.parametrize('request_id', [None, 1, 'abc', 'hé "/', [1, {'a': None}]])
+def test_dumps_result_response(codec, request_id):
+    codec = get_codec(codec)
+    result = {'x': ['hé', 1, 2.5, None, '</script>']}
+    response = {'version': '1.1', 'result': result}
+    if request_id is not None:
+        response['id'] = request_id
+    assert codec.dumps_result_response(codec.dumps(result), request_id) == codec.dumps(response)
+    assert (codec.dumps_result_response_bytes(codec.dumps_bytes(result), request_id)
+            == codec.dumps_bytes(response))
@@ -0,0 +1,289 @@
+import asyncio
+import threading
+import time
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.concurrency import ConcurrencyLimiter
+from jsonrpc11base.errors import ConcurrencyLimitServerError
+from test.services import make_service_description
+
+
+def test_limiter_invalid_args():
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(0)
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(1, -1)
+
+
+def test_limiter_reject():
+    limiter = ConcurrencyLimiter(2)
+    limiter.acquire()
+    limiter.acquire()
+    assert limiter.in_flight == 2
+    with pytest.raises(ConcurrencyLimitServerError) as clse:
+        limiter.acquire()
+    error = clse.value.to_json()
+    assert error['code'] == -32003
+    assert error['message'] == 'Concurrency limit exceeded'
+    assert error['error']['max_concurrency'] == 2
+    assert error['error']['max_queue'] == 0
+    assert limiter.rejected_count == 1
+    limiter.release()
+    limiter.acquire()
+    limiter.release()
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_limiter_queue():
+    limiter = ConcurrencyLimiter(1, max_queue=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    while limiter.queued == 0:
+        time.sleep(0.001)
+    with pytest.raises(ConcurrencyLimitServerError):
+        limiter.acquire()
+    assert not acquired.is_set()
+    limiter.release()
+    thread.join()
+    assert acquired.is_set()
+    assert limiter.in_flight == 1
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_limiter_async_cancel():
+    limiter = ConcurrencyLimiter(1, max_queue=1)
+
+    async def run():
+        await limiter.acquire_async()
+        task = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.queued == 0
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+
+
+def test_service_max_concurrency():
+    service = JSONRPCService(make_service_description(), max_workers=4)
+    release = threading.Event()
+
+    def slow(options):
+        release.wait()
+        return 'slow'
+
+    def fast(options):
+        return 'fast'
+
+    service.add(slow, max_concurrency=1, max_queue=1)
+    service.add(fast)
+    limiter = service.method_registry['slow'].limiter
+
+    try:
+        first = service.submit_py({'version': '1.1', 'method': 'slow', 'id': 1})
+        second = service.submit_py({'version': '1.1', 'method': 'slow', 'id': 2})
+        while limiter.queued == 0:
+            time.sleep(0.001)
+
+        # The queue is full, so the third call fails at once ...
+        third = service.call_py({'version': '1.1', 'method': 'slow', 'id': 3})
+        assert third['id'] == 3
+        assert third['error']['code'] == -32003
+        assert third['error']['error']['method'] == 'slow'
+
+        # ... while other methods are unaffected.
+        assert service.call_py({'version': '1.1', 'method': 'fast'})['result'] == 'fast'
+
+        release.set()
+        assert first.result()['result'] == 'slow'
+        assert second.result()['result'] == 'slow'
+        assert limiter.in_flight == 0
+    finally:
+        release.set()
+        service.shutdown()
+
+
+def test_service_submit():
+    service = JSONRPCService(make_service_description(), max_workers=1)
+
+    def hello(options):
+        return threading.current_thread().name
+
+    service.add(hello)
+    future = service.submit('{"version": "1.1", "method": "hello"}')
+    assert 'jsonrpc11base' in future.result()
+    service.shutdown()
+    assert service._executor is None
+
+
+def test_service_max_concurrency_async():
+    service = JSONRPCService(make_service_description())
+
+    async def slow(options):
+        await asyncio.sleep(0.05)
+        return 'slow'
+
+    service.add(slow, max_concurrency=2)
+    result = asyncio.run(service.call_py_async([
+        {'version': '1.1', 'method': 'slow', 'id': n} for n in range(3)
+    ]))
+    assert [response.get('result') for response in result] == ['slow', 'slow', None]
+    assert result[2]['error']['code'] == -32003
+
+
+def make_single_flight_service():
+    service = JSONRPCService(make_service_description())
+    service.calls = []
+    service.release = threading.Event()
+
+    def slow_square(params, options):
+        service.calls.append(params)
+        service.release.wait(5)
+        if params[0] < 0:
+            raise ValueError('negative')
+        return params[0] * params[0]
+
+    async def async_square(params, options):
+        service.calls.append(params)
+        while not service.release.is_set():
+            await asyncio.sleep(0.001)
+        return params[0] * params[0]
+
+    service.add(slow_square, single_flight=True)
+    service.add(async_square, single_flight=True)
+    return service
+
+
+def test_single_flight_shares_execution():
+    service = make_single_flight_service()
+    method = service.method_registry['slow_square']
+    futures = [service.submit_py({'version': '1.1', 'id': n, 'method': 'slow_square',
+                                  'params': [3]})
+               for n in range(4)]
+    while method.single_flight.shared_count < 3:
+        time.sleep(0.001)
+    service.release.set()
+    responses = [future.result() for future in futures]
+    assert responses == [{'version': '1.1', 'id': n, 'result': 9} for n in range(4)]
+    assert service.calls == [[3]]
+    assert method.stats()['shared'] == 3
+    assert method.call_count == 1
+    # Once done, the next call runs again.
+    service.call_py({'version': '1.1', 'id': 5, 'method': 'slow_square', 'params': [3]})
+    assert service.calls == [[3], [3]]
+    service.shutdown()
+
+
+def test_single_flight_distinct_params():
+    service = make_single_flight_service()
+    service.release.set()
+    futures = [service.submit_py({'version': '1.1', 'id': n, 'method': 'slow_square',
+                                  'params': [n]})
+               for n in range(3)]
+    assert [future.result()['result'] for future in futures] == [0, 1, 4]
+    assert sorted(service.calls) == [[0], [1], [2]]
+    service.shutdown()
+
+
+def test_single_flight_shares_errors():
+    service = make_single_flight_service()
+    method = service.method_registry['slow_square']
+    futures = [service.submit_py({'version': '1.1', 'id': n, 'method': 'slow_square',
+                                  'params': [-1]})
+               for n in range(2)]
+    while method.single_flight.shared_count < 1:
+        time.sleep(0.001)
+    service.release.set()
+    responses = [future.result() for future in futures]
+    assert [response['id'] for response in responses] == [0, 1]
+    for response in responses:
+        assert response['error']['code'] == -32002
+        assert response['error']['error']['exception_message'] == 'negative'
+    assert service.calls == [[-1]]
+    assert method.single_flight.flights == {}
+    service.shutdown()
+
+
+def test_single_flight_async():
+    service = make_single_flight_service()
+    method = service.method_registry['async_square']
+
+    async def run():
+        tasks = [asyncio.ensure_future(service.call_py_async(
+            {'version': '1.1', 'id': n, 'method': 'async_square', 'params': [4]}))
+            for n in range(3)]
+        while method.single_flight.shared_count < 2:
+            await asyncio.sleep(0.001)
+        service.release.set()
+        return await asyncio.gather(*tasks)
+
+    responses = asyncio.run(run())
+    assert responses == [{'version': '1.1', 'id': n, 'result': 16} for n in range(3)]
+    assert service.calls == [[4]]
+    service.shutdown()
+
+
+def call_async_square(service, id):
+    return asyncio.ensure_future(service.call_py_async(
+        {'version': '1.1', 'id': id, 'method': 'async_square', 'params': [4]}))
+
+
+def test_single_flight_async_follower_cancel():
+    service = make_single_flight_service()
+    method = service.method_registry['async_square']
+
+    async def run():
+        tasks = [call_async_square(service, n) for n in range(3)]
+        while method.single_flight.shared_count < 2:
+            await asyncio.sleep(0.001)
+        tasks[1].cancel()
+        await asyncio.sleep(0.01)
+        service.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await tasks[1]
+        return [await tasks[0], await tasks[2]]
+
+    responses = asyncio.run(run())
+    # Only the cancelled caller's call is cancelled.
+    assert responses == [{'version': '1.1', 'id': n, 'result': 16} for n in [0, 2]]
+    assert service.calls == [[4]]
+    assert method.single_flight.flights == {}
+    service.shutdown()
+
+
+def test_single_flight_async_leader_cancel():
+    service = make_single_flight_service()
+    method = service.method_registry['async_square']
+
+    async def run():
+        tasks = [call_async_square(service, n) for n in range(3)]
+        while method.single_flight.shared_count < 2:
+            await asyncio.sleep(0.001)
+        tasks[0].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tasks[0]
+        # A waiter runs the call afresh, and the other waits for it.
+        while len(service.calls) < 2 or method.single_flight.shared_count < 2:
+            await asyncio.sleep(0.001)
+        service.release.set()
+        return [await tasks[1], await tasks[2]]
+
+    responses = asyncio.run(run())
+    assert responses == [{'version': '1.1', 'id': n, 'result': 16} for n in [1, 2]]
+    assert service.calls == [[4], [4]]
+    assert method.single_flight.shared_count == 2
+    assert method.single_flight.flights == {}
+    service.shutdown()
@@ -0,0 +1,107 @@
+import os
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.validation.envelope import validate_request
+from jsonrpc11base.validation.schema import Schema, SchemaError
+from test.services import make_service_description
+
+JSONRPC_SCHEMA_DIR = os.path.join(os.path.dirname(__file__),
+                                  '../../jsonrpc11base/jsonrpc_schema')
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '../data/schema/test')
+
+REQUESTS = [
+    None,
+    'x',
+    1,
+    [],
+    [{'version': '1.1', 'method': 'a'}],
+    {},
+    {'version': '1.1'},
+    {'method': 'a'},
+    {'version': '1.0', 'method': 'a'},
+    {'version': 1.1, 'method': 'a'},
+    {'version': True, 'method': 'a'},
+    {'version': '1.1', 'method': 1},
+    {'version': '1.1', 'method': None},
+    {'version': '1.1', 'method': ''},
+    {'version': '1.1', 'method': 1, 'params': 3},
+    {'version': '1.0', 'method': 1, 'params': 3},
+    {'version': '1.1', 'method': 'a', 'params': 'hi'},
+    {'version': '1.1', 'method': 'a', 'params': None},
+    {'version': '1.1', 'method': 'a', 'params': 'hi', 'x': 1},
+    {'version': '1.1', 'method': 'a', 'x': 1, 'y': 2},
+    {'x': 1},
+    {'version': '1.1', 'method': 'a', 'id': (1,)},
+    {'version': '1.1', 'method': 'a', 'id': {1}},
+    {'version': '1.1', 'method': 'a', 'params': 3, 'id': set()},
+    {'version': '1.1', 'method': 'a'},
+    {'version': '1.1', 'method': 'a', 'params': []},
+    {'version': '1.1', 'method': 'a', 'params': {}},
+    {'version': '1.1', 'method': 'a', 'id': None},
+    {'version': '1.1', 'method': 'a', 'id': 1.5},
+    {'version': '1.1', 'method': 'a', 'id': True},
+    {'version': '1.1', 'method': 'a', 'id': 'x'},
+    {'version': '1.1', 'method': 'a', 'id': [1]},
+    {'version': '1.1', 'method': 'a', 'id': {'x': 1}},
+]
+
+
+def schema_error(validate, request):
+    try:
+        validate(request)
+    except SchemaError as ex:
+        return (ex.message, ex.path, ex.value)
+    return None
+
+
+@pytest.mark.parametrize('request_data', REQUESTS)
+def test_validate_request_matches_schema(request_data):
+    """
+    The hand-written envelope checks must agree exactly with the jsonschema.
+    """
+    schema = Schema(JSONRPC_SCHEMA_DIR)
+    expected = schema_error(lambda value: schema.validate('request', value), request_data)
+    assert schema_error(validate_request, request_data) == expected
+
+
+def test_validate_request_ok():
+    validate_request({'version': '1.1', 'method': 'a', 'params': [1], 'id': 1})
+    assert True is True
+
+
+def test_validate_request_error():
+    with pytest.raises(SchemaError) as se:
+        validate_request({'version': '1.1', 'method': ''})
+    assert se.value.message == "'' is too short"
+    assert se.value.path == 'properties.method.minLength'
+    assert se.value.value == 1
+
+
+@pytest.mark.parametrize('strict', [False, True])
+def test_service_request_validation(strict):
+    service = JSONRPCService(
+        make_service_description(),
+        schema_dir=SCHEMA_DIR,
+        validate_params=True,
+        strict_request_validation=strict
+    )
+    assert service.strict_request_validation is strict
+    result = service.call_py({'version': '1.1', 'method': 'hello', 'params': 'hi', 'id': 1})
+    assert result['id'] == 1
+    assert result['error']['code'] == -32600
+    assert result['error']['error'] == {
+        'message': "'hi' is not of type 'object'",
+        'path': 'properties.params.anyOf.0.type',
+        'value': 'object'
+    }
+
+
+def test_strict_request_validation_without_params_validation():
+    service = JSONRPCService(make_service_description(), strict_request_validation=True)
+    service.add(lambda params, options: params, name='echo')
+    result = service.call_py({'method': 'echo', 'params': [1], 'id': 1})
+    assert result['error']['code'] == -32600
+    assert result['error']['error']['message'] == "'version' is a required property"
+    result = service.call_py({'version': '1.1', 'method': 'echo', 'params': [1], 'id': 1})
+    assert result['result'] == [1]
@@ -6,6 +6,7 @@ from jsonrpc11base import JSONRPCService
 from jsonrpc11base.errors import APIError
 from jsonrpc11base.service_description import ServiceDescription
 from jsonrpc11base.exceptions import DuplicateMethodName
+from jsonrpc11base.validation.bundle import write_bundle
 import pytest
 import os
 
@@ -15,9 +16,13 @@ class InvalidServerCode(APIError):
     message = 'Invalid code!'
 
 
-@pytest.fixture(scope='module')
-def service():
+@pytest.fixture(scope='module', params=['eager', 'lazy', 'bundle'])
+def service(request, tmp_path_factory):
     schema_dir = os.path.join(os.path.dirname(__file__), '../data/schema/test')
+    if request.param == 'bundle':
+        bundle_path = str(tmp_path_factory.mktemp('bundle') / 'schemas.bundle')
+        write_bundle(schema_dir, bundle_path)
+        schema_dir = bundle_path
 
     service_description = ServiceDescription(
         'Test Service',
@@ -31,7 +36,8 @@ def service():
         description=service_description,
         schema_dir=schema_dir,
         validate_params=True,
-        validate_result=True
+        validate_result=True,
+        lazy_schemas=request.param == 'lazy'
     )
 
     # Add testing methods go the service.
@@ -213,6 +213,33 @@ def test_error_without_error_data(service):
     assert res['error']['message'] == 'My error'
     assert res['error']['code'] == 123
 
+
+@pytest.mark.parametrize('request_data', [
+    {'method': 'subtract', 'params': [42, 23], 'id': 1},
+    {'version': '1.1', 'method': 'subtract', 'params': [42, 23], 'id': 1, 'context': {}},
+    {'version': '2.0', 'method': 'subtract', 'params': [42, 23], 'id': 1}
+])
+def test_lenient_envelope(service, request_data):
+    """
+    Without validation, only what dispatching a request relies on is
+    checked; the rest of the envelope is accepted as is.
+    """
+    res = service.call_py(request_data)
+    assert res['result'] == 19
+    assert res['id'] == 1
+
+
+@pytest.mark.parametrize('request_data, message', [
+    ({'version': '1.1', 'params': [1], 'id': 1}, "'method' is a required property"),
+    ({'version': '1.1', 'method': '', 'id': 1}, "'' is too short"),
+    ({'version': '1.1', 'method': 'subtract', 'params': 1, 'id': 1}, "1 is not of type 'object'")
+])
+def test_undispatchable_request(service, request_data, message):
+    res = service.call_py(request_data)
+    assert res['error']['code'] == -32600
+    assert res['error']['error']['message'] == message
+    assert res['id'] == 1
+
 #
 # def test_no_validation(service):
 #     """
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import random
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.limits import LimitExceededError, LimitScanner, RequestLimits, check_body
+from test.services import make_service_description
+
+
+TEXTS = [
+    b'[]',
+    b'{"a": [1, 2, {"b": "[{\\"x\\\\"}]"}], "c": "\\\\"}',
+    '{"key": ["café ☃", [[["deep"]]], "{[", "\\u005b"]}'.encode('utf-8'),
+    b'[[[[[[[[1]]]]]]]]',
+    b'"\\"\\"\\""',
+]
+
+
+def measure(text):
+    """The depth and longest string of a JSON text, byte by byte."""
+    depth = max_depth = length = max_length = 0
+    in_string = escaped = False
+    for byte in text:
+        if in_string:
+            if escaped:
+                escaped = False
+                length += 1
+            elif byte == ord('\\'):
+                escaped = True
+                length += 1
+            elif byte == ord('"'):
+                in_string = False
+                max_length = max(max_length, length)
+            else:
+                length += 1
+        elif byte == ord('"'):
+            in_string = True
+            length = 0
+        elif byte in b'[{':
+            depth += 1
+            max_depth = max(max_depth, depth)
+        elif byte in b']}':
+            depth -= 1
+    return max_depth, max_length
+
+
+def scan(text, chunk_size, limits):
+    scanner = LimitScanner(limits)
+    for index in range(0, len(text), chunk_size):
+        scanner.feed(text[index:index + chunk_size])
+
+
+@pytest.mark.parametrize('text', TEXTS)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1000])
+def test_scanner_limits(text, chunk_size):
+    depth, length = measure(text)
+    scan(text, chunk_size, RequestLimits(max_size=len(text), max_depth=max(depth, 1),
+                                         max_string_length=max(length, 1)))
+    with pytest.raises(LimitExceededError):
+        scan(text, chunk_size, RequestLimits(max_size=len(text) - 1))
+    if depth > 1:
+        with pytest.raises(LimitExceededError, match='nested'):
+            scan(text, chunk_size, RequestLimits(max_depth=depth - 1))
+    if length > 1:
+        with pytest.raises(LimitExceededError, match='string'):
+            scan(text, chunk_size, RequestLimits(max_string_length=length - 1))
+
+
+def random_value(rng, depth=0):
+    kind = rng.choice(['number', 'string', 'array', 'object'] if depth < 6 else ['string'])
+    if kind == 'number':
+        return rng.random()
+    if kind == 'string':
+        return ''.join(rng.choice('ab"\\[]{}é\n') for _ in range(rng.randint(0, 12)))
+    if kind == 'array':
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {random_value(rng, 6): random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+
+
+def test_scanner_random():
+    rng = random.Random(42)
+    for _ in range(200):
+        text = json.dumps(random_value(rng), ensure_ascii=rng.random() < 0.5).encode('utf-8')
+        depth, length = measure(text)
+        chunk_size = rng.randint(1, 16)
+        scan(text, chunk_size, RequestLimits(max_depth=max(depth, 1),
+                                             max_string_length=max(length, 1)))
+        if depth > 1:
+            with pytest.raises(LimitExceededError):
+                scan(text, chunk_size, RequestLimits(max_depth=depth - 1))
+        if length > 1:
+            with pytest.raises(LimitExceededError):
+                scan(text, chunk_size, RequestLimits(max_string_length=length - 1))
+
+
+def test_check_body():
+    limits = RequestLimits(max_depth=2, max_elements=3, max_string_length=100)
+    # Counting alone shows these are within the limits.
+    assert check_body(b'[1, {"a": 2}]', limits) is False
+    assert check_body(b'[1, 2, 3, 4]', limits) is True
+    # These need scanning.
+    assert check_body(b'["[[[", "{{{"]', limits) is False
+    with pytest.raises(LimitExceededError):
+        check_body(b'[[[1]]]', limits)
+    with pytest.raises(LimitExceededError):
+        check_body(b'["' + b'x' * 101 + b'"]', limits)
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        RequestLimits(max_size=0)
+    with pytest.raises(ValueError):
+        RequestLimits(max_depth=-1)
+
+
+def make_service():
+    service = JSONRPCService(make_service_description())
+
+    def count(params, options):
+        return len(params[0])
+
+    service.add(count)
+    return service
+
+
+def chunked(body, consumed, chunk_size=10):
+    for index in range(0, len(body), chunk_size):
+        consumed.append(index)
+        yield body[index:index + chunk_size]
+
+
+def test_call_chunks():
+    body = json.dumps({'version': '1.1', 'id': 1, 'method': 'count',
+                       'params': [list(range(1000))]}).encode('utf-8')
+    consumed = []
+    response = json.loads(make_service().call_chunks(chunked(body, consumed)))
+    assert response == {'version': '1.1', 'id': 1, 'result': 1000}
+
+
+def test_call_chunks_rejected_early():
+    body = b'{"version": "1.1", "method": "count", "params": [' + b'[' * 100 + b']' * 100 + b']}'
+    consumed = []
+    service = make_service()
+    response = json.loads(service.call_chunks(chunked(body, consumed),
+                                              limits=RequestLimits(max_depth=10)))
+    assert response['error']['code'] == -32600
+    assert 'nested deeper than the maximum of 10' in response['error']['error']['message']
+    # Reading stopped at the chunk exceeding the limit.
+    assert len(consumed) == 6
+    assert service.counters.snapshot()['invalid_requests'] == 1
+
+
+def test_call_chunks_too_large():
+    body = json.dumps({'version': '1.1', 'method': 'count',
+                       'params': ['x' * 100]}).encode('utf-8')
+    response = json.loads(make_service().call_chunks([body], limits=RequestLimits(max_size=50)))
+    assert response['error']['error']['message'] == (
+        'The request is larger than the maximum of 50 bytes')
+    response = json.loads(make_service().call_chunks(
+        [body], limits=RequestLimits(max_string_length=50)))
+    assert 'string longer' in response['error']['error']['message']
+
+
+def test_call_chunks_parse_error():
+    response = json.loads(make_service().call_chunks([b'{"version": ', b'"1.1"']))
+    assert response['error']['code'] == -32700
+
+
+def test_call_chunks_async():
+    body = b'{"version": "1.1", "id": 1, "method": "count", "params": [[1, 2, 3]]}'
+
+    async def chunks():
+        for index in range(0, len(body), 4):
+            yield body[index:index + 4]
+
+    async def run():
+        return json.loads(await service.call_chunks_async(chunks()))
+
+    service = make_service()
+    response = asyncio.run(run())
+    service.shutdown()
+    assert response['result'] == 3
+
+
+def make_limited_service():
+    service = JSONRPCService(make_service_description(), limits=RequestLimits(
+        max_size=1000, max_depth=4, max_elements=5, max_string_length=10))
+
+    def count(params, options):
+        return len(params[0])
+
+    service.add(count)
+    return service
+
+
+def call_params(service, params, method='call'):
+    req = {'version': '1.1', 'id': 1, 'method': 'count', 'params': params}
+    if method == 'call_py':
+        return service.call_py(req)
+    body = json.dumps(req)
+    if method == 'call_bytes':
+        return json.loads(service.call_bytes(body.encode('utf-8')))
+    return json.loads(getattr(service, method)(body))
+
+
+@pytest.mark.parametrize('method', ['call', 'call_bytes', 'call_py'])
+@pytest.mark.parametrize('params, message', [
+    ([[[[1]]]], 'nested deeper than the maximum of 4 levels'),
+    ([[1, 2, 3, 4, 5, 6]], 'more than 5 elements'),
+    ([{'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5, 'f': 6}], 'more than 5 elements'),
+    (['x' * 11], 'string longer than the maximum of 10'),
+    ([{'x' * 11: 1}], 'string longer than the maximum of 10'),
+])
+def test_service_limits(method, params, message):
+    service = make_limited_service()
+    response = call_params(service, params, method)
+    assert response['error']['code'] == -32600
+    assert message in response['error']['error']['message']
+    assert service.counters.snapshot()['invalid_requests'] == 1
+
+
+@pytest.mark.parametrize('method', ['call', 'call_bytes', 'call_py'])
+def test_service_within_limits(method):
+    service = make_limited_service()
+    # More commas in all than max_elements, but not in any one array
+    response = call_params(service, [[1, 2, 3, 4, 5], [1, 2, 3, 4, 5], 'a,b,c,d,e'], method)
+    assert response['result'] == 5
+
+
+def test_service_limits_size_and_batch():
+    service = make_limited_service()
+    response = json.loads(service.call(json.dumps(
+        {'version': '1.1', 'method': 'count', 'params': [list(range(300))]})))
+    assert 'larger than the maximum of 1000 bytes' in response['error']['error']['message']
+    batch = [{'version': '1.1', 'id': index, 'method': 'count', 'params': [[]]}
+             for index in range(6)]
+    response = json.loads(service.call(json.dumps(batch)))
+    assert 'more than 5 elements' in response['error']['error']['message']
+
+
+def test_call_chunks_service_limits():
+    body = b'{"version": "1.1", "id": 1, "method": "count", "params": [[1, 2, 3, 4, 5, 6]]}'
+    response = json.loads(make_limited_service().call_chunks([body[:30], body[30:]]))
+    assert 'more than 5 elements' in response['error']['error']['message']
+    response = json.loads(make_limited_service().call_chunks(
+        [body], limits=RequestLimits(max_elements=6)))
+    assert response['result'] == 6
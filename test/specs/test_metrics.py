@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.method import Method
+from jsonrpc11base.metrics import (BUCKET_COUNT, MAX_VALUE, CallMetrics, Snapshot,
+                                   bucket_index, bucket_upper_bound, merge_snapshots)
+from test.services import make_service_description
+
+
+def test_bucket_bounds():
+    previous_index = 0
+    for value in list(range(0, 5000)) + [2 ** n + d for n in range(13, 41) for d in (-1, 0, 1)]:
+        index = bucket_index(value)
+        assert index >= previous_index
+        assert value < bucket_upper_bound(index)
+        if index > 0:
+            assert value >= bucket_upper_bound(index - 1)
+        # Values are known to within 12.5%
+        assert bucket_upper_bound(index) - value <= max(value / 8, 1)
+        previous_index = index
+
+
+def test_bucket_limits():
+    assert bucket_index(-1) == 0
+    assert bucket_index(MAX_VALUE) == BUCKET_COUNT - 1
+    assert bucket_index(MAX_VALUE * 10) == BUCKET_COUNT - 1
+
+
+def test_snapshot_percentiles():
+    metrics = CallMetrics()
+    assert metrics.snapshot().percentile(50) == 0
+    for n in range(1, 101):
+        metrics.record(n * 1000, error=(n % 10 == 0))
+    snapshot = metrics.snapshot()
+    assert snapshot.calls == 100
+    assert snapshot.errors == 10
+    assert snapshot.total_ns == 5050 * 1000
+    assert 50000 <= snapshot.percentile(50) <= 50000 * 1.125
+    assert 95000 <= snapshot.percentile(95) <= 95000 * 1.125
+    assert 99000 <= snapshot.percentile(99) <= 99000 * 1.125
+    assert snapshot.percentile(100) >= 100000
+    assert set(snapshot.percentiles()) == {'p50', 'p95', 'p99'}
+
+
+def test_snapshot_json_and_merge():
+    fast = CallMetrics()
+    slow = CallMetrics()
+    for n in range(90):
+        fast.record(1000)
+    for n in range(10):
+        slow.record(1000000, error=True)
+    snapshot = Snapshot.from_json(json.loads(json.dumps(slow.snapshot().to_json())))
+    assert snapshot.counts == slow.snapshot().counts
+    merged = merge_snapshots([fast.snapshot(), snapshot])
+    assert merged.calls == 100
+    assert merged.errors == 10
+    assert merged.total_ns == 90 * 1000 + 10 * 1000000
+    assert merged.percentile(50) <= 1000 * 1.125
+    assert merged.percentile(95) >= 1000000
+    assert merged.stats()['calls'] == 100
+
+
+def test_metrics_threads():
+    metrics = CallMetrics()
+
+    def record():
+        for _ in range(10000):
+            metrics.record(100)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.snapshot().calls == 80000
+
+
+def test_method_stats():
+    def sleep(params, options):
+        time.sleep(params[0])
+
+    def broken(options):
+        raise TypeError('whoops')
+
+    method = Method(sleep)
+    method.call([0.01], None)
+    method.call([0.02], None)
+    assert method.call_count == 2
+    assert method.error_count == 0
+    assert method.cumulative_call_time >= 0.03
+    assert method.percentile(50) >= 0.01
+    assert method.percentile(99) >= 0.02
+
+    method = Method(broken)
+    for _ in range(3):
+        with pytest.raises(TypeError):
+            method.call(None, None)
+    assert method.call_count == 3
+    assert method.error_count == 3
+
+
+def test_metrics_in_flight():
+    metrics = CallMetrics()
+    metrics.start()
+    metrics.start()
+    metrics.record(100)
+    metrics.record_validation(50)
+    snapshot = metrics.snapshot()
+    assert snapshot.in_flight == 1
+    assert snapshot.validation_ns == 50
+
+
+def test_system_stats():
+    schema_dir = os.path.join(os.path.dirname(__file__), '../data/schema/test')
+    service = JSONRPCService(make_service_description(),
+                             schema_dir=schema_dir,
+                             validate_params=True,
+                             validate_result=True)
+    release = threading.Event()
+
+    def subtract(params, options):
+        release.wait()
+        return params[0] - params[1]
+
+    def hello(options):
+        return 'Hello world!'
+
+    service.add(subtract, max_concurrency=1)
+    service.add(hello)
+
+    service.call_py({'version': '1.1', 'method': 'hello'})
+    service.call_py({'version': '1.1', 'method': 'hello', 'params': [1]})
+    future = service.submit_py({'version': '1.1', 'method': 'subtract', 'params': [2, 1]})
+    while service.method_registry['subtract'].limiter.in_flight == 0:
+        time.sleep(0.001)
+
+    result = service.call_py({'version': '1.1', 'method': 'system.stats', 'id': 1})
+    release.set()
+    assert future.result()['result'] == 1
+    service.shutdown()
+
+    assert 'error' not in result
+    methods = result['result']['methods']
+    assert set(methods) == {'hello', 'subtract', 'system.describe', 'system.stats'}
+    assert methods['hello']['calls'] == 1
+    assert methods['hello']['errors'] == 0
+    assert methods['hello']['in_flight'] == 0
+    assert methods['hello']['validation_time'] > 0
+    assert set(methods['hello']['latency']) == {'p50', 'p95', 'p99'}
+    assert 'rejected' not in methods['hello']
+    assert methods['subtract']['in_flight'] == 1
+    assert methods['subtract']['rejected'] == 0
+    assert methods['system.stats']['in_flight'] == 1
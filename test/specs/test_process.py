@@ -0,0 +1,141 @@
+import asyncio
+import os
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.errors import APIError, InvalidParamsError
+from test.services import make_service_description
+
+
+class EntryNotFound(APIError):
+    code = 100
+    message = 'Entry not found'
+
+    def __init__(self, id):
+        self.error = {'id': id}
+
+
+class ReservedCodeError(APIError):
+    code = -32000
+    message = 'Reserved!'
+
+
+# Handlers run in a process must be picklable, so are defined at module level.
+
+def pid(options):
+    return os.getpid()
+
+
+def add(params, options):
+    return sum(params)
+
+
+def raise_entry_not_found(params, options):
+    raise EntryNotFound(params[0])
+
+
+def raise_invalid_params(options):
+    raise InvalidParamsError(message='bad', path='x')
+
+
+def raise_reserved_code(options):
+    raise ReservedCodeError()
+
+
+def broken_func(options):
+    raise TypeError('whoops')
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = JSONRPCService(make_service_description(), max_processes=2)
+    for func in [pid, add, raise_entry_not_found, raise_invalid_params,
+                 raise_reserved_code, broken_func]:
+        service.add(func, executor='process')
+    yield service
+    service.shutdown()
+
+
+def test_process(service):
+    result = service.call_py({'version': '1.1', 'method': 'pid', 'id': 1})
+    assert result['id'] == 1
+    assert result['result'] != os.getpid()
+
+
+def test_process_params(service):
+    result = service.call_py({'version': '1.1', 'method': 'add', 'params': [1, 2, 3]})
+    assert result['result'] == 6
+
+
+def test_process_async(service):
+    result = asyncio.run(service.call_py_async(
+        {'version': '1.1', 'method': 'add', 'params': [1, 2]}))
+    assert result['result'] == 3
+
+
+def test_process_stats(service):
+    method = service.method_registry['add']
+    call_count = method.call_count
+    service.call_py({'version': '1.1', 'method': 'add', 'params': [1]})
+    assert method.call_count == call_count + 1
+
+
+def test_process_api_error(service):
+    result = service.call_py({'version': '1.1', 'method': 'raise_entry_not_found',
+                              'params': [42], 'id': 1})
+    assert result['error'] == {
+        'name': 'APIError',
+        'code': 100,
+        'message': 'Entry not found',
+        'error': {'id': 42, 'method': 'raise_entry_not_found'}
+    }
+
+
+def test_process_jsonrpc_error(service):
+    result = service.call_py({'version': '1.1', 'method': 'raise_invalid_params'})
+    assert result['error'] == {
+        'name': 'JSONRPCError',
+        'code': -32602,
+        'message': 'Invalid params',
+        'error': {'message': 'bad', 'path': 'x', 'method': 'raise_invalid_params'}
+    }
+
+
+def test_process_reserved_code(service):
+    result = service.call_py({'version': '1.1', 'method': 'raise_reserved_code'})
+    assert result['error']['code'] == -32001
+    assert result['error']['error']['bad_code'] == -32000
+
+
+def test_process_exception(service):
+    result = service.call_py({'version': '1.1', 'method': 'broken_func'})
+    assert result['error']['code'] == -32002
+    error = result['error']['error']
+    assert error['exception_message'] == 'whoops'
+    assert any('broken_func' in line for line in error['traceback'])
+    assert any('TypeError: whoops' in line for line in error['traceback'])
+
+
+def test_process_unpicklable(service):
+    def local_hello(options):
+        return 'hello'
+    service.add(local_hello, executor='process')
+    result = service.call_py({'version': '1.1', 'method': 'local_hello'})
+    assert result['error']['code'] == -32002
+
+
+def test_process_invalid_executor():
+    service = JSONRPCService(make_service_description())
+    with pytest.raises(ValueError) as ve:
+        service.add(pid, executor='foo')
+    assert str(ve.value) == 'Unknown executor "foo"'
+
+
+def test_process_coroutine():
+    service = JSONRPCService(make_service_description())
+
+    async def hello(options):
+        return 'hello'
+
+    with pytest.raises(ValueError) as ve:
+        service.add(hello, executor='process')
+    assert str(ve.value) == 'Coroutine handlers may not run in a process'
@@ -0,0 +1,132 @@
+import json
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.prometheus import BUCKET_MAP, LATENCY_BUCKETS, escape_label
+from jsonrpc11base.metrics import bucket_upper_bound
+from test.services import make_service_description
+
+
+def make_service():
+    service = JSONRPCService(make_service_description())
+
+    def hello(options):
+        return 'Hello world!'
+
+    def broken_func(options):
+        raise TypeError('whoops')
+
+    service.add(hello)
+    service.add(broken_func)
+    return service
+
+
+def samples(text):
+    """Parses the sample lines of the exposition into a dict"""
+    result = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        name, value = line.rsplit(' ', 1)
+        result[name] = float(value)
+    return result
+
+
+def test_bucket_map():
+    for index, le_index in enumerate(BUCKET_MAP):
+        if le_index < len(LATENCY_BUCKETS):
+            assert bucket_upper_bound(index) / 1e9 <= LATENCY_BUCKETS[le_index]
+        if le_index > 0:
+            assert bucket_upper_bound(index) / 1e9 > LATENCY_BUCKETS[le_index - 1]
+
+
+def test_escape_label():
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+
+def test_render_metrics():
+    service = make_service()
+    service.call('{"version": "1.1", "method": "hello"}')
+    service.call('{"version": "1.1", "method": "hello"}')
+    service.call('{"version": "1.1", "method": "broken_func"}')
+    service.call('{"version": "1.1", "method": "foofoo"}')
+    service.call('1')
+    service.call('x')
+    service.call('[]')
+
+    text = service.render_metrics()
+    assert text.endswith('\n')
+    assert '# TYPE jsonrpc_method_duration_seconds histogram\n' in text
+    values = samples(text)
+    assert values['jsonrpc_requests_total'] == 5
+    assert values['jsonrpc_parse_errors_total'] == 1
+    assert values['jsonrpc_invalid_requests_total'] == 2
+    assert values['jsonrpc_method_not_found_total'] == 1
+    assert values['jsonrpc_method_calls_total{method="hello"}'] == 2
+    assert values['jsonrpc_method_errors_total{method="hello"}'] == 0
+    assert values['jsonrpc_method_calls_total{method="broken_func"}'] == 1
+    assert values['jsonrpc_method_errors_total{method="broken_func"}'] == 1
+    assert values['jsonrpc_method_in_flight{method="system.describe"}'] == 0
+    assert values['jsonrpc_method_duration_seconds_count{method="hello"}'] == 2
+    assert values['jsonrpc_method_duration_seconds_bucket{method="hello",le="+Inf"}'] == 2
+    assert values['jsonrpc_method_duration_seconds_bucket{method="hello",le="10"}'] == 2
+    assert values['jsonrpc_method_duration_seconds_sum{method="hello"}'] > 0
+
+
+def test_render_metrics_families_grouped():
+    """
+    Each metric family must appear once, with all its samples following it.
+    """
+    service = make_service()
+    service.call('{"version": "1.1", "method": "hello"}')
+    text = service.render_metrics()
+    families = [line.split(' ')[2] for line in text.splitlines() if line.startswith('# TYPE')]
+    assert len(families) == len(set(families))
+    family = None
+    for line in text.splitlines():
+        if line.startswith('# TYPE'):
+            family = line.split(' ')[2]
+        elif not line.startswith('#'):
+            assert line.startswith(family)
+
+
+def test_render_metrics_cached():
+    service = make_service()
+    service.call('{"version": "1.1", "method": "hello"}')
+    first = service.render_metrics()
+    assert service.render_metrics() is first
+
+    service.call('{"version": "1.1", "method": "hello"}')
+    second = service.render_metrics()
+    assert second is not first
+    assert samples(second)['jsonrpc_method_calls_total{method="hello"}'] == 2
+
+    # Methods added later are included
+    def later(options):
+        return None
+
+    service.add(later)
+    assert 'method="later"' in service.render_metrics()
+
+
+def test_render_metrics_system_stats_agree():
+    service = make_service()
+    service.call('{"version": "1.1", "method": "hello"}')
+    values = samples(service.render_metrics())
+    stats = json.loads(service.call('{"version": "1.1", "method": "system.stats"}'))
+    hello = stats['result']['methods']['hello']
+    assert values['jsonrpc_method_calls_total{method="hello"}'] == hello['calls']
+
+
+def test_render_metrics_cache():
+    service = make_service()
+    service.call('{"version": "1.1", "method": "system.describe"}')
+    values = samples(service.render_metrics())
+    assert values['jsonrpc_method_cache_hits_total{method="system.describe"}'] == 0
+    assert values['jsonrpc_method_cache_misses_total{method="system.describe"}'] == 1
+    assert 'jsonrpc_method_cache_hits_total{method="hello"}' not in values
+
+    # A hit is not a call, but is rendered all the same.
+    service.call('{"version": "1.1", "method": "system.describe"}')
+    values = samples(service.render_metrics())
+    assert values['jsonrpc_method_calls_total{method="system.describe"}'] == 1
+    assert values['jsonrpc_method_cache_hits_total{method="system.describe"}'] == 1
+    assert values['jsonrpc_method_cache_misses_total{method="system.describe"}'] == 1
@@ -1,5 +1,8 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from jsonrpc11base.validation.schema import Schema, SchemaError
+from jsonrpc11base.exceptions import InvalidSchemaError
 
 
 def test_schema_no_dir():
@@ -14,6 +17,13 @@ def test_schema_schema_dir_is_none():
     assert 'schema_dir is required' in str(ex)
 
 
+@pytest.mark.parametrize('lazy', [False, True])
+def test_schema_dir_missing(lazy):
+    schema = Schema('test/data/schema/missing', lazy=lazy)
+    assert schema.paths == {}
+    assert schema.get('foo') is None
+
+
 def test_schema_validate_absent():
     schema = Schema('test/data/schema')
     assert schema.validate_absent('foo') is False
@@ -31,3 +41,73 @@ def test_schema_validate_but_absent():
     with pytest.raises(SchemaError) as se:
         schema.validate('absent', 'bar')
     assert 'Schema "absent" specifies the the value must be absent' in str(se)
+
+
+def test_schema_validators_compiled_once():
+    schema = Schema('test/data/schema/test')
+    validator = schema.get('echo.params')['validator']
+    schema.validate('echo.params', {'x': 1})
+    schema.validate('echo.params', {'x': 'y'})
+    assert schema.get('echo.params')['validator'] is validator
+    assert validator.resolver is schema.resolver
+
+
+def test_schema_validate_error():
+    schema = Schema('test/data/schema/test')
+    with pytest.raises(SchemaError) as se:
+        schema.validate('posv.params', ['x', 1, 3.0, True, 'x'])
+    assert se.value.message == "'x' is not of type 'boolean'"
+    assert se.value.path == 'items.4.type'
+    assert se.value.value == 'boolean'
+
+
+def test_schema_invalid_schema():
+    with pytest.raises(InvalidSchemaError) as ise:
+        Schema('test/data/schema/invalid')
+    assert 'bad.params.json' in str(ise.value)
+    assert "1 is not valid under any of the given schemas" in str(ise.value)
+
+
+def test_lazy_schema():
+    schema = Schema('test/data/schema/test', lazy=True)
+    assert schema.schemas == {}
+    assert schema.get('nothing') is None
+    assert schema.validate_absent('hello.params') is True
+    schema.validate('echo.params', {'x': 1})
+    with pytest.raises(SchemaError):
+        schema.validate('posv.params', ['x', 1, 3.0, True, 'x'])
+    assert set(schema.schemas) == {'hello.params', 'echo.params', 'posv.params'}
+    assert schema.get('echo.params') is schema.get('echo.params')
+
+
+def test_lazy_schema_warm():
+    eager = Schema('test/data/schema/test')
+    schema = Schema('test/data/schema/test', lazy=True)
+    assert schema.warm(['echo.params', 'nothing']) == 1
+    assert schema.warm() == len(eager.schemas)
+    assert set(schema.schemas) == set(eager.schemas)
+
+
+def test_lazy_schema_invalid_on_first_use():
+    schema = Schema('test/data/schema/invalid', lazy=True)
+    with pytest.raises(InvalidSchemaError):
+        schema.get('bad.params')
+    with pytest.raises(InvalidSchemaError):
+        schema.warm()
+
+
+def test_lazy_schema_loaded_once():
+    schema = Schema('test/data/schema/test', lazy=True)
+    load_file = schema.load_file
+    loads = []
+
+    def slow_load_file(file_path):
+        loads.append(file_path)
+        time.sleep(0.01)
+        return load_file(file_path)
+
+    schema.load_file = slow_load_file
+    with ThreadPoolExecutor(8) as executor:
+        wrappers = list(executor.map(lambda _: schema.get('echo.params'), range(8)))
+    assert len(loads) == 1
+    assert all(wrapper is wrappers[0] for wrapper in wrappers)
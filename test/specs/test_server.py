@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import tempfile
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.server import StreamServer
+from test.services import make_service_description
+
+
+def make_service():
+    service = JSONRPCService(make_service_description())
+
+    async def slow(params, options):
+        await asyncio.sleep(0.05)
+        return 'slow'
+
+    async def fast(params, options):
+        return 'fast'
+
+    async def whoami(options):
+        return options
+
+    service.add(slow)
+    service.add(fast)
+    service.add(whoami)
+    return service
+
+
+def request(method, request_id=None):
+    req = {'version': '1.1', 'method': method, 'params': []}
+    if request_id is not None:
+        req['id'] = request_id
+    return json.dumps(req).encode('utf-8')
+
+
+async def serve_tcp(server):
+    listener = await server.start_tcp('127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    return listener, reader, writer
+
+
+async def close(listener, writer):
+    writer.close()
+    listener.close()
+    await listener.wait_closed()
+
+
+def test_newline_framing_out_of_order():
+    async def run():
+        listener, reader, writer = await serve_tcp(StreamServer(make_service()))
+        writer.write(request('slow', 1) + b'\n\n' + request('fast', 2) + b'\n')
+        first = json.loads(await reader.readline())
+        second = json.loads(await reader.readline())
+        await close(listener, writer)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == {'version': '1.1', 'id': 2, 'result': 'fast'}
+    assert second == {'version': '1.1', 'id': 1, 'result': 'slow'}
+
+
+def test_length_framing():
+    async def read_message(reader):
+        length, = struct.unpack('>I', await reader.readexactly(4))
+        return json.loads(await reader.readexactly(length))
+
+    async def run():
+        server = StreamServer(make_service(), framing='length')
+        listener, reader, writer = await serve_tcp(server)
+        for message in [request('slow', 1), request('fast', 2)]:
+            writer.write(struct.pack('>I', len(message)) + message)
+        responses = [await read_message(reader), await read_message(reader)]
+        await close(listener, writer)
+        return responses
+
+    responses = asyncio.run(run())
+    assert [response['id'] for response in responses] == [2, 1]
+
+
+def test_max_pending_keeps_order():
+    async def run():
+        server = StreamServer(make_service(), max_pending=1)
+        listener, reader, writer = await serve_tcp(server)
+        writer.write(request('slow', 1) + b'\n' + request('fast', 2) + b'\n')
+        responses = [json.loads(await reader.readline()) for _ in range(2)]
+        await close(listener, writer)
+        return responses
+
+    responses = asyncio.run(run())
+    assert [response['id'] for response in responses] == [1, 2]
+
+
+def test_responses_sent_after_client_eof():
+    async def run():
+        listener, reader, writer = await serve_tcp(StreamServer(make_service()))
+        writer.write(request('slow', 1) + b'\n')
+        writer.write_eof()
+        response = json.loads(await reader.readline())
+        # The server closes the connection once done.
+        assert await reader.read() == b''
+        await close(listener, writer)
+        return response
+
+    assert asyncio.run(run())['result'] == 'slow'
+
+
+def test_notification_batch_has_no_response():
+    async def run():
+        listener, reader, writer = await serve_tcp(StreamServer(make_service()))
+        writer.write(b'[' + request('fast') + b']\n' + request('fast', 2) + b'\n')
+        response = json.loads(await reader.readline())
+        await close(listener, writer)
+        return response
+
+    assert asyncio.run(run())['id'] == 2
+
+
+def test_parse_error():
+    async def run():
+        listener, reader, writer = await serve_tcp(StreamServer(make_service()))
+        writer.write(b'{"version": \n')
+        response = json.loads(await reader.readline())
+        await close(listener, writer)
+        return response
+
+    assert asyncio.run(run())['error']['code'] == -32700
+
+
+@pytest.mark.parametrize('framing', ['newline', 'length'])
+def test_message_too_large(framing):
+    async def run():
+        server = StreamServer(make_service(), framing=framing, max_message_size=16)
+        listener, reader, writer = await serve_tcp(server)
+        message = request('fast', 1)
+        if framing == 'newline':
+            writer.write(message + b'\n')
+        else:
+            writer.write(struct.pack('>I', len(message)) + message)
+        closed = await reader.read()
+        await close(listener, writer)
+        return closed
+
+    assert asyncio.run(run()) == b''
+
+
+def test_options():
+    async def run():
+        server = StreamServer(make_service(),
+                              options=lambda writer: writer.get_extra_info('peername')[0])
+        listener, reader, writer = await serve_tcp(server)
+        writer.write(b'{"version": "1.1", "method": "whoami"}\n')
+        response = json.loads(await reader.readline())
+        await close(listener, writer)
+        return response
+
+    assert asyncio.run(run())['result'] == '127.0.0.1'
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='requires Unix domain sockets')
+def test_unix_socket():
+    async def run(path):
+        listener = await StreamServer(make_service()).start_unix(path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(request('fast', 1) + b'\n')
+        response = json.loads(await reader.readline())
+        await close(listener, writer)
+        return response
+
+    with tempfile.TemporaryDirectory() as directory:
+        response = asyncio.run(run(os.path.join(directory, 'jsonrpc.sock')))
+    assert response['result'] == 'fast'
+
+
+def test_invalid_args():
+    with pytest.raises(ValueError):
+        StreamServer(make_service(), framing='xml')
+    with pytest.raises(ValueError):
+        StreamServer(make_service(), max_pending=0)
+
+
+def test_shutdown():
+    async def run():
+        server = StreamServer(make_service())
+        listener, reader, writer = await serve_tcp(server)
+        # An idle connection, and one with a request in progress
+        idle_reader, idle_writer = await asyncio.open_connection(
+            '127.0.0.1', listener.sockets[0].getsockname()[1])
+        idle_writer.write(request('fast', 1) + b'\n')
+        assert json.loads(await idle_reader.readline())['result'] == 'fast'
+        writer.write(request('slow', 1) + b'\n')
+        while not server.service.method_registry['slow'].metrics.snapshot().in_flight:
+            await asyncio.sleep(0.001)
+        await server.shutdown(timeout=5)
+        response = json.loads(await reader.readline())
+        assert await reader.read() == b''
+        assert await idle_reader.read() == b''
+        assert server.connections == set()
+        writer.close()
+        idle_writer.close()
+        return response
+
+    assert asyncio.run(run())['result'] == 'slow'
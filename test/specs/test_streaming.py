@@ -0,0 +1,211 @@
+import asyncio
+import io
+import json
+import threading
+import time
+import pytest
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.asgi import ASGIApplication
+from jsonrpc11base.cache import CachePolicy
+from jsonrpc11base.wsgi import WSGIApplication
+from test.services import make_service_description
+
+
+def make_service(codec='json'):
+    service = JSONRPCService(make_service_description(), codec=codec, stream_chunk_size=3)
+
+    def records(params, options):
+        return ({'id': index, 'name': f'record {index}'} for index in range(params[0]))
+
+    def records_list(params, options):
+        return [{'id': index, 'name': f'record {index}'} for index in range(params[0])]
+
+    async def async_records(params, options):
+        for index in range(params[0]):
+            await asyncio.sleep(0)
+            yield {'id': index}
+
+    def fails_at(params, options):
+        for index in range(10):
+            if index == params[0]:
+                raise ValueError('Failed')
+            yield index
+
+    def scalar(params, options):
+        return params[0]
+
+    service.add(records)
+    service.add(records_list)
+    service.add(async_records)
+    service.add(fails_at)
+    service.add(scalar)
+    service.add(records, name='cached_records', cache=CachePolicy())
+    return service
+
+
+def request(method, params, request_id=1):
+    req = {'version': '1.1', 'method': method, 'params': params}
+    if request_id is not None:
+        req['id'] = request_id
+    return json.dumps(req).encode('utf-8')
+
+
+@pytest.mark.parametrize('codec', ['json', 'orjson'])
+@pytest.mark.parametrize('count', [0, 1, 3, 10])
+@pytest.mark.parametrize('request_id', [1, None])
+def test_stream_matches_call_bytes(codec, count, request_id):
+    service = make_service(codec)
+    parts = list(service.call_stream(request('records', [count], request_id)))
+    expected = service.call_bytes(request('records_list', [count], request_id))
+    assert b''.join(parts) == expected
+    # The first part has the first chunk of items; each further part another.
+    assert len(parts) == 2 + max(count - 1, 0) // 3
+
+
+def test_stream_list_result():
+    service = make_service()
+    parts = list(service.call_stream(request('records_list', [7])))
+    assert len(parts) == 4
+    assert json.loads(b''.join(parts))['result'][6] == {'id': 6, 'name': 'record 6'}
+
+
+def test_stream_other_responses_in_one_part():
+    service = make_service()
+    assert list(service.call_stream(request('scalar', [42]))) == [
+        service.call_bytes(request('scalar', [42]))]
+    assert json.loads(b''.join(service.call_stream(b'{'))).get('error')['code'] == -32700
+    batch = b'[' + request('records', [4]) + b']'
+    parts = list(service.call_stream(batch))
+    assert len(parts) == 1
+    assert len(json.loads(parts[0])[0]['result']) == 4
+    assert list(service.call_stream(b'[' + request('records', [4], None) + b']')) == []
+
+
+def test_stream_error_before_first_chunk():
+    service = make_service()
+    parts = list(service.call_stream(request('fails_at', [2])))
+    assert len(parts) == 1
+    assert json.loads(parts[0])['error']['error']['exception_message'] == 'Failed'
+
+
+def test_stream_error_after_first_chunk():
+    parts = make_service().call_stream(request('fails_at', [5]))
+    assert next(parts).endswith(b'[0, 1, 2')
+    with pytest.raises(ValueError):
+        list(parts)
+
+
+def test_generator_result_without_streaming():
+    service = make_service()
+    response = json.loads(service.call(request('records', [4])))
+    assert [record['id'] for record in response['result']] == [0, 1, 2, 3]
+    response = json.loads(asyncio.run(service.call_async(request('async_records', [2]))))
+    assert response['result'] == [{'id': 0}, {'id': 1}]
+
+
+def test_async_generator_result_sync():
+    service = make_service()
+    response = json.loads(service.call(request('async_records', [2])))
+    assert response['result'] == [{'id': 0}, {'id': 1}]
+    response = service.call_py({'version': '1.1', 'id': 1, 'method': 'async_records',
+                                'params': [2]})
+    assert response['result'] == [{'id': 0}, {'id': 1}]
+    parts = list(service.call_stream(request('async_records', [5])))
+    assert [record['id'] for record in json.loads(b''.join(parts))['result']] == [0, 1, 2, 3, 4]
+
+
+def test_generator_read_within_call():
+    service = JSONRPCService(make_service_description())
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_records(params, options):
+        started.set()
+        release.wait(5)
+        time.sleep(0.05)
+        yield 1
+        raise ValueError('Failed')
+
+    service.add(slow_records, max_concurrency=1)
+    first = service.submit_py({'version': '1.1', 'id': 1, 'method': 'slow_records',
+                               'params': []})
+    started.wait(5)
+    # The generator is still being read, so the call still holds its slot.
+    response = service.call_py({'version': '1.1', 'id': 2, 'method': 'slow_records',
+                                'params': []})
+    assert response['error']['code'] == -32003
+    release.set()
+    assert first.result()['error']['error']['exception_message'] == 'Failed'
+    stats = service.method_registry['slow_records'].stats()
+    assert stats['calls'] == 1
+    assert stats['errors'] == 1
+    assert stats['call_time'] >= 0.05
+    service.shutdown()
+
+
+def test_generator_result_cached():
+    service = make_service()
+    for _ in range(2):
+        parts = list(service.call_stream(request('cached_records', [4])))
+        assert len(parts) == 1
+        assert len(json.loads(parts[0])['result']) == 4
+    assert service.get_cache('cached_records').stats()['hits'] == 1
+
+
+@pytest.mark.parametrize('method', ['records', 'records_list', 'async_records'])
+def test_stream_async(method):
+    service = make_service()
+
+    async def run():
+        parts = await service.call_stream_async(request(method, [5]))
+        return [part async for part in parts]
+
+    parts = asyncio.run(run())
+    service.shutdown()
+    assert len(parts) == 3
+    assert [record['id'] for record in json.loads(b''.join(parts))['result']] == [0, 1, 2, 3, 4]
+
+
+def test_stream_async_error_before_first_chunk():
+    service = make_service()
+
+    async def run():
+        parts = await service.call_stream_async(request('fails_at', [0]))
+        return [part async for part in parts]
+
+    parts = asyncio.run(run())
+    service.shutdown()
+    assert json.loads(b''.join(parts))['error']['error']['exception_message'] == 'Failed'
+
+
+def test_wsgi_stream():
+    app = WSGIApplication(make_service(), stream=True)
+    body = request('records', [5])
+    started = []
+    environ = {'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+               'wsgi.input': io.BytesIO(body)}
+    parts = list(app(environ, lambda status, headers: started.append((status, headers))))
+    assert started == [('200 OK', [('Content-Type', 'application/json')])]
+    assert len(parts) == 3
+    assert len(json.loads(b''.join(parts))['result']) == 5
+
+
+def test_asgi_stream():
+    app = ASGIApplication(make_service(), stream=True)
+    messages = [{'type': 'http.request', 'body': request('async_records', [5])}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({'type': 'http', 'method': 'POST', 'headers': []}, receive, send))
+    app.service.shutdown()
+    assert sent[0]['status'] == 200
+    assert dict(sent[0]['headers']) == {b'content-type': b'application/json'}
+    assert [message['more_body'] for message in sent[1:-1]] == [True] * 3
+    assert sent[-1] == {'type': 'http.response.body', 'body': b''}
+    body = b''.join(message['body'] for message in sent[1:])
+    assert len(json.loads(body)['result']) == 5
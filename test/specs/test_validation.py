@@ -1,6 +1,9 @@
 import pytest
 from jsonrpc11base.validation.validation \
     import Validation, InvalidParamsError, InvalidResultServerError
+from jsonrpc11base import JSONRPCService
+from test.services import make_service_description
+
 
 SCHEMA_DIR = 'test/data/schema/test'
 
@@ -109,3 +112,17 @@ def test_validate_result_not():
     assert error_json['error']['message'] == "123 is not of type 'string'"
     assert error_json['error']['path'] == 'type'
     assert error_json['error']['value'] == 'string'
+
+
+def test_lazy_warm():
+    v = Validation(SCHEMA_DIR, lazy=True)
+    assert v.warm(['echo', 'hello']) == 4
+    assert set(v.schema.schemas) == {'echo.params', 'echo.result', 'hello.params', 'hello.result'}
+
+
+def test_service_warm_schemas():
+    service = JSONRPCService(make_service_description(), schema_dir=SCHEMA_DIR,
+                             lazy_schemas=True)
+    assert service.warm_schemas(['subtract']) == 2
+    assert service.warm_schemas() == len(Validation(SCHEMA_DIR).schema.schemas)
+    assert JSONRPCService(make_service_description()).warm_schemas() == 0
@@ -0,0 +1,135 @@
+import io
+import json
+from wsgiref.util import setup_testing_defaults
+from wsgiref.validate import validator
+from jsonrpc11base import JSONRPCService
+from jsonrpc11base.wsgi import WSGIApplication
+from test.services import make_service_description
+
+
+def make_app(**kwargs):
+    service = JSONRPCService(make_service_description())
+
+    def subtract(params, options):
+        return params[0] - params[1]
+
+    def whoami(options):
+        return options
+
+    service.add(subtract)
+    service.add(whoami)
+    return WSGIApplication(service, **kwargs)
+
+
+class ShortReads(io.BytesIO):
+    """Returns at most 3 bytes per read."""
+    def read(self, size=-1):
+        return super().read(min(size, 3) if size >= 0 else 3)
+
+
+def request(app, body=b'', method='POST', content_length=True, stream=None, validate=True,
+            **environ):
+    env = {'REQUEST_METHOD': method, 'QUERY_STRING': '', 'wsgi.input': stream or io.BytesIO(body)}
+    if content_length:
+        env['CONTENT_LENGTH'] = str(len(body))
+    env.update(environ)
+    setup_testing_defaults(env)
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = status
+        started['headers'] = dict(headers)
+
+    result = (validator(app) if validate else app)(env, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], body
+
+
+def test_wsgi_call():
+    status, headers, body = request(
+        make_app(), b'{"version": "1.1", "id": 1, "method": "subtract", "params": [42, 23]}')
+    assert status == '200 OK'
+    assert headers['Content-Type'] == 'application/json'
+    assert headers['Content-Length'] == str(len(body))
+    assert json.loads(body) == {'version': '1.1', 'id': 1, 'result': 19}
+
+
+def test_wsgi_response_is_not_copied():
+    app = make_app()
+    body = b'{"version": "1.1", "id": 1, "method": "subtract", "params": [2, 1]}'
+    env = {'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+           'wsgi.input': io.BytesIO(body)}
+    result = app(env, lambda status, headers: None)
+    assert isinstance(result, list) and len(result) == 1
+    assert json.loads(result[0])['result'] == 1
+
+
+def test_wsgi_parse_error():
+    status, headers, body = request(make_app(), b'{"version": ')
+    assert status == '200 OK'
+    assert json.loads(body)['error']['code'] == -32700
+
+
+def test_wsgi_short_reads():
+    body = b'{"version": "1.1", "id": 1, "method": "subtract", "params": [2, 1]}'
+    status, headers, response = request(make_app(), body, stream=ShortReads(body))
+    assert json.loads(response)['result'] == 1
+
+
+def test_wsgi_truncated_body():
+    status, headers, body = request(make_app(), b'{"version": "1.1"}',
+                                    stream=io.BytesIO(b'{"version"'))
+    assert status == '400 Bad Request'
+
+
+def test_wsgi_method_not_allowed():
+    status, headers, body = request(make_app(), method='GET', content_length=False)
+    assert status == '405 Method Not Allowed'
+    assert headers['Allow'] == 'POST'
+
+
+def test_wsgi_body_too_large():
+    app = make_app(max_body_size=10)
+    status, headers, body = request(app, b'{"version": "1.1", "method": "whoami"}')
+    assert status == '413 Payload Too Large'
+
+
+def test_wsgi_invalid_content_length():
+    # The WSGI validator would reject the request itself.
+    status, headers, body = request(make_app(), b'{}', content_length=False,
+                                    validate=False, CONTENT_LENGTH='abc')
+    assert status == '400 Bad Request'
+
+
+def test_wsgi_length_required():
+    status, headers, body = request(make_app(), b'{}', content_length=False)
+    assert status == '411 Length Required'
+
+
+def test_wsgi_input_terminated():
+    body = b'{"version": "1.1", "id": 1, "method": "subtract", "params": [2, 1]}'
+    status, headers, response = request(make_app(), body, content_length=False,
+                                        **{'wsgi.input_terminated': True})
+    assert json.loads(response)['result'] == 1
+    app = make_app(max_body_size=10)
+    status, headers, response = request(app, body, content_length=False,
+                                        **{'wsgi.input_terminated': True})
+    assert status == '413 Payload Too Large'
+
+
+def test_wsgi_options():
+    app = make_app(options=lambda environ: environ.get('HTTP_AUTHORIZATION'))
+    status, headers, body = request(app, b'{"version": "1.1", "method": "whoami"}',
+                                    HTTP_AUTHORIZATION='token')
+    assert json.loads(body)['result'] == 'token'
+
+
+def test_wsgi_notification_batch():
+    status, headers, body = request(make_app(),
+                                    b'[{"version": "1.1", "method": "whoami"}]')
+    assert status == '204 No Content'
+    assert body == b''